@@ -1,19 +1,26 @@
 # api_server.py
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hmac
+
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional, Any, Dict
 
 from config import Config
 from controllers import Controllers
 from models import StudentProfile
-from services.submissions_store import SubmissionStore
+from services.submissions_store import get_store
+from services import submission_export
 from services.email_builder import build_email_from_submission
+from services.retry import Deadline
+from services.llm_client import LLMOverloaded
 
 
 app = FastAPI(title="Saarthi API")
 config = Config()
-controllers = Controllers(config)
-store = SubmissionStore()
+store = get_store()
+controllers = Controllers(config, plan_store=store)
 
 
 class SubmitRequest(BaseModel):
@@ -37,9 +44,9 @@ class SubmitResponse(BaseModel):
 
 
 @app.post("/api/submit", response_model=SubmitResponse)
-def submit(req: SubmitRequest):
-    # 1) store inputs
-    created = store.create_submission(req.model_dump())
+async def submit(req: SubmitRequest):
+    # 1) store inputs (SQLite calls run off the event loop)
+    created = await asyncio.to_thread(store.create_submission, req.model_dump())
 
     # 2) generate roadmap
     session = controllers.session_manager.create_session(req.student_name)
@@ -55,7 +62,12 @@ def submit(req: SubmitRequest):
         preferences=req.preferences or "",
     )
 
-    result = controllers.roadmap_service.generate(profile, session)
+    deadline = Deadline(config.REQUEST_DEADLINE_SECONDS)
+    try:
+        # Awaits the bounded async LLM client - no thread held while Gemini works
+        result = await controllers.roadmap_service.generate_async(profile, session, deadline=deadline)
+    except LLMOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "10"})
     if not result.ok:
         raise HTTPException(status_code=500, detail=result.message)
 
@@ -67,14 +79,19 @@ def submit(req: SubmitRequest):
     ui_timeline = data.get("timeline_events", [])  # ✅ Fixed key
     ui_projects = data.get("projects", [])          # ✅ Fixed key
 
-    # 3) store generated outputs
+    # 3) store generated outputs (an identical stored plan is shared, not copied)
     # ✅ FIX: Pass all 5 required arguments
-    store.save_generated_plan(
+    audit = [("REUSED_PLAN", f"Served stored plan #{data['plan_id']}")] if data.get("plan_id") else []
+    await asyncio.to_thread(
+        store.save_generated_plan,
         created["id"],
         roadmap_md,
         ui_programs,
         ui_timeline,
-        ui_projects
+        ui_projects,
+        audit=audit,
+        profile_fingerprint=data.get("fingerprint", ""),
+        catalog_version=data.get("catalog_version", ""),
     )
 
     return SubmitResponse(id=created["id"], resume_token=created["resume_token"], status="GENERATED")
@@ -88,11 +105,70 @@ def get_submission(submission_id: int, token: str):
     return store.unpack(sub)
 
 
+# ---------------- PROGRAMS ----------------
+
+@app.get("/api/programs/{program_id}")
+def get_program(program_id: str):
+    program = controllers.program_search.get_program(program_id)
+    if not program:
+        raise HTTPException(status_code=404, detail="Program not found")
+    return program.to_dict()
+
+
+@app.get("/api/programs/{program_id}/similar")
+def similar_programs(program_id: str, limit: int = 10):
+    if not controllers.program_search.get_program(program_id):
+        raise HTTPException(status_code=404, detail="Program not found")
+    return [
+        {**program.to_dict(), "similarity": round(similarity, 4)}
+        for program, similarity in controllers.program_search.similar_programs(program_id, limit=limit)
+    ]
+
+
 # ---------------- ADMIN ----------------
 
-@app.get("/api/admin/submissions")
-def admin_list(status: Optional[str] = None, limit: int = 50):
-    subs = store.list_queue(status_filter=status or "ALL", limit=limit)
+def require_admin(x_admin_pin: Optional[str] = Header(None)) -> None:
+    """Every /api/admin route: X-Admin-Pin must match ADMIN_PIN"""
+    expected = getattr(config, "ADMIN_PIN", "") or ""
+    if not expected:
+        raise HTTPException(status_code=503, detail="ADMIN_PIN not set in config/env")
+    if not x_admin_pin:
+        raise HTTPException(status_code=401, detail="Missing X-Admin-Pin header")
+    if not hmac.compare_digest(x_admin_pin.strip().encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Wrong admin PIN")
+
+
+admin = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@admin.get("/api/admin/metrics")
+def admin_metrics():
+    return {
+        "llm_cache": controllers.llm_client.cache_stats(),
+        "llm_latency": controllers.llm_client.latency_stats(),
+        "llm_tokens": controllers.llm_client.token_stats(),
+        "llm_async": controllers.roadmap_service.async_llm.stats(),
+        "roadmap_inflight": controllers.roadmap_service.inflight_stats(),
+        "catalog": controllers.program_search.catalog_status(),
+    }
+
+
+@admin.get("/api/admin/submissions")
+def admin_list(
+    status: Optional[str] = None,
+    q: Optional[str] = None,
+    limit: int = 50,
+    after_id: Optional[int] = None,
+    before_created_at: Optional[str] = None,
+):
+    """Newest first; for the next page pass the last item's id (and created_at) back as the cursor"""
+    subs = store.list_queue(
+        status_filter=status or "ALL",
+        query=q or "",
+        limit=limit,
+        after_id=after_id,
+        before_created_at=before_created_at,
+    )
     return [
         {
             "id": s["id"],
@@ -105,7 +181,53 @@ def admin_list(status: Optional[str] = None, limit: int = 50):
     ]
 
 
-@app.get("/api/admin/submission/{submission_id}")
+@admin.get("/api/admin/search")
+def admin_search(q: str, status: Optional[str] = None, limit: int = 50):
+    """Full-text search over name, email, interests and roadmap (best match first)"""
+    return store.search_submissions(q, status_filter=status or "ALL", limit=limit)
+
+
+@admin.get("/api/admin/analytics/top-programs")
+def admin_top_programs(since: str = "", until: str = "", limit: int = 20, max_rank: int = 0):
+    """Most recommended programs for submissions created in [since, until), e.g. since=2025-09"""
+    return store.top_recommended_programs(since=since, until=until, limit=limit, max_rank=max_rank)
+
+
+@admin.get("/api/admin/analytics/program-trend")
+def admin_program_trend(key: str, since: str = ""):
+    """Monthly recommendation counts for one program (key = program_key from top-programs)"""
+    return store.recommendation_trend(key, since=since)
+
+
+@admin.get("/api/admin/export")
+def admin_export(
+    format: str = "ndjson",
+    columns: Optional[str] = None,
+    recommendations: bool = False,
+    status: Optional[str] = None,
+    since: Optional[str] = None,
+    raw: bool = False,
+):
+    """
+    Stream every submission as NDJSON or CSV (oldest first). columns is a
+    comma-separated subset; recommendations adds each one's recommended programs.
+    CSV cells that would open as spreadsheet formulas are escaped unless raw.
+    """
+    if format not in submission_export.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(submission_export.FORMATS)}")
+    try:
+        cols = submission_export.resolve_columns(columns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    chunks = submission_export.export(store, format, cols, recommendations, status or "ALL", since or "", raw)
+    return StreamingResponse(
+        chunks,
+        media_type=submission_export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="submissions.{format}"'},
+    )
+
+
+@admin.get("/api/admin/submission/{submission_id}")
 def admin_get(submission_id: int):
     sub = store.admin_get(submission_id)
     if not sub:
@@ -118,7 +240,7 @@ class UpdateEmailRequest(BaseModel):
     body_text: str
 
 
-@app.post("/api/admin/update_email/{submission_id}")
+@admin.post("/api/admin/update_email/{submission_id}")
 def admin_update_email(submission_id: int, req: UpdateEmailRequest):
     sub = store.admin_get(submission_id)
     if not sub:
@@ -127,7 +249,7 @@ def admin_update_email(submission_id: int, req: UpdateEmailRequest):
     return {"ok": True}
 
 
-@app.post("/api/admin/generate_email/{submission_id}")
+@admin.post("/api/admin/generate_email/{submission_id}")
 def admin_generate_email(submission_id: int):
     sub = store.admin_get(submission_id)
     if not sub:
@@ -135,14 +257,20 @@ def admin_generate_email(submission_id: int):
 
     sub_u = store.unpack(sub)
     email = build_email_from_submission(sub_u)
-    store.admin_save_email(submission_id, email["subject"], email["body_text"])
+    store.admin_save_email(
+        submission_id, email["subject"], email["body_text"], audit=[("AUTOFILL_EMAIL", "Generated email draft")]
+    )
     return email
 
 
-@app.post("/api/admin/mark_sent/{submission_id}")
+@admin.post("/api/admin/mark_sent/{submission_id}")
 def admin_mark_sent(submission_id: int):
     sub = store.admin_get(submission_id)
     if not sub:
         raise HTTPException(status_code=404, detail="Not found")
     store.admin_mark_sent(submission_id)
-    return {"ok": True}
\ No newline at end of file
+    return {"ok": True}
+
+
+# After the routes above: include_router copies them at call time
+app.include_router(admin)
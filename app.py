@@ -4,7 +4,7 @@ import logging
 import sys
 import re
 import inspect
-from typing import Any, Dict, Tuple, List
+from typing import Any, Dict, Tuple, List, Optional
 from datetime import date, timedelta
 
 from services.github_issues import GitHubIssuesClient
@@ -14,7 +14,7 @@ from ui.layout import create_ui_layout
 from ui.styles import get_css
 
 from utils.dashboard_renderer import render_program_cards, render_checklist, render_timeline
-from services.submissions_store import SubmissionStore
+from services.submissions_store import get_store
 from services.email_builder import build_email_from_submission
 
 logging.basicConfig(
@@ -24,7 +24,7 @@ logging.basicConfig(
 )
 logger = logging.getLogger("saarthi")
 
-store = SubmissionStore()
+store = get_store()
 gh = GitHubIssuesClient()
 
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
@@ -32,7 +32,7 @@ EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
 def create_app() -> gr.Blocks:
     config = Config()
-    controllers = Controllers(config)
+    controllers = Controllers(config, plan_store=store)
     css = get_css(config)
     theme = gr.themes.Soft(primary_hue="slate", secondary_hue="indigo", neutral_hue="slate")
 
@@ -72,6 +72,16 @@ def wire_events(components: dict, controllers: Controllers, config: Config):
         except Exception:
             return (0, "")
 
+    def program_label(p: Dict[str, Any]) -> str:
+        return f"{p.get('program_name','')} — {p.get('university_name','')}".strip(" —")
+
+    def program_key(p: Dict[str, Any]) -> str:
+        # Older saved plans have no program_id; fall back to the display label
+        return p.get("program_id") or program_label(p)
+
+    def compare_choices(programs: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+        return [(program_label(p), program_key(p)) for p in (programs or [])[:12]]
+
     def valid_email(email: str) -> bool:
         return bool(EMAIL_RE.match((email or "").strip()))
 
@@ -173,16 +183,28 @@ def wire_events(components: dict, controllers: Controllers, config: Config):
             gr.update(interactive=(step == 4)),
         )
 
-    def save_generated_plan_compat(submission_id: int, full_md: str, programs: list, timeline_events: list, projects: list):
+    def save_generated_plan_compat(
+        submission_id: int, full_md: str, programs: list, timeline_events: list, projects: list,
+        plan: Optional[Dict[str, Any]] = None,
+    ):
         """
         Backward compatible wrapper for SubmissionStore.save_generated_plan
         because your store signature may differ across versions.
+        `plan` (the controller's plan dict) supplies the reuse key if the store takes one.
         """
         try:
             sig = inspect.signature(store.save_generated_plan)
             # parameters include "self"
             n = len(sig.parameters)
-            if n >= 6:
+            if plan and "profile_fingerprint" in sig.parameters:
+                audit = [("REUSED_PLAN", f"Served stored plan #{plan['plan_id']}")] if plan.get("plan_id") else []
+                store.save_generated_plan(
+                    int(submission_id), full_md or "", programs or [], timeline_events or [], projects or [],
+                    audit=audit,
+                    profile_fingerprint=plan.get("fingerprint") or "",
+                    catalog_version=plan.get("catalog_version") or "",
+                )
+            elif n >= 6:
                 # self, id, md, programs, timeline, projects
                 store.save_generated_plan(int(submission_id), full_md or "", programs or [], timeline_events or [], projects or [])
             else:
@@ -345,7 +367,7 @@ def wire_events(components: dict, controllers: Controllers, config: Config):
         checklist_html = render_checklist(projects)
         full_md = sub_u.get("roadmap_md", "") or ""
 
-        choices = [f"{p.get('program_name','')} — {p.get('university_name','')}".strip(" —") for p in programs[:12]]
+        choices = compare_choices(programs)
 
         return (
             gr.update(visible=False),
@@ -491,7 +513,7 @@ def wire_events(components: dict, controllers: Controllers, config: Config):
     
         # email validation
         if wants_email and not valid_email(student_email):
-            return (
+            yield (
                 gr.update(value="❌ Please enter a valid email."),
                 gr.update(value=""),
                 gr.update(value=""),
@@ -509,6 +531,7 @@ def wire_events(components: dict, controllers: Controllers, config: Config):
                 gr.update(choices=[], value=[]),
                 gr.update(value="<div class='card-empty'>Pick programs to compare.</div>"),
             )
+            return
     
         created = store.create_submission({
             "student_name": student_name or "Student",
@@ -528,9 +551,46 @@ def wire_events(components: dict, controllers: Controllers, config: Config):
         # ═══════════════════════════════════════════════════════════════════
         # ✅ ALWAYS generate and save roadmap (even if wants_email is True)
         # ═══════════════════════════════════════════════════════════════════
-        plan_raw = controllers.handle_generate_roadmap(
-            subjects, interests_str, extracurriculars, average, grade, location, preferences, sess_id
-        )
+        if wants_email:
+            # Nothing is shown to the student, so no need to stream
+            plan_raw = controllers.handle_generate_roadmap(
+                subjects, interests_str, extracurriculars, average, grade, location, preferences, sess_id
+            )
+        else:
+            # Stream the dashboard in: cards first, then the analysis token-by-token
+            plan_raw = {}
+            for plan_raw in controllers.handle_generate_roadmap_stream(
+                subjects, interests_str, extracurriculars, average, grade, location, preferences, sess_id
+            ):
+                stage = plan_raw.get("stage")
+                if stage == "programs":
+                    partial_profile = {
+                        "interest": interests_str,
+                        "grade": grade,
+                        "avg": average,
+                        "subjects": ", ".join((subjects or [])[:6]),
+                    }
+                    yield (
+                        gr.update(value=""),                 # wizard_error
+                        gr.update(value=note),               # submission_code_out
+                        gr.update(value=resume_code),        # resume_code_store
+                        gr.update(visible=False),            # inputs_view
+                        gr.update(visible=True),             # outputs_view
+                        "outputs",                           # view_state
+                        gr.update(value="", visible=False),  # email_only_notice
+                        gr.update(visible=True),             # dashboard_wrap
+                        gr.update(value="", visible=False),  # loading_indicator
+                        render_timeline(partial_profile, plan_raw.get("timeline_events") or build_fallback_timeline()),
+                        render_program_cards(plan_raw.get("programs") or []),
+                        render_checklist(plan_raw.get("projects") or []),
+                        plan_raw.get("md", ""),              # output_display (analysis pending)
+                        gr.update(),                         # programs_state
+                        gr.update(),                         # compare_select
+                        gr.update(),                         # compare_table
+                    )
+                elif stage == "analysis":
+                    # Only the Full Plan markdown changes while tokens arrive
+                    yield (gr.update(),) * 12 + (plan_raw.get("md", ""),) + (gr.update(),) * 3
         plan = safe_plan_dict(plan_raw)
     
         programs = plan.get("programs", []) or []
@@ -546,12 +606,9 @@ def wire_events(components: dict, controllers: Controllers, config: Config):
         }
     
         # ✅ Save generated plan to database (always)
-        save_generated_plan_compat(created["id"], full_md, programs, timeline_events, projects)
+        save_generated_plan_compat(created["id"], full_md, programs, timeline_events, projects, plan)
     
-        choices = [
-            f"{p.get('program_name', '')} — {p.get('university_name', '')}".strip(" —")
-            for p in programs[:12]
-        ]
+        choices = compare_choices(programs)
     
         # ═══════════════════════════════════════════════════════════════════
         # If email requested: create GitHub issue, show notice (NOT dashboard)
@@ -601,7 +658,7 @@ def wire_events(components: dict, controllers: Controllers, config: Config):
             )
         
             # Show notice, hide dashboard (but roadmap IS saved in DB for admin)
-            return (
+            yield (
                 gr.update(value=""),                    # wizard_error
                 gr.update(value=note),                  # submission_code_out
                 gr.update(value=resume_code),           # resume_code_store
@@ -619,15 +676,16 @@ def wire_events(components: dict, controllers: Controllers, config: Config):
                 gr.update(choices=choices, value=[]),   # compare_select
                 gr.update(value="<div class='card-empty'>Pick programs to compare.</div>"),
             )
+            return
     
         # ═══════════════════════════════════════════════════════════════════
-        # Otherwise: show full dashboard immediately
+        # Otherwise: final dashboard (replaces the streamed preview)
         # ═══════════════════════════════════════════════════════════════════
         timeline_html = render_timeline(profile, timeline_events)
         programs_html = render_program_cards(programs)
         checklist_html = render_checklist(projects)
     
-        return (
+        yield (
             gr.update(value=""),                 # wizard_error
             gr.update(value=note),               # submission_code_out
             gr.update(value=resume_code),        # resume_code_store
@@ -758,11 +816,8 @@ def wire_events(components: dict, controllers: Controllers, config: Config):
         if not selected:
             return "<div class='card-empty'>Pick programs to compare.</div>"
 
-        labels = [f"{p.get('program_name','')} — {p.get('university_name','')}".strip(" —") for p in programs[:12]]
-        pick = []
-        for s in selected[:4]:
-            if s in labels:
-                pick.append(programs[labels.index(s)])
+        by_key = {program_key(p): p for p in (programs or [])[:12]}
+        pick = [by_key[s] for s in selected[:4] if s in by_key]
 
         if not pick:
             return "<div class='card-empty'>Pick programs to compare.</div>"
@@ -798,8 +853,8 @@ def wire_events(components: dict, controllers: Controllers, config: Config):
     )
 
     # ---------------- follow-up ----------------
-    def followup(question, current_md, sess_id):
-        cleared_q, new_md = controllers.handle_followup(question, current_md, sess_id)
+    async def followup(question, current_md, sess_id):
+        cleared_q, new_md = await controllers.handle_followup_async(question, current_md, sess_id)
         return cleared_q, gr.update(), gr.update(), gr.update(), new_md
 
     student["send_btn"].click(
@@ -842,16 +897,66 @@ def wire_events(components: dict, controllers: Controllers, config: Config):
         outputs=[student["admin_status"], student["admin_section"]],
     )
 
-    def refresh_queue(status_filter: str, query: str):
-        rows = store.list_queue(status_filter=status_filter, query=query, limit=200)
-        return [[r["id"], r["created_at"], r["student_name"], r["student_email"], r["status"]] for r in rows]
+    QUEUE_ROWS = 200
+    QUEUE_DELTA_LIMIT = 500
+
+    def refresh_queue(status_filter: str, query: str, state: dict):
+        """
+        First load (or a new filter/search) fetches the queue; later clicks
+        only fetch rows changed since the last refresh and merge them in.
+        Deltas aren't searched, so they only apply on top of an unsearched
+        load with the same filter - anything else reloads in full.
+        """
+        status_filter = (status_filter or "ALL").strip().upper()
+        query = (query or "").strip()
+        state = state or {}
+
+        changed = None
+        same_view = state.get("filter") == status_filter and state.get("query") == query
+        if not query and same_view and state.get("cursor"):
+            changed = store.list_queue_since(state["cursor"], limit=QUEUE_DELTA_LIMIT)
+            if len(changed) >= QUEUE_DELTA_LIMIT:
+                changed = None  # too much changed - cheaper to reload
+
+        if changed is None:
+            cursor = store.clock()
+            rows = {r["id"]: r for r in store.list_queue(status_filter=status_filter, query=query, limit=QUEUE_ROWS)}
+        else:
+            cursor = max([state["cursor"]] + [r["updated_at"] for r in changed])
+            rows = {r["id"]: r for r in state["rows"]}
+            for r in changed:
+                if status_filter in ("ALL", r["status"]):
+                    rows[r["id"]] = r
+                else:
+                    rows.pop(r["id"], None)  # moved out of this filter
+
+        ordered = sorted(rows.values(), key=lambda r: (r["created_at"], r["id"]), reverse=True)[:QUEUE_ROWS]
+        table = [[r["id"], r["created_at"], r["student_name"], r["student_email"], r["status"]] for r in ordered]
+        return table, {"filter": status_filter, "query": query, "cursor": cursor, "rows": ordered}
 
     student["refresh_queue_btn"].click(
         fn=refresh_queue,
-        inputs=[student["status_filter"], student["search_query"]],
-        outputs=[student["queue_table"]],
+        inputs=[student["status_filter"], student["search_query"], student["queue_state"]],
+        outputs=[student["queue_table"], student["queue_state"]],
     )
 
+    def actions_view(submission_id: int, state: Optional[dict] = None):
+        """
+        (action log table, new state). Appends only actions newer than the
+        last one shown; a different submission (or no state) loads in full.
+        """
+        sid = int(submission_id)
+        if not state or state.get("id") != sid:
+            actions = store.get_actions(sid, limit=200)
+            rows = [[a["created_at"], a["actor"], a["action"], a["details"]] for a in actions]
+            last_id = actions[0]["id"] if actions else 0
+        else:
+            new = store.get_actions_since(sid, state["last_id"])
+            rows = [[a["created_at"], a["actor"], a["action"], a["details"]] for a in reversed(new)]
+            rows = (rows + state["rows"])[:200]
+            last_id = new[-1]["id"] if new else state["last_id"]
+        return rows, {"id": sid, "rows": rows, "last_id": last_id}
+
     def open_next():
         nxt = store.get_next_pending()
         if not nxt:
@@ -866,11 +971,11 @@ def wire_events(components: dict, controllers: Controllers, config: Config):
 
     def admin_load(submission_id: float):
         if submission_id is None:
-            return "", "", "", "", [], []
+            return "", "", "", "", [], {}
 
         sub = store.admin_get(int(submission_id))
         if not sub:
-            return "❌ Not found.", "", "", "", [], []
+            return "❌ Not found.", "", "", "", [], {}
 
         sub_u = store.unpack(sub)
 
@@ -887,21 +992,20 @@ def wire_events(components: dict, controllers: Controllers, config: Config):
                 f"?subject={urllib.parse.quote(subj)}&body={urllib.parse.quote(body)}'>Open email draft in mail client</a>"
             )
 
-        actions = store.get_actions(int(submission_id), limit=200)
-        actions_table = [[a["created_at"], a["actor"], a["action"], a["details"]] for a in actions]
+        actions_table, actions_state = actions_view(int(submission_id))
 
-        return plan_md, subj, body, (mailto or ""), actions_table, actions_table
+        return plan_md, subj, body, (mailto or ""), actions_table, actions_state
 
     student["load_btn"].click(
         fn=admin_load,
         inputs=[student["review_id"]],
-        outputs=[student["admin_plan_md"], student["email_subject"], student["email_body"], student["gmail_helper"], student["actions_table"], student["actions_table"]],
+        outputs=[student["admin_plan_md"], student["email_subject"], student["email_body"], student["gmail_helper"], student["actions_table"], student["actions_state"]],
     )
 
-    def admin_autofill(submission_id: float, admin_name: str):
+    def admin_autofill(submission_id: float, admin_name: str, actions_state: dict):
         sub = store.admin_get(int(submission_id))
         if not sub:
-            return "", "", "❌ Not found.", []
+            return "", "", "❌ Not found.", [], actions_state
 
         sub_u = store.unpack(sub)
 
@@ -926,7 +1030,7 @@ def wire_events(components: dict, controllers: Controllers, config: Config):
                 projects = plan.get("projects", []) or []
                 full_md = plan.get("md", "") or ""
 
-                save_generated_plan_compat(int(submission_id), full_md, programs, timeline_events, projects)
+                save_generated_plan_compat(int(submission_id), full_md, programs, timeline_events, projects, plan)
                 sub = store.admin_get(int(submission_id))
                 sub_u = store.unpack(sub) if sub else sub_u
                 sync_github_status(int(submission_id), "status:GENERATED", close=False)
@@ -943,50 +1047,46 @@ def wire_events(components: dict, controllers: Controllers, config: Config):
         body = email.get("body_text") or ""
         actor = (admin_name or "").strip() or "admin"
 
-        store.admin_save_email(int(submission_id), subject, body, actor=actor)
+        store.admin_save_email(
+            int(submission_id), subject, body, actor=actor, audit=[("AUTOFILL_EMAIL", "Generated email draft")]
+        )
         sync_github_status(int(submission_id), "status:DRAFTED", close=False)
-        store.log_action(int(submission_id), actor, "AUTOFILL_EMAIL", "Generated email draft")
 
-        actions = store.get_actions(int(submission_id), limit=200)
-        actions_table = [[a["created_at"], a["actor"], a["action"], a["details"]] for a in actions]
-        return subject, body, "✅ Auto-filled + saved.", actions_table
+        actions_table, actions_state = actions_view(int(submission_id), actions_state)
+        return subject, body, "✅ Auto-filled + saved.", actions_table, actions_state
 
     student["autofill_email_btn"].click(
         fn=admin_autofill,
-        inputs=[student["review_id"], student["admin_name"]],
-        outputs=[student["email_subject"], student["email_body"], student["admin_status"], student["actions_table"]],
+        inputs=[student["review_id"], student["admin_name"], student["actions_state"]],
+        outputs=[student["email_subject"], student["email_body"], student["admin_status"], student["actions_table"], student["actions_state"]],
     )
 
-    def admin_save(submission_id: float, subject: str, body: str, admin_name: str):
+    def admin_save(submission_id: float, subject: str, body: str, admin_name: str, actions_state: dict):
         actor = (admin_name or "").strip() or "admin"
-        store.admin_save_email(int(submission_id), subject or "", body or "", actor=actor)
+        store.admin_save_email(int(submission_id), subject or "", body or "", actor=actor)  # logs SAVED_EMAIL
         sync_github_status(int(submission_id), "status:DRAFTED", close=False)
-        store.log_action(int(submission_id), actor, "SAVE_EMAIL", "Saved email draft edits")
 
-        actions = store.get_actions(int(submission_id), limit=200)
-        actions_table = [[a["created_at"], a["actor"], a["action"], a["details"]] for a in actions]
-        return "✅ Draft saved.", actions_table
+        actions_table, actions_state = actions_view(int(submission_id), actions_state)
+        return "✅ Draft saved.", actions_table, actions_state
 
     student["save_email_btn"].click(
         fn=admin_save,
-        inputs=[student["review_id"], student["email_subject"], student["email_body"], student["admin_name"]],
-        outputs=[student["admin_status"], student["actions_table"]],
+        inputs=[student["review_id"], student["email_subject"], student["email_body"], student["admin_name"], student["actions_state"]],
+        outputs=[student["admin_status"], student["actions_table"], student["actions_state"]],
     )
 
-    def admin_mark_sent(submission_id: float, admin_name: str):
+    def admin_mark_sent(submission_id: float, admin_name: str, actions_state: dict):
         actor = (admin_name or "").strip() or "admin"
-        store.admin_mark_sent(int(submission_id), actor=actor)
+        store.admin_mark_sent(int(submission_id), actor=actor)  # logs MARKED_SENT
         sync_github_status(int(submission_id), "status:SENT", close=True)
-        store.log_action(int(submission_id), actor, "MARK_SENT", "Marked as sent")
 
-        actions = store.get_actions(int(submission_id), limit=200)
-        actions_table = [[a["created_at"], a["actor"], a["action"], a["details"]] for a in actions]
-        return "✅ Marked as SENT.", actions_table
+        actions_table, actions_state = actions_view(int(submission_id), actions_state)
+        return "✅ Marked as SENT.", actions_table, actions_state
 
     student["mark_sent_btn"].click(
         fn=admin_mark_sent,
-        inputs=[student["review_id"], student["admin_name"]],
-        outputs=[student["admin_status"], student["actions_table"]],
+        inputs=[student["review_id"], student["admin_name"], student["actions_state"]],
+        outputs=[student["admin_status"], student["actions_table"], student["actions_state"]],
     )
 
     def run_github_diagnostics():
@@ -999,6 +1099,34 @@ def wire_events(components: dict, controllers: Controllers, config: Config):
         outputs=[student["github_diag_output"]],
     )
 
+    # ---------------- program catalog (hot reload) ----------------
+    def format_catalog_status() -> str:
+        st = controllers.program_search.catalog_status()
+        state = "🔄 reloading…" if st["reloading"] else "idle"
+        return (
+            f"**Programs:** {st['programs']} ({'with' if st['has_embeddings'] else 'without'} embeddings)  \n"
+            f"**Version:** `{st['version'] or '—'}` | **Loaded:** {st['loaded_at'] or '—'} | **Reload:** {state}"
+        )
+
+    def show_catalog_status():
+        return gr.update(value=format_catalog_status())
+
+    def reload_catalog():
+        started = controllers.program_search.reload_catalog(force=False)
+        prefix = "✅ Reload started in background." if started else "⚠️ A reload is already running."
+        return gr.update(value=f"{prefix}\n\n{format_catalog_status()}")
+
+    student["catalog_status_btn"].click(
+        fn=show_catalog_status,
+        inputs=[],
+        outputs=[student["catalog_status"]],
+    )
+    student["reload_catalog_btn"].click(
+        fn=reload_catalog,
+        inputs=[],
+        outputs=[student["catalog_status"]],
+    )
+
     # Startup diagnostics
     def run_startup_checks():
         """Run diagnostics on startup"""
@@ -0,0 +1,110 @@
+# benchmark_scoring.py - Single-process vs sharded multi-process scoring
+"""
+Usage:
+    python benchmark_scoring.py --scale 20 --workers 2 4 --runs 5
+
+The catalog is replicated --scale times (with distinct URLs) to approximate
+a national-size catalog. Embeddings are dropped from the copy: the
+per-program Python scoring loop is what the sharded backend parallelizes.
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from config import Config
+from models import StudentProfile
+from services.program_search import ProgramSearchService
+
+PROFILES = [
+    StudentProfile(name="Bench", grade="Grade 12", average=88.0,
+                   interests="computer science and artificial intelligence",
+                   subjects=["ENG4U", "MHF4U", "MCV4U", "ICS4U"],
+                   extracurriculars="robotics club", location="Toronto", preferences="co-op"),
+    StudentProfile(name="Bench", grade="Grade 12", average=82.0,
+                   interests="nursing and health sciences",
+                   subjects=["ENG4U", "SBI4U", "SCH4U"],
+                   extracurriculars="hospital volunteering", location="Ottawa", preferences=""),
+    StudentProfile(name="Bench", grade="Grade 11", average=75.0,
+                   interests="business marketing", subjects=[],
+                   extracurriculars="DECA, student council", location="", preferences=""),
+]
+
+
+def build_scaled_catalog(source: Path, scale: int, target: Path) -> int:
+    with open(source, "r", encoding="utf-8") as f:
+        programs = json.load(f)
+
+    scaled = []
+    for copy in range(scale):
+        for item in programs:
+            item = dict(item)
+            item.pop("embedding", None)
+            item.pop("program_id", None)
+            item["program_url"] = f"{item.get('program_url', '')}#copy{copy}"
+            scaled.append(item)
+
+    with open(target, "w", encoding="utf-8") as f:
+        json.dump(scaled, f)
+    return len(scaled)
+
+
+def time_searches(service: ProgramSearchService, runs: int):
+    # Warm-up (also waits for shard workers to come up)
+    service.search_with_profile(PROFILES[0])
+
+    timings = []
+    results = []
+    for _ in range(runs):
+        for profile in PROFILES:
+            started = time.perf_counter()
+            found = service.search_with_profile(profile)
+            timings.append(time.perf_counter() - started)
+            results.append([(p.program_id, round(score, 6)) for p, score, _ in found])
+    return timings, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sharded program scoring")
+    parser.add_argument("--programs", type=Path, default=None, help="Catalog JSON (default: Config lookup)")
+    parser.add_argument("--scale", type=int, default=10, help="Replicate the catalog this many times")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4], help="Worker counts to compare")
+    parser.add_argument("--runs", type=int, default=3, help="Passes over the test profiles")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    config = Config()
+    source = args.programs or config.PROGRAMS_FILE
+
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog_file = Path(tmp) / "catalog.json"
+        n = build_scaled_catalog(source, args.scale, catalog_file)
+        print(f"Catalog: {n} programs ({args.scale}x {source.name})\n")
+
+        config.PROGRAMS_FILE = catalog_file
+        config.CATALOG_RELOAD_INTERVAL_SECONDS = 0
+
+        baseline = None
+        print(f"{'workers':>8} {'mean ms':>10} {'p50 ms':>10} {'max ms':>10} {'speedup':>8}  same results")
+        for workers in [0] + args.workers:
+            config.SCORING_WORKERS = workers
+            service = ProgramSearchService(config)
+            timings, results = time_searches(service, args.runs)
+            if service._sharded_scorer is not None:
+                service._sharded_scorer.close()
+
+            mean_ms = statistics.mean(timings) * 1000
+            if baseline is None:
+                baseline = (mean_ms, results)
+            print(f"{workers or 'single':>8} {mean_ms:>10.1f} {statistics.median(timings) * 1000:>10.1f} "
+                  f"{max(timings) * 1000:>10.1f} {baseline[0] / mean_ms:>7.2f}x  "
+                  f"{'yes' if results == baseline[1] else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
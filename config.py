@@ -18,6 +18,7 @@ class Config:
     # API
     GEMINI_API_KEY: str = ""
     GEMINI_MODEL: str = "gemini-2.5-flash"
+    GEMINI_BASE_URL: str = ""  # e.g. http://127.0.0.1:8090 for mock_gemini_server.py
     
     # Paths
     DATA_DIR: Path = None
@@ -32,6 +33,47 @@ class Config:
     # Session
     SESSION_TIMEOUT_MINUTES: int = 60
     
+    # Catalog hot reload (seconds between PROGRAMS_FILE checks, 0 = off)
+    CATALOG_RELOAD_INTERVAL_SECONDS: int = 60
+    
+    # Multi-process scoring (worker processes, one catalog shard each; 0 = off)
+    SCORING_WORKERS: int = 0
+    
+    # LLM response cache (identical model + prompts -> cached text)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 256
+    LLM_CACHE_TTL_SECONDS: int = 86400
+    LLM_CACHE_PERSIST: bool = True  # SQLite tier at DATA_DIR/llm_cache.db
+    
+    # Second LLM pass to polish the full plan Markdown (off = deterministic template)
+    ROADMAP_LLM_FORMATTING: bool = False
+    
+    # Prompt token budgets (~4 chars/token; 0 = no cap)
+    PROMPT_PROGRAMS_TOKEN_BUDGET: int = 600  # program list in the analysis prompt
+    PROMPT_ANALYSIS_TOKEN_BUDGET: int = 1200  # analysis text passed to the formatting call
+    
+    # Time budget for one roadmap request; LLM retries stop when it runs out (0 = none)
+    REQUEST_DEADLINE_SECONDS: float = 60.0
+    
+    # Reuse a stored plan for the same profile + catalog version if it is this
+    # recent (the timeline is dated, so keep it short; 0 = always generate)
+    PLAN_REUSE_HOURS: float = 12.0
+    
+    # LLM tail latency: hedge a second request after the recent p95 latency,
+    # abandon the primary model at the hard timeout and try the fallback model
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS: float = 8.0  # until enough latencies are recorded
+    LLM_HARD_TIMEOUT_SECONDS: float = 30.0
+    LLM_FALLBACK_MODEL: str = "gemini-2.5-flash-lite"
+    # Threads for blocking LLM calls; a call can hold two (primary + hedge) and
+    # an abandoned one keeps its thread until Gemini answers
+    LLM_CALL_THREADS: int = 32
+    
+    # Async LLM calls: in-flight limit (match the Gemini quota) and waiting-room size
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_MAX_QUEUE: int = 32
+    
     # UI
     THEME_PRIMARY: str = "#3b82f6"
     THEME_SECONDARY: str = "#8b5cf6"
@@ -42,6 +84,26 @@ class Config:
     
     def __init__(self):
         self.GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
+        self.GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL", "").rstrip("/")
+        self.CATALOG_RELOAD_INTERVAL_SECONDS = int(os.environ.get("CATALOG_RELOAD_INTERVAL_SECONDS", "60"))
+        self.SCORING_WORKERS = int(os.environ.get("SCORING_WORKERS", "0"))
+        self.LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "1") != "0"
+        self.LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "256"))
+        self.LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", "86400"))
+        self.LLM_CACHE_PERSIST = os.environ.get("LLM_CACHE_PERSIST", "1") != "0"
+        self.ROADMAP_LLM_FORMATTING = os.environ.get("ROADMAP_LLM_FORMATTING", "0") == "1"
+        self.PROMPT_PROGRAMS_TOKEN_BUDGET = int(os.environ.get("PROMPT_PROGRAMS_TOKEN_BUDGET", "600"))
+        self.PROMPT_ANALYSIS_TOKEN_BUDGET = int(os.environ.get("PROMPT_ANALYSIS_TOKEN_BUDGET", "1200"))
+        self.REQUEST_DEADLINE_SECONDS = float(os.environ.get("REQUEST_DEADLINE_SECONDS", "60"))
+        self.PLAN_REUSE_HOURS = float(os.environ.get("PLAN_REUSE_HOURS", "12"))
+        self.LLM_HEDGE_ENABLED = os.environ.get("LLM_HEDGE_ENABLED", "1") != "0"
+        self.LLM_HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", "95"))
+        self.LLM_HEDGE_DEFAULT_DELAY_SECONDS = float(os.environ.get("LLM_HEDGE_DEFAULT_DELAY_SECONDS", "8"))
+        self.LLM_HARD_TIMEOUT_SECONDS = float(os.environ.get("LLM_HARD_TIMEOUT_SECONDS", "30"))
+        self.LLM_FALLBACK_MODEL = os.environ.get("LLM_FALLBACK_MODEL", "gemini-2.5-flash-lite")
+        self.LLM_CALL_THREADS = int(os.environ.get("LLM_CALL_THREADS", "32"))
+        self.LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+        self.LLM_MAX_QUEUE = int(os.environ.get("LLM_MAX_QUEUE", "32"))
         self._setup_paths()
         self.GRADE_OPTIONS = [
             "Grade 9", "Grade 10", "Grade 11", 
@@ -2,7 +2,7 @@
 
 import logging
 import traceback
-from typing import Tuple, Any, Dict, List
+from typing import Tuple, Any, Dict, List, Iterator, Optional
 
 import gradio as gr
 
@@ -12,6 +12,7 @@ from services.session import SessionManager
 from services.program_search import ProgramSearchService
 from services.roadmap import RoadmapService
 from services.llm_client import LLMClient
+from services.retry import Deadline
 from utils.validators import Validators
 
 logger = logging.getLogger("saarthi.controllers")
@@ -20,14 +21,15 @@ logger = logging.getLogger("saarthi.controllers")
 class Controllers:
     """Thin controller layer - validates input, calls services, returns structured plan dict"""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, plan_store: Optional[Any] = None):
         self.config = config
 
         # Initialize services
         self.session_manager = SessionManager(config)
         self.llm_client = LLMClient(config)
         self.program_search = ProgramSearchService(config)
-        self.roadmap_service = RoadmapService(config, self.llm_client, self.program_search)
+        # plan_store (SubmissionStore): serve fresh stored plans for identical profiles
+        self.roadmap_service = RoadmapService(config, self.llm_client, self.program_search, plan_store)
 
     # -------------------------------------------------------
     # LOGIN
@@ -67,6 +69,109 @@ Fill in your profile below and click **Generate Roadmap** to get personalized un
     # -------------------------------------------------------
     # ROADMAP GENERATION (returns DICT plan)
     # -------------------------------------------------------
+    @staticmethod
+    def _empty_plan(md: str) -> Dict[str, Any]:
+        return {
+            "md": md,
+            "profile": {},
+            "programs": [],
+            "timeline_events": [],
+            "projects": [],
+        }
+
+    def _prepare_profile(
+        self,
+        subjects: List[str],
+        interests: str,
+        extracurriculars: str,
+        average: float,
+        grade: str,
+        location: str,
+        preferences: str,
+        session_id: str,
+    ) -> Tuple[Any, Optional[StudentProfile], Optional[Dict[str, Any]]]:
+        """Returns (session, profile, None) or (None, None, error_plan)"""
+        session = self.session_manager.get_session(session_id)
+        if not session:
+            return None, None, self._empty_plan(
+                "⚠️ Session expired. Please refresh the page to start a new session."
+            )
+
+        validation = Validators.validate_profile_inputs(
+            interests=interests,
+            extracurriculars=extracurriculars,
+            average=average,
+            grade=grade,
+            location=location,
+            config=self.config,
+        )
+        if not validation.ok:
+            return None, None, self._empty_plan(f"⚠️ **Validation Error**\n\n{validation.message}")
+
+        profile = StudentProfile(
+            name=session.name,
+            grade=grade,
+            average=float(average),
+            interests=Validators.sanitize_text(interests, self.config.MAX_INTERESTS_LENGTH),
+            subjects=subjects or [],
+            extracurriculars=Validators.sanitize_text(extracurriculars, self.config.MAX_INTERESTS_LENGTH),
+            location=Validators.sanitize_text(location, self.config.MAX_LOCATION_LENGTH),
+            preferences=Validators.sanitize_text(preferences, self.config.MAX_INTERESTS_LENGTH),
+        )
+        return session, profile, None
+
+    def _plan_from_result(self, result: Any, profile: StudentProfile, session: Any) -> Dict[str, Any]:
+        if not result.ok:
+            return self._empty_plan(f"❌ **Error**\n\n{result.message}\n\n*Error ID: {result.error_id}*")
+
+        # Store session context
+        session.last_profile = profile
+
+        # ✅ FIX: Use correct keys from roadmap.py
+        data = result.data or {}
+        ui_programs = data.get("programs", []) or []
+        timeline_events = data.get("timeline_events", []) or []
+        projects = data.get("projects", []) or []
+
+        # Store for followup rendering
+        session.last_ui_programs = ui_programs
+        session.last_timeline_events = timeline_events  # Add as dynamic attr
+        session.last_projects = projects  # Add as dynamic attr
+        session.last_plan_md = result.message or ""
+
+        ui_profile = {
+            "interest": profile.interests,
+            "grade": profile.grade,
+            "avg": profile.average,
+            "subjects": ", ".join(profile.subjects[:5]) if profile.subjects else "",
+            "location": profile.location or "",
+            "preferences": profile.preferences or "",
+            "extracurriculars": profile.extracurriculars or "",
+        }
+
+        # ✅ FIX: Return correct keys that app.py expects
+        return {
+            "md": result.message or "",
+            "profile": ui_profile,
+            "programs": ui_programs,
+            "timeline_events": timeline_events,
+            "projects": projects,
+            # Storage key for SubmissionStore.save_generated_plan (plan reuse)
+            "fingerprint": data.get("fingerprint", ""),
+            "catalog_version": data.get("catalog_version", ""),
+            "plan_id": data.get("plan_id"),
+        }
+
+    @staticmethod
+    def _unexpected_error_plan(e: Exception) -> Dict[str, Any]:
+        error_id = str(hash(str(e)))[:8]
+        logger.error(f"Generate roadmap error [{error_id}]: {e}\n{traceback.format_exc()}")
+        return Controllers._empty_plan(
+            "❌ **Unexpected Error**\n\n"
+            "Something went wrong. Please try again.\n\n"
+            f"*Error ID: {error_id}*"
+        )
+
     def handle_generate_roadmap(
         self,
         subjects: List[str],
@@ -89,101 +194,54 @@ Fill in your profile below and click **Generate Roadmap** to get personalized un
         }
         """
         try:
-            session = self.session_manager.get_session(session_id)
-            if not session:
-                return {
-                    "md": "⚠️ Session expired. Please refresh the page to start a new session.",
-                    "profile": {},
-                    "programs": [],
-                    "timeline_events": [],
-                    "projects": [],
-                }
-
-            validation = Validators.validate_profile_inputs(
-                interests=interests,
-                extracurriculars=extracurriculars,
-                average=average,
-                grade=grade,
-                location=location,
-                config=self.config,
-            )
-            if not validation.ok:
-                return {
-                    "md": f"⚠️ **Validation Error**\n\n{validation.message}",
-                    "profile": {},
-                    "programs": [],
-                    "timeline_events": [],
-                    "projects": [],
-                }
-
-            profile = StudentProfile(
-                name=session.name,
-                grade=grade,
-                average=float(average),
-                interests=Validators.sanitize_text(interests, self.config.MAX_INTERESTS_LENGTH),
-                subjects=subjects or [],
-                extracurriculars=Validators.sanitize_text(extracurriculars, self.config.MAX_INTERESTS_LENGTH),
-                location=Validators.sanitize_text(location, self.config.MAX_LOCATION_LENGTH),
-                preferences=Validators.sanitize_text(preferences, self.config.MAX_INTERESTS_LENGTH),
+            session, profile, error_plan = self._prepare_profile(
+                subjects, interests, extracurriculars, average, grade, location, preferences, session_id
             )
+            if error_plan:
+                return error_plan
 
-            result = self.roadmap_service.generate(profile, session)
-            if not result.ok:
-                return {
-                    "md": f"❌ **Error**\n\n{result.message}\n\n*Error ID: {result.error_id}*",
-                    "profile": {},
-                    "programs": [],
-                    "timeline_events": [],
-                    "projects": [],
-                }
-
-            # Store session context
-            session.last_profile = profile
-
-            # ✅ FIX: Use correct keys from roadmap.py
-            ui_programs = (result.data or {}).get("programs", []) or []
-            timeline_events = (result.data or {}).get("timeline_events", []) or []
-            projects = (result.data or {}).get("projects", []) or []
-
-            # Store for followup rendering
-            session.last_ui_programs = ui_programs
-            session.last_timeline_events = timeline_events  # Add as dynamic attr
-            session.last_projects = projects  # Add as dynamic attr
-            session.last_plan_md = result.message or ""
-
-            ui_profile = {
-                "interest": profile.interests,
-                "grade": profile.grade,
-                "avg": profile.average,
-                "subjects": ", ".join(profile.subjects[:5]) if profile.subjects else "",
-                "location": profile.location or "",
-                "preferences": profile.preferences or "",
-                "extracurriculars": profile.extracurriculars or "",
-            }
-
-            # ✅ FIX: Return correct keys that app.py expects
-            return {
-                "md": result.message or "",
-                "profile": ui_profile,
-                "programs": ui_programs,
-                "timeline_events": timeline_events,
-                "projects": projects,
-            }
+            deadline = Deadline(self.config.REQUEST_DEADLINE_SECONDS)
+            result = self.roadmap_service.generate(profile, session, deadline=deadline)
+            return self._plan_from_result(result, profile, session)
 
         except Exception as e:
-            error_id = str(hash(str(e)))[:8]
-            logger.error(f"Generate roadmap error [{error_id}]: {e}\n{traceback.format_exc()}")
-            return {
-                "md": (
-                    "❌ **Unexpected Error**\n\n"
-                    "Something went wrong. Please try again.\n\n"
-                    f"*Error ID: {error_id}*"
-                ),
-                "profile": {},
-                "programs": [],
-                "timeline_events": [],
-                "projects": [],
-            }
+            return self._unexpected_error_plan(e)
+
+    def handle_generate_roadmap_stream(
+        self,
+        subjects: List[str],
+        interests: str,
+        extracurriculars: str,
+        average: float,
+        grade: str,
+        location: str,
+        preferences: str,
+        session_id: str,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of handle_generate_roadmap. Yields partial plan dicts
+        tagged with "stage": "programs" (cards ready, no analysis yet), then
+        "analysis" (md grows as tokens arrive), and finally "done" with the
+        same dict handle_generate_roadmap would return.
+        """
+        try:
+            session, profile, error_plan = self._prepare_profile(
+                subjects, interests, extracurriculars, average, grade, location, preferences, session_id
+            )
+            if error_plan:
+                yield {**error_plan, "stage": "done"}
+                return
+
+            deadline = Deadline(self.config.REQUEST_DEADLINE_SECONDS)
+            for event in self.roadmap_service.generate_stream(profile, session, deadline=deadline):
+                if event["type"] == "done":
+                    plan = self._plan_from_result(event["result"], profile, session)
+                    yield {**plan, "stage": "done"}
+                    return
+                yield {**event, "stage": event["type"]}
+
+        except Exception as e:
+            yield {**self._unexpected_error_plan(e), "stage": "done"}
 
     # -------------------------------------------------------
     # FOLLOWUP
@@ -194,36 +252,63 @@ Fill in your profile below and click **Generate Roadmap** to get personalized un
         Returns (cleared_question, new_markdown)
         """
         try:
-            base_md = (current_md or "").strip()
-
-            if not question or not question.strip():
-                return ("", base_md)
-
-            session = self.session_manager.get_session(session_id)
-            if not session:
-                return ("", base_md + "\n\n⚠️ Session expired. Please refresh to continue.")
-
-            q = Validators.sanitize_text(question, self.config.MAX_FOLLOWUP_LENGTH)
+            base_md, session, q, early = self._prepare_followup(question, current_md, session_id)
+            if early is not None:
+                return early
 
             result = self.roadmap_service.followup(q, session)
-            if not result.ok:
-                return ("", base_md + f"\n\n❌ {result.message}")
+            return self._append_followup(base_md, q, result, session)
 
-            # Append Q&A
-            if "## Q&A" in base_md:
-                new_md = base_md + f"\n\n**You:** {q}\n\n**Saarthi:** {result.message}\n"
-            else:
-                new_md = base_md + f"\n\n---\n\n## Q&A\n\n**You:** {q}\n\n**Saarthi:** {result.message}\n"
+        except Exception as e:
+            logger.error(f"Followup error: {e}\n{traceback.format_exc()}")
+            return ("", (current_md or "") + f"\n\n❌ Error processing question: {str(e)}")
 
-            # Update session cache
-            session.last_plan_md = new_md
+    async def handle_followup_async(self, question: str, current_md: str, session_id: str) -> Tuple[str, str]:
+        """handle_followup for async Gradio handlers (bounded async LLM client)"""
+        try:
+            base_md, session, q, early = self._prepare_followup(question, current_md, session_id)
+            if early is not None:
+                return early
 
-            return ("", new_md)  # ✅ Return tuple: (cleared_question, new_md)
+            result = await self.roadmap_service.followup_async(q, session)
+            return self._append_followup(base_md, q, result, session)
 
         except Exception as e:
             logger.error(f"Followup error: {e}\n{traceback.format_exc()}")
             return ("", (current_md or "") + f"\n\n❌ Error processing question: {str(e)}")
 
+    def _prepare_followup(
+        self, question: str, current_md: str, session_id: str
+    ) -> Tuple[str, Any, str, Optional[Tuple[str, str]]]:
+        """Returns (base_md, session, sanitized_question, early_reply or None)"""
+        base_md = (current_md or "").strip()
+
+        if not question or not question.strip():
+            return base_md, None, "", ("", base_md)
+
+        session = self.session_manager.get_session(session_id)
+        if not session:
+            return base_md, None, "", ("", base_md + "\n\n⚠️ Session expired. Please refresh to continue.")
+
+        q = Validators.sanitize_text(question, self.config.MAX_FOLLOWUP_LENGTH)
+        return base_md, session, q, None
+
+    @staticmethod
+    def _append_followup(base_md: str, q: str, result: Any, session: Any) -> Tuple[str, str]:
+        if not result.ok:
+            return ("", base_md + f"\n\n❌ {result.message}")
+
+        # Append Q&A
+        if "## Q&A" in base_md:
+            new_md = base_md + f"\n\n**You:** {q}\n\n**Saarthi:** {result.message}\n"
+        else:
+            new_md = base_md + f"\n\n---\n\n## Q&A\n\n**You:** {q}\n\n**Saarthi:** {result.message}\n"
+
+        # Update session cache
+        session.last_plan_md = new_md
+
+        return ("", new_md)  # ✅ Return tuple: (cleared_question, new_md)
+
     # -------------------------------------------------------
     # CLEAR FORM
     # -------------------------------------------------------
@@ -0,0 +1,300 @@
+# mock_gemini_server.py - Local Gemini stand-in for offline load tests
+"""
+Usage:
+    python mock_gemini_server.py --port 8090 --latency lognormal:1.5,0.4 --error-rate 0.02
+    GEMINI_API_KEY=mock GEMINI_BASE_URL=http://127.0.0.1:8090 python api_server.py
+
+Speaks the REST shapes the Gemini SDKs (google-genai and
+google-generativeai with transport="rest") call:
+
+    POST /{version}/models/{model}:generateContent
+    POST /{version}/models/{model}:streamGenerateContent   (?alt=sse, or a JSON array)
+    POST /{version}/models/{model}:embedContent
+    POST /{version}/models/{model}:batchEmbedContents
+    GET  /stats                                              (request counters)
+
+Text responses are canned Markdown. Embeddings are deterministic hashed
+bags of words, so similar texts get similar vectors. Unlike demo mode, the
+app runs its real client code (retries, hedging, cache, streaming) against
+this server.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger("saarthi.mock_gemini")
+
+PATH_RE = re.compile(r"^/[^/]+/models/(?P<model>[^:/]+):(?P<method>\w+)$")
+
+RESPONSE_TEXT = """### Best-fit themes
+- Your interests line up with the top matches' core courses; programs with co-op suit your preference for hands-on work.
+- The highest-ranked programs share a strong math and problem-solving focus.
+
+### Prerequisite risks
+- Check each program's required Grade 12 U courses against your current subjects before applying.
+- If a required course is missing, plan to take it in the next semester or in summer school.
+
+### Admission-data caution
+- Listed admission ranges change every year. Verify on the program link.
+
+### Shortlisting
+- Keep two reach, three target and two safer programs, and compare co-op and location."""
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Latency sampler from a spec:
+      fixed:S | uniform:LO,HI | normal:MEAN,SD | lognormal:MEDIAN,SIGMA
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()] if args else []
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal" and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0]) if values[0] > 0 else 0.0
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    raise argparse.ArgumentTypeError(f"Bad latency spec: {spec!r}")
+
+
+def fake_embedding(text: str, dim: int) -> List[float]:
+    """Hashed bag of words, L2-normalized"""
+    vector = [0.0] * dim
+    for word in re.findall(r"[a-z0-9]+", (text or "").lower()):
+        digest = hashlib.md5(word.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "big") % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm == 0:
+        vector[0], norm = 1.0, 1.0
+    return [v / norm for v in vector]
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or "") / 4)
+
+
+def content_text(content: Any) -> str:
+    """Text of a Content dict (or a list of them, or a bare string)"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(content_text(c) for c in content)
+    if isinstance(content, dict):
+        return "\n".join(str(p.get("text", "")) for p in content.get("parts", []) if isinstance(p, dict))
+    return ""
+
+
+class MockGemini:
+    """Behaviour knobs and counters shared by all handler threads"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.latency = parse_latency(args.latency)
+        self.embed_latency = parse_latency(args.embed_latency)
+        self.error_rate = args.error_rate
+        self.error_status = args.error_status
+        self.stream_chunks = max(1, args.stream_chunks)
+        self.chunk_delay = args.chunk_delay
+        self.dim = args.dim
+        self._rng = random.Random(args.seed)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {}
+
+    def sample(self, sampler: Callable[[random.Random], float]) -> float:
+        with self._lock:
+            return sampler(self._rng)
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] = self._stats.get(key, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+class Handler(BaseHTTPRequestHandler):
+    mock: MockGemini = None  # set in main()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        logger.debug(fmt % args)
+
+    # ---------- plumbing ----------
+    def _send_json(self, status: int, body: Any) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: int, message: str) -> None:
+        names = {400: "INVALID_ARGUMENT", 404: "NOT_FOUND", 429: "RESOURCE_EXHAUSTED",
+                 500: "INTERNAL", 503: "UNAVAILABLE", 504: "DEADLINE_EXCEEDED"}
+        self._send_json(status, {"error": {"code": status, "message": message,
+                                           "status": names.get(status, "UNKNOWN")}})
+
+    def _read_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw or b"{}")
+
+    def _route(self) -> Tuple[Optional[str], Optional[str], Dict[str, List[str]]]:
+        url = urlparse(self.path)
+        match = PATH_RE.match(url.path)
+        if not match:
+            return None, None, {}
+        return match.group("model"), match.group("method"), parse_qs(url.query)
+
+    # ---------- HTTP ----------
+    def do_GET(self) -> None:
+        if urlparse(self.path).path == "/stats":
+            self._send_json(200, self.mock.stats())
+        else:
+            self._send_error(404, f"Unknown path {self.path}")
+
+    def do_POST(self) -> None:
+        model, method, query = self._route()
+        handlers = {
+            "generateContent": self._generate,
+            "streamGenerateContent": self._stream,
+            "embedContent": self._embed,
+            "batchEmbedContents": self._batch_embed,
+        }
+        if method not in handlers:
+            self._send_error(404, f"Unknown path {self.path}")
+            return
+        try:
+            body = self._read_body()
+        except ValueError as e:
+            self._send_error(400, f"Invalid JSON body: {e}")
+            return
+
+        self.mock.count(method)
+        if self.mock.should_fail():
+            self.mock.count("errors")
+            time.sleep(self.mock.sample(self.mock.latency) * 0.1)
+            self._send_error(self.mock.error_status, "Mock error injected")
+            return
+        handlers[method](model, body, query)
+
+    # ---------- methods ----------
+    def _candidate(self, text: str, finish: Optional[str]) -> Dict[str, Any]:
+        candidate: Dict[str, Any] = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+        if finish:
+            candidate["finishReason"] = finish
+        return candidate
+
+    def _usage(self, prompt: str, output: str) -> Dict[str, int]:
+        prompt_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(output)
+        return {"promptTokenCount": prompt_tokens, "candidatesTokenCount": output_tokens,
+                "totalTokenCount": prompt_tokens + output_tokens}
+
+    def _generate(self, model: str, body: Dict[str, Any], query: Dict[str, List[str]]) -> None:
+        prompt = content_text(body.get("contents"))
+        time.sleep(self.mock.sample(self.mock.latency))
+        self._send_json(200, {
+            "candidates": [self._candidate(RESPONSE_TEXT, "STOP")],
+            "usageMetadata": self._usage(prompt, RESPONSE_TEXT),
+            "modelVersion": model,
+        })
+
+    def _stream(self, model: str, body: Dict[str, Any], query: Dict[str, List[str]]) -> None:
+        prompt = content_text(body.get("contents"))
+        sse = query.get("alt", [""])[0] == "sse"
+        # Time to first chunk follows the latency distribution; the rest trickle in
+        time.sleep(self.mock.sample(self.mock.latency))
+
+        size = math.ceil(len(RESPONSE_TEXT) / self.mock.stream_chunks)
+        pieces = [RESPONSE_TEXT[i:i + size] for i in range(0, len(RESPONSE_TEXT), size)]
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream" if sse else "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def write(data: str) -> None:
+            raw = data.encode("utf-8")
+            self.wfile.write(f"{len(raw):X}\r\n".encode("ascii") + raw + b"\r\n")
+            self.wfile.flush()
+
+        if not sse:
+            write("[")
+        for i, piece in enumerate(pieces):
+            last = i == len(pieces) - 1
+            chunk: Dict[str, Any] = {"candidates": [self._candidate(piece, "STOP" if last else None)],
+                                     "modelVersion": model}
+            if last:
+                chunk["usageMetadata"] = self._usage(prompt, RESPONSE_TEXT)
+            if sse:
+                write(f"data: {json.dumps(chunk)}\r\n\r\n")
+            else:
+                write(("," if i else "") + json.dumps(chunk))
+            if not last:
+                time.sleep(self.mock.chunk_delay)
+        if not sse:
+            write("]")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _embed(self, model: str, body: Dict[str, Any], query: Dict[str, List[str]]) -> None:
+        time.sleep(self.mock.sample(self.mock.embed_latency))
+        values = fake_embedding(content_text(body.get("content")), self.mock.dim)
+        self._send_json(200, {"embedding": {"values": values}})
+
+    def _batch_embed(self, model: str, body: Dict[str, Any], query: Dict[str, List[str]]) -> None:
+        requests = body.get("requests") or []
+        time.sleep(self.mock.sample(self.mock.embed_latency))
+        self._send_json(200, {"embeddings": [
+            {"values": fake_embedding(content_text(r.get("content")), self.mock.dim)} for r in requests
+        ]})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Gemini stand-in for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", default="lognormal:1.5,0.4",
+                        help="generateContent latency: fixed:S | uniform:LO,HI | normal:MEAN,SD | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--embed-latency", default="fixed:0.05", help="Embedding latency (same spec format)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503, choices=[429, 500, 503, 504],
+                        help="HTTP status of injected failures")
+    parser.add_argument("--stream-chunks", type=int, default=8, help="Chunks per streamed response")
+    parser.add_argument("--chunk-delay", type=float, default=0.05, help="Seconds between streamed chunks")
+    parser.add_argument("--dim", type=int, default=768, help="Embedding dimensions (match the catalog)")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible latency/error draws")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    Handler.mock = MockGemini(args)
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+    print(f"Mock Gemini on http://{args.host}:{args.port} (latency {args.latency}, errors {args.error_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 from dataclasses import dataclass, field, asdict
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+import hashlib
 import uuid
 
 
@@ -16,6 +17,9 @@ class Program:
     location: str = ""
     co_op_available: bool = False
     
+    # Stable identifier derived from program_url (survives catalog refreshes)
+    program_id: str = ""
+    
     # For TF-IDF search
     search_text: str = field(default="", repr=False)
     
@@ -35,6 +39,28 @@ class Program:
         # Try to extract university name from program_url if not set
         if not self.university_name and self.program_url:
             self.university_name = self._extract_university_from_url(self.program_url)
+        
+        if not self.program_id:
+            self.program_id = self.make_program_id(
+                self.program_url, f"{self.program_name}|{self.university_name}"
+            )
+    
+    @staticmethod
+    def normalize_url(url: str) -> str:
+        """Canonical form of a program URL (scheme, www. and trailing slash dropped)"""
+        u = (url or "").strip().lower()
+        for prefix in ("https://", "http://"):
+            if u.startswith(prefix):
+                u = u[len(prefix):]
+        if u.startswith("www."):
+            u = u[4:]
+        return u.rstrip("/")
+    
+    @classmethod
+    def make_program_id(cls, url: str, fallback: str = "") -> str:
+        """12-char hash of the normalized URL (or of the fallback key if no URL)"""
+        key = cls.normalize_url(url) or (fallback or "").strip().lower()
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
     
     def _extract_university_from_url(self, url: str) -> str:
         """Extract university name from ouinfo URL"""
@@ -74,6 +100,7 @@ class Program:
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary (excluding computed fields)"""
         return {
+            "program_id": self.program_id,
             "program_name": self.program_name,
             "program_url": self.program_url,
             "prerequisites": self.prerequisites,
@@ -99,6 +126,7 @@ class Program:
             university_name=data.get("university_name", ""),
             location=data.get("location", ""),
             co_op_available=has_coop,
+            program_id=data.get("program_id", ""),
         )
         
         program.embedding = embedding if isinstance(embedding, list) else []
@@ -131,6 +159,17 @@ class StudentProfile:
 - Location: {self.location or 'Not specified'}
 - Preferences: {prefs_str}"""
 
+    def fingerprint(self) -> str:
+        """
+        Stable key for "the same request": every field that reaches the
+        prompt or the search, whitespace-normalized. Used to coalesce
+        identical in-flight generations.
+        """
+        parts = [self.name, self.grade, f"{float(self.average):.2f}", self.interests,
+                 "|".join(self.subjects or []), self.extracurriculars, self.location, self.preferences]
+        key = "\x1f".join(" ".join(str(p or "").split()) for p in parts)
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
 
 @dataclass
 class Session:
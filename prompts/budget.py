@@ -0,0 +1,98 @@
+# prompts/budget.py - Prompt size estimates and token budgets
+"""
+Gemini bills and times calls by token, so prompts are kept to a budget.
+estimate_tokens() is the usual ~4 characters/token heuristic for English:
+close enough to size prompts without a tokenizer round trip. Exact counts,
+when the API reports them, are recorded by TokenMeter.
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = "…") -> str:
+    """Cut text to about max_tokens, at a line or word boundary where possible"""
+    if not text or max_tokens <= 0 or estimate_tokens(text) <= max_tokens:
+        return text or ""
+    limit = max_tokens * CHARS_PER_TOKEN - len(marker)
+    cut = text[:limit]
+    # Prefer a line break, then a space, in the last fifth of the window
+    for sep in ("\n", " "):
+        idx = cut.rfind(sep)
+        if idx >= limit * 0.8:
+            cut = cut[:idx]
+            break
+    return cut.rstrip() + marker
+
+
+def fit_blocks(blocks: Iterable[str], max_tokens: int) -> List[str]:
+    """Leading blocks that fit in max_tokens together (always at least one)"""
+    kept: List[str] = []
+    used = 0
+    for block in blocks:
+        cost = estimate_tokens(block)
+        if kept and max_tokens > 0 and used + cost > max_tokens:
+            break
+        kept.append(block)
+        used += cost
+    return kept
+
+
+def _usage_count(usage: Any, *names: str) -> Optional[int]:
+    for name in names:
+        value = getattr(usage, name, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+class TokenMeter:
+    """Per-call prompt/response token counts: running totals plus the last N calls"""
+
+    def __init__(self, window: int = 50):
+        self._recent: "deque[Dict[str, Any]]" = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._totals = {"calls": 0, "prompt_tokens": 0, "output_tokens": 0, "estimated_calls": 0}
+
+    def record(self, model: str, prompt: str, output: str, usage: Any = None) -> Dict[str, Any]:
+        """
+        `usage` is the response's usage_metadata when the SDK provides it;
+        otherwise both sides are estimated from the text.
+        """
+        prompt_tokens = _usage_count(usage, "prompt_token_count", "input_tokens")
+        output_tokens = _usage_count(usage, "candidates_token_count", "output_tokens")
+        estimated = prompt_tokens is None or output_tokens is None
+        call = {
+            "model": model,
+            "prompt_tokens": prompt_tokens if prompt_tokens is not None else estimate_tokens(prompt),
+            "output_tokens": output_tokens if output_tokens is not None else estimate_tokens(output),
+            "estimated": estimated,
+        }
+        with self._lock:
+            self._recent.append(call)
+            self._totals["calls"] += 1
+            self._totals["prompt_tokens"] += call["prompt_tokens"]
+            self._totals["output_tokens"] += call["output_tokens"]
+            self._totals["estimated_calls"] += int(estimated)
+        return call
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._totals)
+            recent = list(self._recent)
+        calls = stats["calls"]
+        stats["avg_prompt_tokens"] = round(stats["prompt_tokens"] / calls, 1) if calls else 0.0
+        stats["avg_output_tokens"] = round(stats["output_tokens"] / calls, 1) if calls else 0.0
+        stats["max_prompt_tokens"] = max((c["prompt_tokens"] for c in recent), default=0)
+        stats["recent"] = recent[-10:]
+        return stats
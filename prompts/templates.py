@@ -1,11 +1,16 @@
 # prompts/templates.py
 from typing import List
 from models import StudentProfile, Program
+from prompts.budget import fit_blocks, truncate_to_tokens
+from utils.course_codes import clean_course_codes
 
 
 class PromptTemplates:
     """Centralized prompt templates with clear structure"""
 
+    # Free-text prerequisites (no course codes found) are cut to this many tokens
+    PREREQ_TEXT_TOKENS = 40
+
     def roadmap_system_prompt(self) -> str:
         return """You are Saarthi AI, a helpful Canadian university guidance counselor.
 RULES:
@@ -16,8 +21,9 @@ RULES:
 - Output should be concise and useful: 6–12 bullet points max, grouped by short headings.
 """
 
-    def roadmap_prompt(self, profile: StudentProfile, programs: List[Program]) -> str:
-        programs_text = self._format_programs(programs)
+    def roadmap_prompt(self, profile: StudentProfile, programs: List[Program], token_budget: int = 0) -> str:
+        """token_budget caps the program list (0 = no cap); the best matches come first and are kept"""
+        programs_text = self._format_programs(programs, token_budget)
 
         return f"""STUDENT PROFILE:
 {profile.to_context_string()}
@@ -55,15 +61,29 @@ QUESTION:
 Answer clearly in 6–10 bullets or a short structured response.
 """
 
-    def _format_programs(self, programs: List[Program]) -> str:
+    def _format_programs(self, programs: List[Program], token_budget: int = 0) -> str:
+        """
+        One compact line per program: name, university, admission and
+        prerequisite course codes. URLs and raw prerequisite prose stay out
+        of the prompt - the app shows them, the model doesn't need them.
+        """
         if not programs:
             return "No specific programs matched."
 
-        lines = []
-        for i, p in enumerate(programs, 1):
-            lines.append(f"{i}. {p.program_name} at {p.university_name}")
-            lines.append(f"   Admission (db): {p.admission_average}")
-            lines.append(f"   Prerequisites (db): {p.prerequisites}")
-            lines.append(f"   Link: {p.program_url}")
-            lines.append("")
-        return "\n".join(lines)
+        blocks = [f"{i}. {self._format_program(p)}" for i, p in enumerate(programs, 1)]
+        kept = fit_blocks(blocks, token_budget)
+        if len(kept) < len(blocks):
+            kept.append(f"(+{len(blocks) - len(kept)} more matches omitted)")
+        return "\n".join(kept)
+
+    def _format_program(self, p: Program) -> str:
+        codes = clean_course_codes(p.prerequisites or "")
+        if codes:
+            prereqs = ", ".join(codes)
+        else:
+            prereqs = truncate_to_tokens(" ".join((p.prerequisites or "").split()), self.PREREQ_TEXT_TOKENS)
+        coop = " | co-op" if p.co_op_available else ""
+        return (
+            f"{p.program_name} @ {p.university_name} | admission: {p.admission_average or 'n/a'}"
+            f" | prereqs: {prereqs or 'n/a'}{coop}"
+        )
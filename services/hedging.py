@@ -0,0 +1,252 @@
+# services/hedging.py - Hedged requests for tail-latency protection
+"""
+If a call hasn't answered by the time most calls have (the recent p95),
+fire an identical second call and take whichever finishes first.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from services.retry import DeadlineExceeded
+
+logger = logging.getLogger("saarthi.hedging")
+
+
+class HedgeTimeout(DeadlineExceeded):
+    """Neither the primary nor the hedged call answered within the hard timeout (not retried)"""
+
+
+class LatencyTracker:
+    """Rolling window of call latencies with percentile lookup"""
+
+    def __init__(self, window: int = 200):
+        self._samples: "deque[float]" = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+class Hedger:
+    """
+    Runs a call with at most one hedge. Losing calls are left to finish in
+    the background (HTTP calls can't be cancelled mid-flight); their results
+    are discarded.
+
+    Size max_workers for the expected concurrency: a call can hold two
+    threads, and an abandoned one keeps its thread until the API answers.
+    Time spent queued for a thread counts against the timeout, so a
+    non-zero pool_queued in stats() means the pool is too small.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        default_delay: float = 8.0,
+        min_samples: int = 20,
+        max_workers: int = 32
+    ):
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self.latency = LatencyTracker()
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._stats = {
+            "calls": 0, "hedged": 0, "hedge_wins": 0, "primary_wins": 0, "timeouts": 0,
+            # Streaming (counted by the caller via note()): no first chunk / stalled mid-stream
+            "stream_open_timeouts": 0, "stream_stalls": 0,
+        }
+
+    def hedge_delay(self) -> float:
+        """Wait this long for the primary before hedging (p95 once we have enough samples)"""
+        if len(self.latency) < self.min_samples:
+            return self.default_delay
+        return self.latency.percentile(self.percentile) or self.default_delay
+
+    def _bump(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def note(self, outcome: str) -> None:
+        """Count an outcome decided outside run() (the stream_* counters)"""
+        self._bump(outcome)
+
+    def _submit(self, fn: Callable[[], Any]) -> Future:
+        """Submit to the pool, tracking calls waiting for a thread vs running"""
+        with self._lock:
+            self._queued += 1
+
+        def tracked() -> Any:
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+            try:
+                return fn()
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        return self._pool.submit(tracked)
+
+    @staticmethod
+    def _first_wait(delay: Optional[float], remaining: Optional[float]) -> Optional[float]:
+        """How long to wait on the primary alone (delay None = not hedging)"""
+        if delay is None:
+            return remaining
+        return delay if remaining is None else min(delay, remaining)
+
+    def _timed(self, fn: Callable[[], Any]) -> Any:
+        started = time.monotonic()
+        result = fn()
+        self.latency.record(time.monotonic() - started)
+        return result
+
+    def run(self, fn: Callable[[], Any], timeout: Optional[float] = None, hedge: bool = True) -> Any:
+        """
+        Call fn(), hedging after hedge_delay() (hedge=False: just the hard
+        timeout). Raises HedgeTimeout if nothing answered within `timeout`
+        seconds, or the error of the last call to fail.
+        """
+        self._bump("calls")
+        started = time.monotonic()
+
+        def left() -> Optional[float]:
+            return None if timeout is None else max(0.0, timeout - (time.monotonic() - started))
+
+        primary = self._submit(lambda: self._timed(fn))
+        delay = self.hedge_delay() if hedge else None
+        remaining = left()
+        done, _ = wait([primary], timeout=self._first_wait(delay, remaining))
+        if done:
+            result = primary.result()  # a fast failure is raised for the retry policy
+            self._bump("primary_wins")
+            return result
+
+        if delay is None or (remaining is not None and remaining <= delay):
+            self._bump("timeouts")
+            raise HedgeTimeout(f"No response within {timeout:.1f}s")
+
+        self._bump("hedged")
+        logger.info(f"LLM call slower than {delay:.1f}s - sending hedged request")
+        hedge = self._submit(lambda: self._timed(fn))
+        pending = {primary, hedge}
+        last_error: Optional[BaseException] = None
+
+        while pending:
+            done, pending = wait(pending, timeout=left(), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    self._bump("hedge_wins" if future is hedge else "primary_wins")
+                    return future.result()
+                last_error = future.exception()
+
+        if last_error is not None and not pending:
+            raise last_error
+        self._bump("timeouts")
+        raise HedgeTimeout(f"No response within {timeout:.1f}s")
+
+    async def run_async(
+        self, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None, hedge: bool = True
+    ) -> Any:
+        """
+        run() for coroutines: await fn(), hedging after hedge_delay(). Unlike
+        threads, calls can be cancelled: the loser is, and so is anything
+        still running when this returns, raises or is itself cancelled.
+        """
+        self._bump("calls")
+        started = time.monotonic()
+
+        def left() -> Optional[float]:
+            return None if timeout is None else max(0.0, timeout - (time.monotonic() - started))
+
+        async def timed() -> Any:
+            t0 = time.monotonic()
+            result = await fn()
+            self.latency.record(time.monotonic() - t0)
+            return result
+
+        primary = asyncio.ensure_future(timed())
+        calls = [primary]
+        try:
+            delay = self.hedge_delay() if hedge else None
+            remaining = left()
+            done, _ = await asyncio.wait(calls, timeout=self._first_wait(delay, remaining))
+            if done:
+                result = primary.result()  # a fast failure is raised for the retry policy
+                self._bump("primary_wins")
+                return result
+
+            if delay is None or (remaining is not None and remaining <= delay):
+                self._bump("timeouts")
+                raise HedgeTimeout(f"No response within {timeout:.1f}s")
+
+            self._bump("hedged")
+            logger.info(f"LLM call slower than {delay:.1f}s - sending hedged request")
+            hedge = asyncio.ensure_future(timed())
+            calls.append(hedge)
+            pending = set(calls)
+            last_error: Optional[BaseException] = None
+
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=left(), return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    if future.exception() is None:
+                        self._bump("hedge_wins" if future is hedge else "primary_wins")
+                        return future.result()
+                    last_error = future.exception()
+
+            if last_error is not None and not pending:
+                raise last_error
+            self._bump("timeouts")
+            raise HedgeTimeout(f"No response within {timeout:.1f}s")
+        finally:
+            for future in calls:
+                if not future.done():
+                    future.cancel()
+
+    def call_with_timeout(self, fn: Callable[[], Any], timeout: Optional[float]) -> Any:
+        """Single un-hedged call on the pool, abandoned after `timeout` seconds"""
+        future = self._submit(fn)
+        done, _ = wait([future], timeout=timeout)
+        if not done:
+            raise HedgeTimeout(f"No response within {timeout:.1f}s")
+        return future.result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pool_running"] = self._running
+            stats["pool_queued"] = self._queued
+        stats["pool_size"] = self.max_workers
+        stats["hedge_rate"] = round(stats["hedged"] / stats["calls"], 3) if stats["calls"] else 0.0
+        stats["hedge_win_rate"] = round(stats["hedge_wins"] / stats["hedged"], 3) if stats["hedged"] else 0.0
+        stats["hedge_delay_s"] = round(self.hedge_delay(), 2)
+        for pct in (50, 95, 99):
+            value = self.latency.percentile(pct)
+            stats[f"p{pct}_s"] = round(value, 2) if value is not None else None
+        return stats
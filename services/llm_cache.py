@@ -0,0 +1,157 @@
+# services/llm_cache.py - Content-addressed cache for LLM responses
+"""
+Responses are keyed by sha256(model, system prompt, prompt), so any
+byte-identical request is answered locally. Two tiers:
+in-memory LRU (per process) and an optional SQLite file that survives
+restarts and is shared between processes.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger("saarthi.llm_cache")
+
+
+class LLMCache:
+    """Two-tier (LRU memory + optional SQLite) response cache with TTL"""
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: int = 86400,
+        db_path: Optional[Path] = None
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "expired": 0}
+
+        if self.db_path is not None:
+            self._init_db()
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, prompt: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model or "", system_prompt or "", prompt or ""):
+            encoded = part.encode("utf-8")
+            # Length-prefix each part so ("ab", "c") and ("a", "bc") differ
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    # ---------- SQLite tier ----------
+    def _conn(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+
+    def _init_db(self) -> None:
+        try:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            with self._conn() as conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS llm_cache (
+                        key TEXT PRIMARY KEY,
+                        response TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                    """
+                )
+                conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache database unavailable ({self.db_path}): {e} - memory only")
+            self.db_path = None
+
+    def _disk_get(self, key: str) -> Optional[Tuple[str, float]]:
+        try:
+            with self._conn() as conn:
+                row = conn.execute(
+                    "SELECT response, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.debug(f"LLM cache read failed: {e}")
+            return None
+        return (row[0], row[1]) if row else None
+
+    def _disk_set(self, key: str, response: str, expires_at: float) -> None:
+        try:
+            with self._conn() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, response, created_at, expires_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, response, time.time(), expires_at),
+                )
+        except sqlite3.Error as e:
+            logger.debug(f"LLM cache write failed: {e}")
+
+    # ---------- Public API ----------
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                response, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return response
+                del self._memory[key]
+                self._stats["expired"] += 1
+
+        if self.db_path is not None:
+            entry = self._disk_get(key)
+            if entry is not None and entry[1] > now:
+                with self._lock:
+                    self._remember(key, entry[0], entry[1])
+                    self._stats["hits"] += 1
+                    self._stats["disk_hits"] += 1
+                return entry[0]
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def set(self, key: str, response: str) -> None:
+        if not response:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, response, expires_at)
+            self._stats["stores"] += 1
+        if self.db_path is not None:
+            self._disk_set(key, response, expires_at)
+
+    def _remember(self, key: str, response: str, expires_at: float) -> None:
+        # Caller holds self._lock
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self.db_path is not None:
+            try:
+                with self._conn() as conn:
+                    conn.execute("DELETE FROM llm_cache")
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache clear failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._memory)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["persistent"] = self.db_path is not None
+        return stats
@@ -1,34 +1,32 @@
 # services/llm_client.py - Gemini client with retries and timeouts
 import logging
-import time
-from typing import Optional
-from functools import wraps
+import asyncio
+from typing import Optional, Dict, Any, Iterator, Tuple
 
 from config import Config
+from services.llm_cache import LLMCache
+from services.retry import RetryPolicy, Deadline, DeadlineExceeded
+from services.hedging import Hedger, HedgeTimeout
+from prompts.budget import TokenMeter
 
 logger = logging.getLogger("saarthi.llm")
 
 
-def retry_with_backoff(max_retries: int = 3, base_delay: float = 1.0):
-    """Decorator for retry with exponential backoff"""
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            last_exception = None
-            for attempt in range(max_retries):
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    last_exception = e
-                    if attempt < max_retries - 1:
-                        delay = base_delay * (2 ** attempt)
-                        logger.warning(f"Attempt {attempt + 1} failed: {e}. Retrying in {delay}s...")
-                        time.sleep(delay)
-                    else:
-                        logger.error(f"All {max_retries} attempts failed: {e}")
-            raise last_exception
-        return wrapper
-    return decorator
+def legacy_sdk_options(config: Config) -> Dict[str, Any]:
+    """
+    Extra genai.configure() kwargs for google-generativeai. With
+    GEMINI_BASE_URL set, calls go over REST to that host instead of Google.
+    """
+    if not config.GEMINI_BASE_URL:
+        return {}
+    return {"transport": "rest", "client_options": {"api_endpoint": config.GEMINI_BASE_URL}}
+
+
+class LLMOverloaded(Exception):
+    """Too many LLM calls already waiting - shed load instead of queueing forever"""
+    
+    def __init__(self, message: str = "Saarthi is busy right now. Please try again in a moment."):
+        super().__init__(message)
 
 
 class LLMClient:
@@ -40,6 +38,28 @@ class LLMClient:
         self.client = None
         self.model = None
         self.use_new_api = False
+        self.cache: Optional[LLMCache] = None
+        # Transient errors only; waits never run past the request deadline
+        self.retry_policy = RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=8.0)
+        # Tail-latency protection: hedge after ~p95 (if enabled), give up on the
+        # primary model at the hard timeout either way
+        self.hedge_enabled = config.LLM_HEDGE_ENABLED
+        self.hedger = Hedger(
+            percentile=config.LLM_HEDGE_PERCENTILE,
+            default_delay=config.LLM_HEDGE_DEFAULT_DELAY_SECONDS,
+            max_workers=max(1, config.LLM_CALL_THREADS),
+        )
+        self._fallback_model = None
+        self._fallback_stats = {"fallback_model_calls": 0, "fallback_model_failures": 0}
+        # Prompt/response tokens per model call (cache hits cost nothing and aren't counted)
+        self.tokens = TokenMeter()
+        
+        if config.LLM_CACHE_ENABLED:
+            self.cache = LLMCache(
+                max_entries=config.LLM_CACHE_MAX_ENTRIES,
+                ttl_seconds=config.LLM_CACHE_TTL_SECONDS,
+                db_path=config.DATA_DIR / "llm_cache.db" if config.LLM_CACHE_PERSIST else None,
+            )
         
         if self.has_api:
             self._initialize_client()
@@ -51,10 +71,17 @@ class LLMClient:
         # Try new API first
         try:
             from google import genai
-            self.client = genai.Client(api_key=self.config.GEMINI_API_KEY)
+            if self.config.GEMINI_BASE_URL:
+                self.client = genai.Client(
+                    api_key=self.config.GEMINI_API_KEY,
+                    http_options={"base_url": self.config.GEMINI_BASE_URL},
+                )
+            else:
+                self.client = genai.Client(api_key=self.config.GEMINI_API_KEY)
             self.model = self.config.GEMINI_MODEL
             self.use_new_api = True
-            logger.info("✅ Using google-genai (new API)")
+            logger.info("✅ Using google-genai (new API)"
+                        + (f" via {self.config.GEMINI_BASE_URL}" if self.config.GEMINI_BASE_URL else ""))
             return
         except ImportError:
             logger.debug("google-genai not available, trying legacy API")
@@ -64,7 +91,7 @@ class LLMClient:
         # Fallback to legacy API
         try:
             import google.generativeai as genai
-            genai.configure(api_key=self.config.GEMINI_API_KEY)
+            genai.configure(api_key=self.config.GEMINI_API_KEY, **legacy_sdk_options(self.config))
             self.model = genai.GenerativeModel(self.config.GEMINI_MODEL)
             self.use_new_api = False
             logger.info("✅ Using google-generativeai (legacy API)")
@@ -77,29 +104,295 @@ class LLMClient:
         self.has_api = False
         logger.warning("LLM client falling back to demo mode")
     
-    @retry_with_backoff(max_retries=3, base_delay=1.0)
-    def generate(self, prompt: str, system_prompt: str = "") -> str:
-        """Generate response with retries"""
+    def generate(
+        self, 
+        prompt: str, 
+        system_prompt: str = "", 
+        use_cache: bool = True,
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        """
+        Generate response with retries.
+        Identical (model, system_prompt, prompt) calls are served from the
+        response cache unless use_cache=False. Retries stop at the deadline.
+        """
+        if not self.has_api:
+            return self._demo_response(prompt)
+        
+        key, cached = self.cache_lookup(prompt, system_prompt, use_cache)
+        if cached is not None:
+            return cached
+        
+        response, model_name = self._generate_uncached(prompt, system_prompt, deadline)
+        self.cache_store(key, response, model_name)
+        return response
+    
+    def cache_lookup(self, prompt: str, system_prompt: str = "", use_cache: bool = True) -> Tuple[Optional[str], Optional[str]]:
+        """Returns (cache key, cached response); key is None when caching is off for this call"""
+        if not use_cache or self.cache is None:
+            return None, None
+        key = LLMCache.make_key(self.config.GEMINI_MODEL, system_prompt, prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.info(f"LLM cache hit ({key[:12]})")
+        return key, cached
+    
+    def cache_store(self, key: Optional[str], response: str, model_name: Optional[str] = None) -> None:
+        """
+        Cache a response under its (primary-model) key. Answers from another
+        model (the timeout fallback) are used once but never cached, so the
+        key keeps meaning "what GEMINI_MODEL said".
+        """
+        if model_name and model_name != self.config.GEMINI_MODEL:
+            return
+        if key is not None and self.cache is not None:
+            self.cache.set(key, response)
+    
+    async def generate_async(
+        self, 
+        prompt: str, 
+        system_prompt: str = "", 
+        use_cache: bool = True,
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        """generate() for async callers - retry waits yield to the event loop"""
         if not self.has_api:
             return self._demo_response(prompt)
         
+        key, cached = self.cache_lookup(prompt, system_prompt, use_cache)
+        if cached is not None:
+            return cached
+        
+        response, model_name = await self._generate_uncached_async(prompt, system_prompt, deadline)
+        self.cache_store(key, response, model_name)
+        return response
+    
+    async def _generate_uncached_async(
+        self, 
+        prompt: str, 
+        system_prompt: str = "", 
+        deadline: Optional[Deadline] = None
+    ) -> Tuple[str, str]:
+        """
+        _generate_uncached() on client.aio: same hedging, hard timeout and
+        fallback model. Timed-out calls are cancelled rather than left running.
+        Returns (response text, model that produced it).
+        """
         full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
         
+        async def attempt() -> str:
+            return await self.hedger.run_async(
+                lambda: self._call_model_async(full_prompt),
+                timeout=self._hard_timeout(deadline), hedge=self.hedge_enabled,
+            )
+        
         try:
+            return await self.retry_policy.run_async(attempt, deadline=deadline), self.config.GEMINI_MODEL
+        except HedgeTimeout as e:
+            logger.warning(f"{self.config.GEMINI_MODEL} timed out ({e})")
+            return await self._generate_fallback_async(full_prompt, deadline, e), self.config.LLM_FALLBACK_MODEL
+        except Exception as e:
+            logger.error(f"LLM generation failed: {e}")
+            raise
+    
+    async def _generate_fallback_async(self, full_prompt: str, deadline: Optional[Deadline], cause: Exception) -> str:
+        """_generate_fallback() for the async path"""
+        fallback = self.config.LLM_FALLBACK_MODEL
+        remaining = deadline.remaining() if deadline else self.config.LLM_HARD_TIMEOUT_SECONDS or None
+        if not fallback or fallback == self.config.GEMINI_MODEL or remaining == 0:
+            raise cause
+        
+        self._fallback_stats["fallback_model_calls"] += 1
+        logger.info(f"Falling back to {fallback} ({remaining if remaining is not None else '∞'}s left)")
+        try:
+            return await asyncio.wait_for(self._call_model_async(full_prompt, model_name=fallback), timeout=remaining)
+        except Exception as e:
+            self._fallback_stats["fallback_model_failures"] += 1
+            logger.error(f"Fallback model {fallback} failed: {e}")
+            raise cause from e
+    
+    async def _call_model_async(self, full_prompt: str, model_name: Optional[str] = None) -> str:
+        if self.use_new_api:
+            response = await self.client.aio.models.generate_content(
+                model=model_name or self.model,
+                contents=full_prompt
+            )
+        else:
+            response = await self._legacy_model(model_name).generate_content_async(full_prompt)
+        return self._record_tokens(full_prompt, response, model_name)
+    
+    def generate_stream(
+        self, 
+        prompt: str, 
+        system_prompt: str = "", 
+        use_cache: bool = True,
+        deadline: Optional[Deadline] = None
+    ) -> Iterator[str]:
+        """
+        Yield the response as text chunks as Gemini produces them.
+        Cache hits and demo mode yield the whole text at once. Retries only
+        happen before the first chunk; a failure mid-stream is raised.
+        
+        The hard timeout bounds the wait for the first chunk and for each
+        chunk after it. No first chunk in time: the fallback model's answer
+        is yielded whole (not cached). A stall mid-stream raises HedgeTimeout
+        (a DeadlineExceeded) - the caller already has part of the text.
+        """
+        if not self.has_api:
+            yield self._demo_response(prompt)
+            return
+        
+        key, cached = self.cache_lookup(prompt, system_prompt, use_cache)
+        if cached is not None:
+            yield cached
+            return
+        
+        full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+        
+        def open_stream():
             if self.use_new_api:
-                response = self.client.models.generate_content(
+                stream = self.client.models.generate_content_stream(
                     model=self.model,
                     contents=full_prompt
                 )
-                return response.text
             else:
-                response = self.model.generate_content(full_prompt)
-                return response.text
-                
+                stream = self.model.generate_content(full_prompt, stream=True)
+            # Pull the first chunk inside the retry so connection errors are retried
+            iterator = iter(stream)
+            return iterator, next(iterator, None)
+        
+        parts = []
+        usage = None
+        try:
+            iterator, chunk = self.retry_policy.run(
+                lambda: self.hedger.call_with_timeout(open_stream, self._hard_timeout(deadline)),
+                deadline=deadline,
+            )
+        except HedgeTimeout as e:
+            self.hedger.note("stream_open_timeouts")
+            logger.warning(f"{self.config.GEMINI_MODEL} sent no chunk in time ({e})")
+            yield self._generate_fallback(full_prompt, deadline, e)
+            return
+        except Exception as e:
+            logger.error(f"LLM streaming failed before the first chunk: {e}")
+            raise
+        
+        try:
+            while chunk is not None:
+                # The final chunk carries the usage totals
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                text = getattr(chunk, "text", None) or ""
+                if text:
+                    parts.append(text)
+                    yield text
+                chunk = self.hedger.call_with_timeout(lambda: next(iterator, None), self._hard_timeout(deadline))
+        except HedgeTimeout as e:
+            self.hedger.note("stream_stalls")
+            logger.warning(f"LLM stream stalled after {len(parts)} chunks ({e})")
+            raise
+        except Exception as e:
+            logger.error(f"LLM streaming failed after {len(parts)} chunks: {e}")
+            raise
+        
+        response = "".join(parts)
+        self.tokens.record(self.config.GEMINI_MODEL, full_prompt, response, usage)
+        self.cache_store(key, response)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the response cache"""
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.stats()}
+    
+    def _generate_uncached(
+        self, 
+        prompt: str, 
+        system_prompt: str = "", 
+        deadline: Optional[Deadline] = None
+    ) -> Tuple[str, str]:
+        """(response text, model that produced it)"""
+        full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+        
+        attempt = lambda: self.hedger.run(
+            lambda: self._call_model(full_prompt),
+            timeout=self._hard_timeout(deadline), hedge=self.hedge_enabled,
+        )
+        
+        try:
+            return self.retry_policy.run(attempt, deadline=deadline), self.config.GEMINI_MODEL
+        except HedgeTimeout as e:
+            logger.warning(f"{self.config.GEMINI_MODEL} timed out ({e})")
+            return self._generate_fallback(full_prompt, deadline, e), self.config.LLM_FALLBACK_MODEL
         except Exception as e:
             logger.error(f"LLM generation failed: {e}")
             raise
     
+    def _hard_timeout(self, deadline: Optional[Deadline]) -> Optional[float]:
+        """Give up on the primary model after LLM_HARD_TIMEOUT_SECONDS (or the request deadline)"""
+        hard = self.config.LLM_HARD_TIMEOUT_SECONDS or None
+        remaining = deadline.remaining() if deadline else None
+        if remaining is None:
+            return hard
+        return remaining if hard is None else min(hard, remaining)
+    
+    def _generate_fallback(self, full_prompt: str, deadline: Optional[Deadline], cause: Exception) -> str:
+        """One call to LLM_FALLBACK_MODEL with whatever budget is left; re-raises cause if unavailable"""
+        fallback = self.config.LLM_FALLBACK_MODEL
+        remaining = deadline.remaining() if deadline else self.config.LLM_HARD_TIMEOUT_SECONDS or None
+        if not fallback or fallback == self.config.GEMINI_MODEL or remaining == 0:
+            raise cause
+        
+        self._fallback_stats["fallback_model_calls"] += 1
+        logger.info(f"Falling back to {fallback} ({remaining if remaining is not None else '∞'}s left)")
+        try:
+            return self.hedger.call_with_timeout(
+                lambda: self._call_model(full_prompt, model_name=fallback), timeout=remaining
+            )
+        except Exception as e:
+            self._fallback_stats["fallback_model_failures"] += 1
+            logger.error(f"Fallback model {fallback} failed: {e}")
+            raise cause from e
+    
+    def _call_model(self, full_prompt: str, model_name: Optional[str] = None) -> str:
+        if self.use_new_api:
+            response = self.client.models.generate_content(
+                model=model_name or self.model,
+                contents=full_prompt
+            )
+            return self._record_tokens(full_prompt, response, model_name)
+        else:
+            response = self._legacy_model(model_name).generate_content(full_prompt)
+            return self._record_tokens(full_prompt, response, model_name)
+    
+    def _legacy_model(self, model_name: Optional[str] = None) -> Any:
+        """google-generativeai model object: the primary, or the fallback model (created on first use)"""
+        if not model_name:
+            return self.model
+        if self._fallback_model is None:
+            import google.generativeai as genai
+            self._fallback_model = genai.GenerativeModel(model_name)
+        return self._fallback_model
+    
+    def _record_tokens(self, full_prompt: str, response: Any, model_name: Optional[str] = None) -> str:
+        """Count the call's tokens (API usage metadata, else estimated) and return its text"""
+        text = response.text
+        call = self.tokens.record(
+            model_name or self.config.GEMINI_MODEL, full_prompt, text or "", getattr(response, "usage_metadata", None)
+        )
+        logger.info(
+            f"LLM tokens ({call['model']}): prompt={call['prompt_tokens']} output={call['output_tokens']}"
+            + (" (estimated)" if call["estimated"] else "")
+        )
+        return text
+    
+    def token_stats(self) -> Dict[str, Any]:
+        """Token totals, averages and the most recent calls"""
+        return self.tokens.stats()
+    
+    def latency_stats(self) -> Dict[str, Any]:
+        """Hedge rate / win rate and latency percentiles for tuning"""
+        return {"hedging": self.hedge_enabled, **self.hedger.stats(), **self._fallback_stats}
+    
     def _demo_response(self, prompt: str) -> str:
         """Demo response when no API available"""
         prompt_lower = prompt.lower()
@@ -171,4 +464,90 @@ Based on your profile, here are some general recommendations:
 - Start applications early
 - Request reference letters in advance
 
-*Add your Gemini API key in Hugging Face Secrets for personalized AI-powered recommendations.*"""
\ No newline at end of file
+*Add your Gemini API key in Hugging Face Secrets for personalized AI-powered recommendations.*"""
+
+
+class AsyncLLMClient:
+    """
+    Awaitable front end for LLMClient, for FastAPI / async Gradio handlers.
+    
+    - At most LLM_MAX_CONCURRENCY Gemini calls in flight per process (sized to quota)
+    - At most LLM_MAX_QUEUE callers waiting for a slot; beyond that LLMOverloaded
+      is raised immediately (backpressure) instead of piling up
+    - Waiting for a slot counts against the request deadline
+    - All calls go through the one genai.Client (client.aio), so its HTTP
+      connection pool is shared rather than opened per request
+    - Same hedging, hard timeout and fallback model as LLMClient.generate(); a
+      hung call is cancelled at the timeout, so it gives its slot back
+    Cache hits and demo responses never take a slot.
+    """
+    
+    def __init__(self, llm: LLMClient):
+        self.llm = llm
+        self.config = llm.config
+        self.max_concurrency = max(1, self.config.LLM_MAX_CONCURRENCY)
+        self.max_queue = max(0, self.config.LLM_MAX_QUEUE)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight = 0
+        self._waiting = 0
+        self._stats = {"calls": 0, "queued": 0, "rejected": 0}
+    
+    def _slots(self) -> asyncio.Semaphore:
+        # asyncio primitives belong to one loop; rebuild if the loop changes (tests, reloads)
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+    
+    async def generate(
+        self, 
+        prompt: str, 
+        system_prompt: str = "", 
+        use_cache: bool = True,
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        if not self.llm.has_api:
+            return self.llm._demo_response(prompt)
+        
+        key, cached = self.llm.cache_lookup(prompt, system_prompt, use_cache)
+        if cached is not None:
+            return cached
+        
+        slots = self._slots()
+        if slots.locked():
+            if self._waiting >= self.max_queue:
+                self._stats["rejected"] += 1
+                logger.warning(f"LLM queue full ({self._waiting} waiting) - rejecting call")
+                raise LLMOverloaded()
+            self._stats["queued"] += 1
+        
+        self._waiting += 1
+        try:
+            remaining = deadline.remaining() if deadline else None
+            await asyncio.wait_for(slots.acquire(), timeout=remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded()
+        finally:
+            self._waiting -= 1
+        
+        self._stats["calls"] += 1
+        self._in_flight += 1
+        try:
+            response, model_name = await self.llm._generate_uncached_async(prompt, system_prompt, deadline)
+        finally:
+            self._in_flight -= 1
+            slots.release()
+        
+        self.llm.cache_store(key, response, model_name)
+        return response
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+        }
@@ -497,13 +497,18 @@ class ProgramSearchService:
 # services/program_search.py - Enhanced Mathematical Ranking Engine
 # Version 3.0 - Fixed relevance detection, typo tolerance, better filtering
 
+import hashlib
 import json
 import logging
 import math
 import re
+import threading
+import time
+from datetime import datetime
 from difflib import SequenceMatcher
 from functools import lru_cache
-from typing import List, Tuple, Dict, Any, Optional, Set
+from pathlib import Path
+from typing import List, Tuple, Dict, Any, Optional, Set, Callable, Union
 from dataclasses import dataclass, field
 
 import numpy as np
@@ -513,6 +518,49 @@ from models import Program, StudentProfile
 
 logger = logging.getLogger("saarthi.search")
 
+# Neighbours kept per program in the "more like this" graph
+KNN_NEIGHBOURS = 20
+
+
+def knn_graph_path(programs_file: Path) -> Path:
+    """Where the kNN graph for a catalog lives (next to the JSON file)"""
+    return programs_file.with_suffix(".knn.npz")
+
+
+def build_knn_graph(
+    matrix: np.ndarray, 
+    k: int = KNN_NEIGHBOURS, 
+    block_size: int = 512
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k cosine neighbours for every row of a pre-normalized embedding matrix.
+    Computed in row blocks so memory stays O(block_size * n).
+    
+    Returns:
+        (neighbours int32 [n, k], similarities float32 [n, k]),
+        each row sorted by similarity descending, self excluded.
+    """
+    n = matrix.shape[0]
+    k = max(0, min(k, n - 1))
+    neighbours = np.zeros((n, k), dtype=np.int32)
+    similarities = np.zeros((n, k), dtype=np.float32)
+    if k == 0:
+        return neighbours, similarities
+    
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        block = matrix[start:stop] @ matrix.T
+        block[np.arange(stop - start), np.arange(start, stop)] = -np.inf  # exclude self
+        
+        idx = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        part = np.take_along_axis(block, idx, axis=1)
+        order = np.argsort(-part, axis=1)
+        
+        neighbours[start:stop] = np.take_along_axis(idx, order, axis=1)
+        similarities[start:stop] = np.take_along_axis(part, order, axis=1)
+    
+    return neighbours, similarities
+
 
 @dataclass
 class ScoringWeights:
@@ -567,6 +615,62 @@ class ScoreBreakdown:
         }
 
 
+@dataclass
+class CatalogSnapshot:
+    """
+    Everything derived from one read of PROGRAMS_FILE.
+    
+    Searches take a reference to the current snapshot once and use it
+    throughout, so a reload can swap in a new one without disturbing
+    in-flight requests. Never mutate a snapshot after it is installed.
+    """
+    programs: List[Program] = field(default_factory=list)
+    embedding_matrix: Optional[np.ndarray] = None
+    has_embeddings: bool = False
+    version: str = ""
+    loaded_at: Optional[datetime] = None
+    
+    # Facet columns (one entry per program, aligned with `programs`)
+    coop_mask: Optional[np.ndarray] = None          # bool
+    admission_values: Optional[np.ndarray] = None   # float32, parsed admission average (NaN = unknown)
+    regions: Optional[np.ndarray] = None            # object (region label)
+    
+    # Facet bitmaps: lowercase value -> bool mask over programs
+    university_bitmaps: Dict[str, np.ndarray] = field(default_factory=dict)
+    region_bitmaps: Dict[str, np.ndarray] = field(default_factory=dict)
+    
+    # O(1) lookups: program_id / normalized program_url -> row number
+    id_index: Dict[str, int] = field(default_factory=dict)
+    url_index: Dict[str, int] = field(default_factory=dict)
+    
+    # Program-to-program kNN graph (row -> neighbour rows), see build_knn_graph
+    knn_neighbours: Optional[np.ndarray] = None
+    knn_similarities: Optional[np.ndarray] = None
+
+
+@dataclass
+class SearchFilters:
+    """
+    Hard filters applied to the catalog BEFORE scoring.
+    Empty/None fields mean "no restriction". An admission band only matches
+    programs whose admission average is actually known.
+    """
+    universities: List[str] = field(default_factory=list)
+    co_op_only: bool = False
+    regions: List[str] = field(default_factory=list)
+    max_admission: Optional[float] = None
+    min_admission: Optional[float] = None
+    
+    def is_empty(self) -> bool:
+        return (
+            not self.universities
+            and not self.co_op_only
+            and not self.regions
+            and self.max_admission is None
+            and self.min_admission is None
+        )
+
+
 class ProgramSearchService:
     """
     Enhanced ranking engine v3.0 that:
@@ -816,20 +920,72 @@ class ProgramSearchService:
         "central": ["barrie", "orillia", "peterborough", "lindsay"],
     }
     
+    # University -> region for campuses whose name has no city in it
+    UNIVERSITY_REGIONS: Dict[str, str] = {
+        "york university": "gta",
+        "ontario tech": "gta",
+        "ocad": "gta",
+        "mcmaster": "gta",
+        "western university": "southwestern",
+        "laurier": "southwestern",
+        "brock": "southwestern",
+        "queen's": "eastern",
+        "carleton": "eastern",
+        "trent": "central",
+        "laurentian": "northern",
+        "lakehead": "northern",
+        "nipissing": "northern",
+        "algoma": "northern",
+    }
+    
     # Minimum relevance threshold - programs below this are filtered out
     MIN_RELEVANCE_THRESHOLD: float = 0.1
     
     # Fuzzy matching threshold (0.0 to 1.0)
     FUZZY_MATCH_THRESHOLD: float = 0.75
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, programs: Optional[List[Program]] = None):
         self.config = config
-        self.programs: List[Program] = []
-        self.has_embeddings: bool = False
-        self.embedding_matrix: Optional[np.ndarray] = None
+        self._catalog: CatalogSnapshot = CatalogSnapshot()
+        self._catalog_mtime: float = 0.0
+        self._catalog_listeners: List[Callable[[CatalogSnapshot], None]] = []
+        self._reload_lock = threading.Lock()
+        self._reload_thread: Optional[threading.Thread] = None
         self._embedding_cache: Dict[str, np.ndarray] = {}
+        self._sharded_scorer = None
+        
+        if programs is not None:
+            # Scoring-only instance (e.g. a shard worker): no file, no watcher
+            self._install_catalog(CatalogSnapshot(programs=programs, loaded_at=datetime.now()))
+            return
         
         self._load_programs()
+        self._start_catalog_watcher()
+        self._start_sharded_scorer()
+    
+    # ==================== CATALOG ACCESS ====================
+    
+    @property
+    def catalog(self) -> CatalogSnapshot:
+        """Current catalog snapshot (grab once per request)"""
+        return self._catalog
+    
+    @property
+    def programs(self) -> List[Program]:
+        return self._catalog.programs
+    
+    @property
+    def embedding_matrix(self) -> Optional[np.ndarray]:
+        return self._catalog.embedding_matrix
+    
+    @property
+    def has_embeddings(self) -> bool:
+        return self._catalog.has_embeddings
+    
+    @property
+    def catalog_version(self) -> str:
+        """Content hash of the loaded programs file"""
+        return self._catalog.version
     
     # ==================== TYPO CORRECTION & FUZZY MATCHING ====================
     
@@ -891,15 +1047,25 @@ class ProgramSearchService:
     
     def _load_programs(self) -> None:
         """Load and clean programs from JSON file"""
+        snapshot = self._build_catalog()
+        if snapshot is not None:
+            self._install_catalog(snapshot)
+    
+    def _build_catalog(self) -> Optional[CatalogSnapshot]:
+        """
+        Read PROGRAMS_FILE and build a complete snapshot (programs + matrices).
+        Safe to call from a background thread - touches no shared state.
+        """
         try:
             if not self.config.PROGRAMS_FILE or not self.config.PROGRAMS_FILE.exists():
                 logger.error(f"Programs file not found: {self.config.PROGRAMS_FILE}")
-                return
+                return None
             
-            with open(self.config.PROGRAMS_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(self.config.PROGRAMS_FILE, 'rb') as f:
+                raw = f.read()
+            data = json.loads(raw.decode('utf-8'))
             
-            self.programs = []
+            programs: List[Program] = []
             embeddings: List[Optional[List[float]]] = []
             
             for item in data:
@@ -909,43 +1075,375 @@ class ProgramSearchService:
                     # Clean the prerequisites
                     program.prerequisites = self._clean_prerequisites(program.prerequisites)
                     
-                    self.programs.append(program)
+                    programs.append(program)
                     embeddings.append(program.embedding if program.embedding else None)
                         
                 except Exception as e:
                     logger.debug(f"Skipped invalid program entry: {e}")
             
             # Build embedding matrix for vectorized operations
-            self._build_embedding_matrix(embeddings)
+            matrix = self._build_embedding_matrix(embeddings)
             
-            logger.info(f"✅ Loaded {len(self.programs)} programs "
-                       f"({'with' if self.has_embeddings else 'without'} embeddings)")
+            snapshot = CatalogSnapshot(
+                programs=programs,
+                embedding_matrix=matrix,
+                has_embeddings=matrix is not None,
+                version=hashlib.sha1(raw).hexdigest()[:16],
+                loaded_at=datetime.now(),
+            )
+            self._build_facets(snapshot)
+            self._build_lookup_indexes(snapshot)
+            self._attach_knn_graph(snapshot)
+            
+            logger.info(f"✅ Loaded {len(programs)} programs "
+                       f"({'with' if snapshot.has_embeddings else 'without'} embeddings, "
+                       f"version {snapshot.version})")
+            return snapshot
             
         except Exception as e:
             logger.error(f"Failed to load programs: {e}")
+            return None
     
-    def _build_embedding_matrix(self, embeddings: List[Optional[List[float]]]) -> None:
+    def _build_embedding_matrix(self, embeddings: List[Optional[List[float]]]) -> Optional[np.ndarray]:
         """Build numpy matrix from embeddings for fast similarity computation"""
         valid_embeddings = [e for e in embeddings if e is not None]
         
         if not valid_embeddings:
-            self.has_embeddings = False
-            return
+            return None
         
-        self.has_embeddings = True
         emb_dim = len(valid_embeddings[0])
-        self.embedding_matrix = np.zeros((len(self.programs), emb_dim), dtype=np.float32)
+        matrix = np.zeros((len(embeddings), emb_dim), dtype=np.float32)
         
         for i, emb in enumerate(embeddings):
             if emb is not None:
-                self.embedding_matrix[i] = np.array(emb, dtype=np.float32)
+                matrix[i] = np.array(emb, dtype=np.float32)
         
         # Pre-normalize all program embeddings
-        norms = np.linalg.norm(self.embedding_matrix, axis=1, keepdims=True)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
         norms = np.where(norms > 0, norms, 1)  # Avoid division by zero
-        self.embedding_matrix = self.embedding_matrix / norms
+        matrix = matrix / norms
+        
+        logger.debug(f"Built embedding matrix: {matrix.shape}")
+        return matrix
+    
+    def _build_lookup_indexes(self, snapshot: CatalogSnapshot) -> None:
+        """Hash-map indexes from program_id and URL to row number"""
+        duplicates = 0
+        for i, program in enumerate(snapshot.programs):
+            if program.program_id in snapshot.id_index:
+                duplicates += 1
+                continue
+            snapshot.id_index[program.program_id] = i
+            url_key = Program.normalize_url(program.program_url)
+            if url_key:
+                snapshot.url_index.setdefault(url_key, i)
+        
+        if duplicates:
+            logger.warning(f"{duplicates} programs share an id with an earlier entry (duplicate URLs)")
+    
+    # ==================== SIMILAR PROGRAMS (kNN GRAPH) ====================
+    
+    def _attach_knn_graph(self, snapshot: CatalogSnapshot) -> None:
+        """
+        Load the precomputed kNN graph if it matches this catalog version,
+        otherwise compute it now and try to save it for next time.
+        """
+        if not snapshot.has_embeddings:
+            return
+        
+        path = knn_graph_path(self.config.PROGRAMS_FILE)
+        n = len(snapshot.programs)
+        
+        if path.exists():
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    version = str(data["version"])
+                    neighbours = data["neighbours"]
+                    similarities = data["similarities"]
+                if version == snapshot.version and neighbours.shape[0] == n:
+                    snapshot.knn_neighbours = neighbours
+                    snapshot.knn_similarities = similarities
+                    logger.info(f"Loaded kNN graph from {path.name} ({neighbours.shape[1]} neighbours)")
+                    return
+                logger.info(f"kNN graph {path.name} is stale (version {version}) - rebuilding")
+            except Exception as e:
+                logger.warning(f"Failed to read kNN graph {path}: {e}")
+        
+        started = time.monotonic()
+        snapshot.knn_neighbours, snapshot.knn_similarities = build_knn_graph(snapshot.embedding_matrix)
+        logger.info(f"Built kNN graph for {n} programs in {time.monotonic() - started:.1f}s")
+        self._write_knn_graph(snapshot, path)
+    
+    @staticmethod
+    def _write_knn_graph(snapshot: CatalogSnapshot, path: Path) -> bool:
+        if snapshot.knn_neighbours is None:
+            return False
+        try:
+            # np.savez appends ".npz" to names without it, so write via a handle
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                np.savez(
+                    f,
+                    version=np.array(snapshot.version),
+                    neighbours=snapshot.knn_neighbours,
+                    similarities=snapshot.knn_similarities,
+                )
+            tmp.replace(path)
+            return True
+        except OSError as e:
+            logger.warning(f"Could not save kNN graph to {path}: {e}")
+            return False
+    
+    def save_knn_graph(self) -> Optional[Path]:
+        """Persist the current catalog's kNN graph next to PROGRAMS_FILE"""
+        path = knn_graph_path(self.config.PROGRAMS_FILE)
+        return path if self._write_knn_graph(self._catalog, path) else None
+    
+    def similar_programs(self, program_id: str, limit: int = 10) -> List[Tuple[Program, float]]:
+        """
+        "More like this" - nearest programs by embedding similarity.
+        A single slice of the precomputed graph: no query embedding, no full scan.
+        """
+        catalog = self._catalog
+        row = catalog.id_index.get((program_id or "").strip())
+        if row is None or catalog.knn_neighbours is None:
+            return []
+        
+        limit = max(0, min(int(limit), catalog.knn_neighbours.shape[1]))
+        neighbours = catalog.knn_neighbours[row, :limit]
+        similarities = catalog.knn_similarities[row, :limit]
+        
+        return [
+            (catalog.programs[int(j)], float(sim))
+            for j, sim in zip(neighbours, similarities)
+            if sim > 0  # rows without embeddings have no real neighbours
+        ]
+    
+    # ==================== FACETS ====================
+    
+    def _resolve_region(self, program: Program) -> str:
+        """Map a program to gta / southwestern / eastern / northern / central / other"""
+        text = f"{program.location} {program.university_name}".lower()
+        
+        for name, region in self.UNIVERSITY_REGIONS.items():
+            if name in text:
+                return region
+        
+        if any(city in text for city in self.GTA_CITIES):
+            return "gta"
+        
+        for region, cities in self.ONTARIO_REGIONS.items():
+            if any(city in text for city in cities):
+                return region
+        
+        return "other"
+    
+    def _build_facets(self, snapshot: CatalogSnapshot) -> None:
+        """Precompute facet columns + bitmaps so filters are pure mask operations"""
+        programs = snapshot.programs
+        n = len(programs)
+        
+        snapshot.coop_mask = np.array([p.co_op_available for p in programs], dtype=bool)
+        # Unknown averages stay NaN (not the scoring default) so admission bands skip them
+        snapshot.admission_values = np.array(
+            [
+                parsed[0] if parsed else np.nan
+                for parsed in (self._parse_admission_value(p.admission_average) for p in programs)
+            ],
+            dtype=np.float32,
+        )
+        snapshot.regions = np.array([self._resolve_region(p) for p in programs], dtype=object)
+        
+        universities: Dict[str, List[int]] = {}
+        for i, p in enumerate(programs):
+            key = (p.university_name or "").strip().lower()
+            if key:
+                universities.setdefault(key, []).append(i)
+        
+        for key, rows in universities.items():
+            bitmap = np.zeros(n, dtype=bool)
+            bitmap[rows] = True
+            snapshot.university_bitmaps[key] = bitmap
+        
+        for region in set(snapshot.regions.tolist()):
+            snapshot.region_bitmaps[region] = snapshot.regions == region
+    
+    def _candidate_indices(
+        self, 
+        catalog: CatalogSnapshot, 
+        filters: Optional[SearchFilters]
+    ) -> Optional[np.ndarray]:
+        """
+        Row indices that pass the filters, or None for "all programs".
+        """
+        if filters is None or filters.is_empty() or not catalog.programs:
+            return None
+        
+        mask = np.ones(len(catalog.programs), dtype=bool)
+        
+        if filters.universities:
+            uni_mask = np.zeros_like(mask)
+            for name in filters.universities:
+                bitmap = catalog.university_bitmaps.get((name or "").strip().lower())
+                if bitmap is not None:
+                    uni_mask |= bitmap
+            mask &= uni_mask
+        
+        if filters.co_op_only:
+            mask &= catalog.coop_mask
+        
+        if filters.regions:
+            region_mask = np.zeros_like(mask)
+            for region in filters.regions:
+                bitmap = catalog.region_bitmaps.get((region or "").strip().lower())
+                if bitmap is not None:
+                    region_mask |= bitmap
+            mask &= region_mask
+        
+        # NaN (unknown average) compares False, so those rows drop out of any band
+        if filters.max_admission is not None:
+            mask &= catalog.admission_values <= float(filters.max_admission)
+        
+        if filters.min_admission is not None:
+            mask &= catalog.admission_values >= float(filters.min_admission)
+        
+        return np.flatnonzero(mask)
+    
+    def facet_values(self) -> Dict[str, Any]:
+        """Available filter values with program counts (for building filter UIs)"""
+        catalog = self._catalog
+        return {
+            "universities": sorted(
+                {p.university_name for p in catalog.programs if p.university_name}
+            ),
+            "regions": {
+                region: int(bitmap.sum()) for region, bitmap in sorted(catalog.region_bitmaps.items())
+            },
+            "co_op": int(catalog.coop_mask.sum()) if catalog.coop_mask is not None else 0,
+        }
+    
+    # ==================== HOT RELOAD ====================
+    
+    def _install_catalog(self, snapshot: CatalogSnapshot) -> None:
+        """Atomically swap in a new snapshot and invalidate dependent caches"""
+        previous = self._catalog
+        self._catalog = snapshot  # single reference assignment = atomic swap
+        
+        # Cached query embeddings are only reusable if the vector space is unchanged
+        old_dim = previous.embedding_matrix.shape[1] if previous.embedding_matrix is not None else None
+        new_dim = snapshot.embedding_matrix.shape[1] if snapshot.embedding_matrix is not None else None
+        if old_dim is not None and old_dim != new_dim:
+            self.clear_cache()
         
-        logger.debug(f"Built embedding matrix: {self.embedding_matrix.shape}")
+        for listener in list(self._catalog_listeners):
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.warning(f"Catalog listener failed: {e}")
+    
+    def add_catalog_listener(self, callback: Callable[[CatalogSnapshot], None]) -> None:
+        """Register a callback fired after every catalog swap (for cache invalidation)"""
+        self._catalog_listeners.append(callback)
+    
+    def reload_catalog(self, force: bool = False, wait: bool = False) -> bool:
+        """
+        Rebuild the catalog in a background thread and swap it in when ready.
+        
+        Args:
+            force: Swap even if the file content hash is unchanged
+            wait: Block until the reload finishes
+        
+        Returns:
+            False if a reload was already running, True otherwise
+        """
+        with self._reload_lock:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                logger.info("Catalog reload already in progress")
+                return False
+            thread = threading.Thread(
+                target=self._reload_worker, args=(force,),
+                name="catalog-reload", daemon=True,
+            )
+            self._reload_thread = thread
+            thread.start()
+        
+        if wait:
+            thread.join()
+        return True
+    
+    def _reload_worker(self, force: bool) -> None:
+        started = time.monotonic()
+        try:
+            mtime = self.config.PROGRAMS_FILE.stat().st_mtime
+        except (OSError, AttributeError):
+            mtime = 0.0
+        
+        snapshot = self._build_catalog()
+        if snapshot is None:
+            logger.error("Catalog reload failed - keeping current catalog")
+            return
+        
+        self._catalog_mtime = mtime
+        if not force and snapshot.version == self._catalog.version:
+            logger.info(f"Catalog unchanged (version {snapshot.version}) - skipping swap")
+            return
+        
+        old_version = self._catalog.version
+        self._install_catalog(snapshot)
+        logger.info(f"🔄 Catalog swapped {old_version or '-'} -> {snapshot.version} "
+                   f"({len(snapshot.programs)} programs, {time.monotonic() - started:.1f}s)")
+    
+    def _start_catalog_watcher(self) -> None:
+        """Poll PROGRAMS_FILE mtime and reload when it changes"""
+        interval = getattr(self.config, "CATALOG_RELOAD_INTERVAL_SECONDS", 0) or 0
+        if interval <= 0 or not self.config.PROGRAMS_FILE:
+            return
+        
+        try:
+            self._catalog_mtime = self.config.PROGRAMS_FILE.stat().st_mtime
+        except OSError:
+            self._catalog_mtime = 0.0
+        
+        watcher = threading.Thread(
+            target=self._watch_catalog, args=(interval,),
+            name="catalog-watcher", daemon=True,
+        )
+        watcher.start()
+        logger.info(f"Watching {self.config.PROGRAMS_FILE} for changes every {interval}s")
+    
+    def _watch_catalog(self, interval: int) -> None:
+        while True:
+            time.sleep(interval)
+            try:
+                mtime = self.config.PROGRAMS_FILE.stat().st_mtime
+            except OSError:
+                continue
+            if mtime != self._catalog_mtime:
+                logger.info("Programs file changed on disk - reloading catalog")
+                self.reload_catalog(wait=True)
+    
+    def _start_sharded_scorer(self) -> None:
+        """Spread scoring over SCORING_WORKERS processes (0 = score in-process)"""
+        workers = getattr(self.config, "SCORING_WORKERS", 0) or 0
+        if workers <= 0 or not self._catalog.programs:
+            return
+        
+        from services.sharded_scoring import ShardedScorer
+        self._sharded_scorer = ShardedScorer(self.config, workers)
+        self._sharded_scorer.start(self._catalog)
+        # Workers hold a slice of the catalog - rebuild them on every swap
+        self.add_catalog_listener(self._sharded_scorer.start)
+    
+    def catalog_status(self) -> Dict[str, Any]:
+        """Summary of the loaded catalog for the admin panel"""
+        catalog = self._catalog
+        return {
+            "programs": len(catalog.programs),
+            "has_embeddings": catalog.has_embeddings,
+            "version": catalog.version,
+            "loaded_at": catalog.loaded_at.isoformat(timespec="seconds") if catalog.loaded_at else "",
+            "reloading": bool(self._reload_thread is not None and self._reload_thread.is_alive()),
+        }
     
     def _clean_prerequisites(self, prereqs: str) -> str:
         """Remove garbage strings and normalize prerequisite text"""
@@ -1176,9 +1674,15 @@ class ProgramSearchService:
             "85-90%" -> (87.5, True)
             "Mid 80s" -> (85.0, True)
             "Competitive" -> (90.0, True)
+        
+        Empty or unrecognised text falls back to (75.0, False).
         """
+        return self._parse_admission_value(avg_str) or (75.0, False)
+    
+    def _parse_admission_value(self, avg_str: str) -> Optional[Tuple[float, bool]]:
+        """_parse_admission_average() without the default: None if the text gives no average"""
         if not avg_str:
-            return 75.0, False
+            return None
         
         avg_str = avg_str.lower().strip()
         
@@ -1218,7 +1722,7 @@ class ProgramSearchService:
             if pattern in avg_str:
                 return value, competitive
         
-        return 75.0, False
+        return None
     
     def _calculate_grade_score(
         self, 
@@ -1378,11 +1882,12 @@ class ProgramSearchService:
         
         try:
             import google.generativeai as genai
+            from services.llm_client import legacy_sdk_options
             
             if not self.config.GEMINI_API_KEY:
                 return None
             
-            genai.configure(api_key=self.config.GEMINI_API_KEY)
+            genai.configure(api_key=self.config.GEMINI_API_KEY, **legacy_sdk_options(self.config))
             
             response = genai.embed_content(
                 model="models/text-embedding-004",
@@ -1406,14 +1911,19 @@ class ProgramSearchService:
             logger.warning(f"Embedding generation failed: {e}")
             return None
     
-    def _calculate_embedding_scores(self, query: str) -> np.ndarray:
+    def _calculate_embedding_scores(
+        self, 
+        query: str, 
+        catalog: Optional[CatalogSnapshot] = None
+    ) -> np.ndarray:
         """
         Calculate cosine similarity between query and all program embeddings.
         Uses vectorized operations for efficiency.
         """
-        scores = np.zeros(len(self.programs), dtype=np.float32)
+        catalog = catalog or self._catalog
+        scores = np.zeros(len(catalog.programs), dtype=np.float32)
         
-        if not query or not self.has_embeddings:
+        if not query or not catalog.has_embeddings:
             return scores
         
         query_emb = self._get_query_embedding(query)
@@ -1421,7 +1931,10 @@ class ProgramSearchService:
             return scores
         
         # Vectorized cosine similarity (embeddings are pre-normalized)
-        scores = np.dot(self.embedding_matrix, query_emb)
+        if query_emb.shape[0] != catalog.embedding_matrix.shape[1]:
+            logger.warning("Query embedding dimension does not match catalog - skipping similarity")
+            return scores
+        scores = np.dot(catalog.embedding_matrix, query_emb)
         scores = np.maximum(scores, 0)  # Clamp negative values
         
         # Normalize to 0-1 range
@@ -1523,12 +2036,64 @@ class ProgramSearchService:
         
         return final, breakdown
     
+    def _score_rows(
+        self,
+        programs: List[Program],
+        rows: Any,
+        profile: StudentProfile,
+        embedding_scores: np.ndarray,
+        user_fields: List[str],
+        is_stem: bool,
+        corrected_interests: str = "",
+        row_offset: int = 0
+    ) -> List[Tuple[int, float, Dict[str, Any]]]:
+        """
+        Score programs[row] for each row. Returned rows are shifted by row_offset
+        so a shard can report positions in the full catalog.
+        """
+        scored: List[Tuple[int, float, Dict[str, Any]]] = []
+        for i in rows:
+            final_score, breakdown = self._calculate_final_score(
+                program=programs[i],
+                profile=profile,
+                embedding_score=embedding_scores[i],
+                user_fields=user_fields,
+                is_stem=is_stem,
+                corrected_interests=corrected_interests
+            )
+            match_percent = int(round(final_score * 100))
+
+            breakdown_dict = breakdown.to_dict()
+            breakdown_dict["match_percent"] = match_percent
+            
+            scored.append((int(i) + row_offset, final_score, breakdown_dict))
+        return scored
+    
+    def _rank_scored(
+        self, 
+        scored: List[Tuple[int, float, Dict[str, Any]]], 
+        top_k: int
+    ) -> Tuple[List[Tuple[int, float, Dict[str, Any]]], List[Tuple[int, float, Dict[str, Any]]], int]:
+        """
+        Returns (top_k relevant, top_k overall, number of relevant) with ties
+        broken by catalog row, so partial rankings merge into the same order.
+        """
+        scored = sorted(scored, key=lambda x: (-x[1], x[0]))
+        
+        # Filter out programs with very low relevance
+        relevant = [
+            item for item in scored 
+            if item[2].get("relevance", 0) >= self.MIN_RELEVANCE_THRESHOLD
+        ]
+        return relevant[:top_k], scored[:top_k], len(relevant)
+    
     # ==================== PUBLIC API ====================
     
     def search_with_profile(
         self, 
         profile: StudentProfile, 
-        top_k: Optional[int] = None
+        top_k: Optional[int] = None,
+        filters: Optional[SearchFilters] = None
     ) -> List[Tuple[Program, float, Dict[str, Any]]]:
         """
         Main search method - finds best matching programs for a student.
@@ -1536,6 +2101,8 @@ class ProgramSearchService:
         Args:
             profile: Student's profile with interests, grades, etc.
             top_k: Number of results to return (default from config)
+            filters: Optional hard filters (university, co-op, region,
+                admission band). Only matching programs are scored.
         
         Returns:
             List of (Program, final_score, score_breakdown) tuples,
@@ -1548,10 +2115,19 @@ class ProgramSearchService:
         """
         top_k = top_k or self.config.TOP_K_PROGRAMS
         
-        if not self.programs:
+        # Pin one snapshot for the whole search (a reload may swap it meanwhile)
+        catalog = self._catalog
+        if not catalog.programs:
             logger.warning("No programs loaded")
             return []
         
+        # Facet pre-filter: shrink the candidate set before any scoring work
+        candidates = self._candidate_indices(catalog, filters)
+        if candidates is not None:
+            logger.info(f"Filters matched {len(candidates)}/{len(catalog.programs)} programs")
+            if len(candidates) == 0:
+                return []
+        
         # Detect user's academic interests (with typo correction)
         user_fields, is_stem, corrected_interests = self._detect_user_fields(profile.interests)
         
@@ -1562,48 +2138,37 @@ class ProgramSearchService:
         query = f"{corrected_interests} {profile.extracurriculars}".strip()
         
         # Get embedding scores for all programs
-        embedding_scores = self._calculate_embedding_scores(query)
-        
-        # Calculate final scores for each program
-        all_results: List[Tuple[Program, float, Dict[str, Any]]] = []
-        
-        for i, program in enumerate(self.programs):
-            final_score, breakdown = self._calculate_final_score(
-                program=program,
-                profile=profile,
-                embedding_score=embedding_scores[i],
-                user_fields=user_fields,
-                is_stem=is_stem,
-                corrected_interests=corrected_interests
+        embedding_scores = self._calculate_embedding_scores(query, catalog)
+        
+        # Score candidates - across worker processes for large catalogs, else in-process
+        ranked = None
+        if self._sharded_scorer is not None:
+            ranked = self._sharded_scorer.score(
+                catalog, candidates, profile, embedding_scores,
+                user_fields, is_stem, corrected_interests, top_k
             )
-            match_percent = int(round(final_score * 100))
-
-            breakdown_dict = breakdown.to_dict()
-            breakdown_dict["match_percent"] = match_percent
-            
-            all_results.append((program, final_score, breakdown_dict))
-        
-        # Sort by final score descending
-        all_results.sort(key=lambda x: x[1], reverse=True)
-        
-        # Filter out programs with very low relevance
-        relevant_results = [
-            (prog, score, breakdown) 
-            for prog, score, breakdown in all_results 
-            if breakdown.get("relevance", 0) >= self.MIN_RELEVANCE_THRESHOLD
-        ]
+        if ranked is None:
+            indices = candidates if candidates is not None else range(len(catalog.programs))
+            scored = self._score_rows(
+                catalog.programs, indices, profile, embedding_scores,
+                user_fields, is_stem, corrected_interests
+            )
+            ranked = self._rank_scored(scored, top_k)
+        top_relevant, top_all, relevant_count = ranked
         
         # If no relevant results, log warning and return top by other metrics
-        if not relevant_results:
+        if not top_relevant:
             logger.warning(
                 f"⚠️ No programs found matching interests: '{profile.interests}'. "
                 f"Detected fields: {user_fields}. Returning top programs by other metrics."
             )
             # Return top results but mark them as low-relevance
-            results = all_results[:top_k]
+            rows = top_all
         else:
-            results = relevant_results[:top_k]
-            logger.info(f"Found {len(relevant_results)} relevant programs (showing top {len(results)})")
+            rows = top_relevant
+            logger.info(f"Found {relevant_count} relevant programs (showing top {len(rows)})")
+        
+        results = [(catalog.programs[row], score, breakdown) for row, score, breakdown in rows]
         
         # Log top results for debugging
         self._log_search_results(profile, results[:5], user_fields, corrected_interests)
@@ -1670,15 +2235,44 @@ class ProgramSearchService:
         results = self.search_with_profile(profile, top_k)
         return [program for program, _, _ in results]
     
+    def get_program(self, program_id: str) -> Optional[Program]:
+        """Look up a program by its stable id (O(1))"""
+        catalog = self._catalog
+        row = catalog.id_index.get((program_id or "").strip())
+        return catalog.programs[row] if row is not None else None
+    
+    def get_program_by_url(self, url: str) -> Optional[Program]:
+        """Look up a program by its URL (O(1), scheme/www/trailing slash ignored)"""
+        catalog = self._catalog
+        row = catalog.url_index.get(Program.normalize_url(url))
+        return catalog.programs[row] if row is not None else None
+    
+    def get_programs(self, program_ids: List[str]) -> List[Program]:
+        """Resolve several ids at once, skipping unknown ones (keeps input order)"""
+        catalog = self._catalog
+        rows = [catalog.id_index.get(pid) for pid in program_ids or []]
+        return [catalog.programs[r] for r in rows if r is not None]
+    
     def get_program_score(
         self, 
-        program: Program, 
+        program: Union[Program, str], 
         profile: StudentProfile
     ) -> Tuple[float, Dict[str, Any]]:
         """
         Get detailed score for a single program.
         Useful for explaining why a specific program was/wasn't recommended.
+        
+        Args:
+            program: A Program, or its program_id
+            profile: Student's profile
         """
+        catalog = self._catalog
+        if isinstance(program, str):
+            resolved = self.get_program(program)
+            if resolved is None:
+                raise ValueError(f"Unknown program id: {program}")
+            program = resolved
+        
         user_fields, is_stem, corrected_interests = self._detect_user_fields(profile.interests)
         query = f"{corrected_interests} {profile.extracurriculars}".strip()
         
@@ -1686,7 +2280,14 @@ class ProgramSearchService:
         query_emb = self._get_query_embedding(query)
         embedding_score = 0.0
         
-        if query_emb is not None and program.embedding:
+        row = catalog.id_index.get(program.program_id)
+        if query_emb is not None and row is not None and catalog.has_embeddings \
+                and catalog.programs[row] is program:
+            # Catalog rows are pre-normalized
+            prog_emb = catalog.embedding_matrix[row]
+            if query_emb.shape[0] == prog_emb.shape[0]:
+                embedding_score = max(0, float(np.dot(query_emb, prog_emb)))
+        elif query_emb is not None and program.embedding:
             prog_emb = np.array(program.embedding, dtype=np.float32)
             prog_norm = np.linalg.norm(prog_emb)
             if prog_norm > 0:
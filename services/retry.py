@@ -0,0 +1,173 @@
+# services/retry.py - Retry policy with error classification, jitter and deadlines
+"""
+RetryPolicy decides *whether* a failed call is worth repeating (rate limits,
+5xx, timeouts, dropped connections) and *when*. Backoff uses jitter and never
+sleeps past the caller's Deadline. Fatal errors (bad key, invalid argument,
+programming errors) are raised immediately.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger("saarthi.retry")
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's time budget ran out before the call could succeed"""
+
+    def __init__(self, message: str = "Request took too long. Please try again."):
+        super().__init__(message)
+
+
+class Deadline:
+    """
+    Absolute time budget for one user request, passed down from the controller.
+    Deadline(None) never expires.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.expires_at = time.monotonic() + seconds if seconds and seconds > 0 else None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None for no deadline"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def check(self) -> None:
+        if self.expired():
+            raise DeadlineExceeded()
+
+
+# HTTP status codes worth retrying (timeouts, rate limits, transient server errors)
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+# Google RPC status names that show up in SDK error messages
+RETRYABLE_MARKERS = ("RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED", "INTERNAL", "ABORTED")
+FATAL_MARKERS = ("INVALID_ARGUMENT", "PERMISSION_DENIED", "UNAUTHENTICATED", "NOT_FOUND",
+                 "FAILED_PRECONDITION", "API_KEY_INVALID")
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status from google-genai / google-api-core / httpx style exceptions"""
+    for attr in ("code", "status_code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+        # api_core exposes .code as a grpc StatusCode on some errors
+        value = getattr(value, "value", None)
+        if isinstance(value, tuple) and value and isinstance(value[0], int):
+            grpc_to_http = {4: 504, 8: 429, 13: 500, 14: 503, 3: 400, 5: 404, 7: 403, 16: 401}
+            return grpc_to_http.get(value[0])
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Classify an exception from an LLM/HTTP call as transient (True) or fatal"""
+    if isinstance(exc, DeadlineExceeded):
+        return False
+    if isinstance(exc, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+
+    status = _status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+
+    message = str(exc)
+    if any(marker in message for marker in FATAL_MARKERS):
+        return False
+    if any(marker in message for marker in RETRYABLE_MARKERS):
+        return True
+
+    # Bugs in our own code won't fix themselves on retry
+    if isinstance(exc, (TypeError, ValueError, AttributeError, KeyError, ImportError)):
+        return False
+
+    # Unknown SDK/transport error: assume transient
+    return True
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with jitter, bounded by attempts and an optional Deadline"""
+
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 8.0
+    jitter: float = 0.5  # fraction of each delay that is randomized
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (0-based)"""
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay * (1 - self.jitter * random.random())
+
+    def _next_delay(self, attempt: int, exc: BaseException, deadline: Optional[Deadline]) -> Optional[float]:
+        """Delay before the next attempt, or None to give up and re-raise"""
+        if attempt >= self.max_attempts - 1 or not is_retryable(exc):
+            return None
+        delay = self.backoff(attempt)
+        remaining = deadline.remaining() if deadline else None
+        if remaining is not None and remaining <= delay:
+            # Not enough budget to wait and try again - fail now
+            return None
+        return delay
+
+    def run(self, fn: Callable[..., Any], *args: Any, deadline: Optional[Deadline] = None, **kwargs: Any) -> Any:
+        """Call fn with retries (blocking sleeps, capped by the deadline)"""
+        for attempt in range(self.max_attempts):
+            if deadline:
+                deadline.check()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._next_delay(attempt, e, deadline)
+                if delay is None:
+                    self._log_give_up(attempt, e)
+                    raise
+                logger.warning(f"Attempt {attempt + 1} failed: {e}. Retrying in {delay:.1f}s...")
+                time.sleep(delay)
+        raise RuntimeError("unreachable")
+
+    async def run_async(
+        self,
+        fn: Callable[..., Awaitable[Any]],
+        *args: Any,
+        deadline: Optional[Deadline] = None,
+        **kwargs: Any
+    ) -> Any:
+        """Await fn with retries; waits yield to the event loop and each attempt is cut off at the deadline"""
+        for attempt in range(self.max_attempts):
+            if deadline:
+                deadline.check()
+            try:
+                remaining = deadline.remaining() if deadline else None
+                return await asyncio.wait_for(fn(*args, **kwargs), timeout=remaining)
+            except asyncio.TimeoutError as e:
+                if deadline and deadline.expired():
+                    raise DeadlineExceeded() from e
+                delay = self._next_delay(attempt, e, deadline)
+                if delay is None:
+                    raise
+            except Exception as e:
+                delay = self._next_delay(attempt, e, deadline)
+                if delay is None:
+                    self._log_give_up(attempt, e)
+                    raise
+            logger.warning(f"Attempt {attempt + 1} failed. Retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+        raise RuntimeError("unreachable")
+
+    def _log_give_up(self, attempt: int, exc: BaseException) -> None:
+        if not is_retryable(exc):
+            logger.error(f"Non-retryable error on attempt {attempt + 1}: {exc}")
+        else:
+            logger.error(f"Giving up after {attempt + 1} attempts: {exc}")
@@ -162,19 +162,24 @@ class RoadmapService:
 import logging
 import re
 import json
+import time
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import date, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Callable, Tuple, Optional
 
 from config import Config
 from models import StudentProfile, Session, ServiceResult, Program
-from services.llm_client import LLMClient
+from services.llm_client import LLMClient, AsyncLLMClient, LLMOverloaded
 from services.program_search import ProgramSearchService
+from services.retry import Deadline, DeadlineExceeded, is_retryable
+from services.singleflight import SingleFlight
 from prompts.templates import PromptTemplates
+from prompts.budget import estimate_tokens, truncate_to_tokens
+from utils.course_codes import clean_course_codes
 
 logger = logging.getLogger("saarthi.roadmap")
 
-COURSE_CODE_RE = re.compile(r"\b([A-Za-z]{3}\d[A-Za-z])\b")  # e.g., MHF4U, SCH4U, SPH4U
-
 
 def _parse_ouac_deadline() -> date:
     """
@@ -193,21 +198,8 @@ def _iso(d: date) -> str:
     return d.isoformat()
 
 
-def _clean_course_codes(text: str) -> List[str]:
-    if not text:
-        return []
-    hits = [m.group(1).upper() for m in COURSE_CODE_RE.finditer(text)]
-    out, seen = [], set()
-    for h in hits:
-        h = h.replace("O", "0")  # just in case
-        if h not in seen:
-            seen.add(h)
-            out.append(h)
-    return out[:12]
-
-
 def _clean_prereq_display(text: str) -> str:
-    codes = _clean_course_codes(text or "")
+    codes = clean_course_codes(text or "")
     if codes:
         return ", ".join(codes)
     s = re.sub(r"\s+", " ", (text or "")).strip()
@@ -239,54 +231,414 @@ def _json_default(o):
 
 
 class RoadmapService:
-    def __init__(self, config: Config, llm_client: LLMClient, program_search: ProgramSearchService):
+    # Threads shared by all requests for the short profile-only stages
+    # (timeline, projects); the analysis LLM call runs in the request thread
+    STAGE_WORKERS = 8
+    # First line of the analysis used when the LLM can't answer in time
+    FALLBACK_NOTE = "_The AI analysis took too long, so here is a summary from your match data._"
+
+    def __init__(
+        self,
+        config: Config,
+        llm_client: LLMClient,
+        program_search: ProgramSearchService,
+        plan_store: Optional[Any] = None,
+    ):
         self.config = config
         self.llm = llm_client
         self.search = program_search
+        # Anything with find_fresh_plan() (SubmissionStore) - stored plans for
+        # an identical profile are served instead of regenerated
+        self.plans = plan_store
         self.prompts = PromptTemplates()
+        self.async_llm = AsyncLLMClient(llm_client)
+        # Runs the cheap stages alongside search - never an LLM call, so a
+        # burst of slow analyses can't queue other requests' stages behind them
+        self._pool = ThreadPoolExecutor(max_workers=self.STAGE_WORKERS, thread_name_prefix="roadmap")
+        # Identical profiles generating at the same time share one run
+        self._inflight = SingleFlight()
 
     # =========================
     # MAIN GENERATE
     # =========================
-    def generate(self, profile: StudentProfile, session: Session) -> ServiceResult:
+    def generate(
+        self, 
+        profile: StudentProfile, 
+        session: Session, 
+        deadline: Optional[Deadline] = None
+    ) -> ServiceResult:
+        """
+        Generate a roadmap. A call for a profile that is already being
+        generated (same fingerprint) waits for that run's result instead.
+        """
         try:
-            results = self.search.search_with_profile(profile, self.config.TOP_K_PROGRAMS)
+            return self._inflight.do(
+                profile.fingerprint(), self._generate, profile, session, deadline, deadline=deadline
+            )
+        except DeadlineExceeded as e:
+            return ServiceResult.failure(str(e))
+
+    def _generate(
+        self, 
+        profile: StudentProfile, 
+        session: Session, 
+        deadline: Optional[Deadline] = None
+    ) -> ServiceResult:
+        """
+        Stages run as a small dependency graph:
+            timeline, projects   (profile only, pool) ─┐
+            search ─── payload ─── analysis (LLM)     ─┴─ format
+        so the critical path is search + one LLM round trip (payload is
+        cheap). The LLM call blocks this request's thread, not the pool.
+        Per-stage wall times (ms) are returned in data["timings"].
+        LLM retries stop at `deadline` (the controller's per-request budget).
+        """
+        try:
+            reused = self._reuse_plan(profile)
+            if reused:
+                return reused
+
+            timings: Dict[str, float] = {}
+            started = time.perf_counter()
+            timeline_future, projects_future = self._start_profile_stages(profile, timings)
+
+            results = self._timed(
+                timings, "search", self.search.search_with_profile, profile, self.config.TOP_K_PROGRAMS
+            )
             if not results:
                 return ServiceResult.failure("No programs found.")
 
             programs_for_prompt = [p for p, _, _ in results]
 
-            # 1) AI ANALYSIS (content) — this is your “reasoning” section
-            prompt = self.prompts.roadmap_prompt(profile, programs_for_prompt)
-            analysis = (self.llm.generate(prompt, self.prompts.roadmap_system_prompt()) or "").strip()
-
-            # 2) UI programs (cleaned + compact)
-            ui_programs = [self._program_to_payload(p, score, bd) for (p, score, bd) in results]
+            # 1) UI programs (cleaned + compact)
+            ui_programs = self._timed(
+                timings, "payload",
+                lambda: [self._program_to_payload(p, score, bd) for (p, score, bd) in results],
+            )
 
-            # 3) UNIQUE TABS:
+            # 2) AI ANALYSIS (content) — the long pole, in this thread while
+            #    the profile stages finish on the pool
+            prompt = self.prompts.roadmap_prompt(
+                profile, programs_for_prompt, self.config.PROMPT_PROGRAMS_TOKEN_BUDGET
+            )
+            try:
+                analysis = (self._timed(
+                    timings, "analysis",
+                    lambda: self.llm.generate(prompt, self.prompts.roadmap_system_prompt(), deadline=deadline),
+                ) or "").strip()
+            except DeadlineExceeded as e:
+                logger.warning(f"Analysis timed out ({e}) - using deterministic summary")
+                analysis = self._fallback_analysis(ui_programs)
+
+            # 3) UNIQUE TABS (started before search - they only need the profile):
             #    - timeline_events: dated milestones (today → Jan 15)
             #    - projects: supplementary / portfolio checklist
-            timeline_events = self._build_timeline(profile)
-            projects = self._build_projects(profile)
+            timeline_events = timeline_future.result()
+            projects = projects_future.result()
 
             # 4) Full plan markdown — AI formats only (no new facts)
-            full_md = self._format_full_plan_ai(profile, ui_programs, analysis, timeline_events, projects)
-
-            return ServiceResult.success(
-                message=full_md,
-                data={
-                    "md": full_md,
-                    "programs": ui_programs,
-                    "analysis": analysis,
-                    "timeline_events": timeline_events,
-                    "projects": projects,
-                },
-            )
+            return self._finish(profile, ui_programs, analysis, timeline_events, projects, timings, started, deadline)
 
         except Exception as e:
             logger.error(f"Roadmap generate error: {e}")
             return ServiceResult.failure(str(e))
 
+    async def generate_async(
+        self, 
+        profile: StudentProfile, 
+        session: Session, 
+        deadline: Optional[Deadline] = None
+    ) -> ServiceResult:
+        """generate() for async handlers; joins an in-flight run for the same profile (sync or async)"""
+        try:
+            return await self._inflight.do_async(
+                profile.fingerprint(), self._generate_async, profile, session, deadline, deadline=deadline
+            )
+        except DeadlineExceeded as e:
+            return ServiceResult.failure(str(e))
+
+    async def _generate_async(
+        self, 
+        profile: StudentProfile, 
+        session: Session, 
+        deadline: Optional[Deadline] = None
+    ) -> ServiceResult:
+        """
+        generate() for async handlers: the LLM call is awaited through the
+        bounded AsyncLLMClient, CPU work (search, formatting) runs in threads.
+        Raises LLMOverloaded so the caller can answer "busy" (HTTP 503).
+        """
+        try:
+            reused = await asyncio.to_thread(self._reuse_plan, profile)
+            if reused:
+                return reused
+
+            timings: Dict[str, float] = {}
+            started = time.perf_counter()
+
+            search = asyncio.create_task(asyncio.to_thread(
+                self._timed, timings, "search", self.search.search_with_profile, profile, self.config.TOP_K_PROGRAMS
+            ))
+            timeline_events = self._timed(timings, "timeline", self._build_timeline, profile)
+            projects = self._timed(timings, "projects", self._build_projects, profile)
+
+            results = await search
+            if not results:
+                return ServiceResult.failure("No programs found.")
+
+            prompt = self.prompts.roadmap_prompt(
+                profile, [p for p, _, _ in results], self.config.PROMPT_PROGRAMS_TOKEN_BUDGET
+            )
+            analysis_started = time.perf_counter()
+            analysis_task = asyncio.create_task(
+                self.async_llm.generate(prompt, self.prompts.roadmap_system_prompt(), deadline=deadline)
+            )
+            ui_programs = self._timed(
+                timings, "payload",
+                lambda: [self._program_to_payload(p, score, bd) for (p, score, bd) in results],
+            )
+
+            try:
+                analysis = (await analysis_task or "").strip()
+            except DeadlineExceeded as e:
+                logger.warning(f"Analysis timed out ({e}) - using deterministic summary")
+                analysis = self._fallback_analysis(ui_programs)
+            timings["analysis"] = round((time.perf_counter() - analysis_started) * 1000, 1)
+
+            return await asyncio.to_thread(
+                self._finish, profile, ui_programs, analysis, timeline_events, projects, timings, started, deadline
+            )
+
+        except LLMOverloaded:
+            raise
+        except Exception as e:
+            logger.error(f"Roadmap generate_async error: {e}")
+            return ServiceResult.failure(str(e))
+
+    def generate_stream(
+        self, 
+        profile: StudentProfile, 
+        session: Session, 
+        deadline: Optional[Deadline] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        _generate_stream() coalesced by profile fingerprint. A duplicate of a
+        run already in flight (stream or not) gets no partial events, only
+        {"type": "done"} with the shared result.
+        """
+        key = profile.fingerprint()
+        future, leader = self._inflight.claim(key)
+        if not leader:
+            try:
+                result = SingleFlight.wait(future, deadline)
+            except Exception as e:
+                result = ServiceResult.failure(str(e))
+            yield {"type": "done", "result": result}
+            return
+
+        result: ServiceResult = ServiceResult.failure("Roadmap generation was interrupted.")
+        try:
+            for event in self._generate_stream(profile, session, deadline):
+                if event["type"] == "done":
+                    result = event["result"]
+                yield event
+        finally:
+            # Also runs if the client goes away mid-stream (generator closed)
+            self._inflight.resolve(key, future, result)
+
+    def _generate_stream(
+        self, 
+        profile: StudentProfile, 
+        session: Session, 
+        deadline: Optional[Deadline] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Same pipeline as generate(), reported as it goes:
+          {"type": "programs", "md", "programs", "timeline_events", "projects"}  (before any LLM call)
+          {"type": "analysis", "md", "analysis"}  (once per streamed chunk)
+          {"type": "done", "result": ServiceResult}  (always last)
+        "md" is a preview of the full plan with the analysis so far.
+        """
+        try:
+            reused = self._reuse_plan(profile)
+            if reused:
+                yield {"type": "done", "result": reused}
+                return
+
+            timings: Dict[str, float] = {}
+            started = time.perf_counter()
+            timeline_future, projects_future = self._start_profile_stages(profile, timings)
+
+            results = self._timed(
+                timings, "search", self.search.search_with_profile, profile, self.config.TOP_K_PROGRAMS
+            )
+            if not results:
+                yield {"type": "done", "result": ServiceResult.failure("No programs found.")}
+                return
+
+            # Everything that doesn't need the LLM goes out first
+            ui_programs = self._timed(
+                timings, "payload",
+                lambda: [self._program_to_payload(p, score, bd) for (p, score, bd) in results],
+            )
+            timeline_events = timeline_future.result()
+            projects = projects_future.result()
+            payload = self._plan_payload(profile, ui_programs, "", timeline_events, projects)
+
+            yield {
+                "type": "programs",
+                "md": self._format_full_plan_md({**payload, "analysis": "_Writing your analysis…_"}),
+                "programs": ui_programs,
+                "timeline_events": timeline_events,
+                "projects": projects,
+            }
+
+            prompt = self.prompts.roadmap_prompt(
+                profile, [p for p, _, _ in results], self.config.PROMPT_PROGRAMS_TOKEN_BUDGET
+            )
+            system = self.prompts.roadmap_system_prompt()
+            analysis = ""
+            analysis_started = time.perf_counter()
+            try:
+                for chunk in self.llm.generate_stream(prompt, system, deadline=deadline):
+                    analysis += chunk
+                    yield {
+                        "type": "analysis",
+                        "md": self._format_full_plan_md({**payload, "analysis": analysis}),
+                        "analysis": analysis,
+                    }
+            except DeadlineExceeded as e:
+                logger.warning(f"Analysis timed out ({e}) - using deterministic summary")
+                analysis = self._fallback_analysis(ui_programs)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                # Stream broke part-way: fall back to one blocking call
+                logger.warning(f"Analysis stream failed ({e}) - retrying without streaming")
+                analysis = self.llm.generate(prompt, system, deadline=deadline) or ""
+            timings["analysis"] = round((time.perf_counter() - analysis_started) * 1000, 1)
+
+            result = self._finish(
+                profile, ui_programs, analysis.strip(), timeline_events, projects, timings, started, deadline
+            )
+            yield {"type": "done", "result": result}
+
+        except Exception as e:
+            logger.error(f"Roadmap generate_stream error: {e}")
+            yield {"type": "done", "result": ServiceResult.failure(str(e))}
+
+    def _plan_key(self, profile: StudentProfile) -> Dict[str, str]:
+        """What a stored plan is keyed on for reuse (returned in result.data for saving)"""
+        return {"fingerprint": profile.fingerprint(), "catalog_version": self.search.catalog_version}
+
+    def _reuse_plan(self, profile: StudentProfile) -> Optional[ServiceResult]:
+        """
+        A plan stored within PLAN_REUSE_HOURS for this exact profile and the
+        current catalog version, as a generate() result (data["plan_id"] set),
+        or None to generate. No search or LLM call is made for a hit.
+        """
+        if self.plans is None or self.config.PLAN_REUSE_HOURS <= 0:
+            return None
+        try:
+            key = self._plan_key(profile)
+            plan = self.plans.find_fresh_plan(key["fingerprint"], key["catalog_version"], self.config.PLAN_REUSE_HOURS)
+        except Exception as e:
+            logger.warning(f"Stored plan lookup failed ({e}) - generating")
+            return None
+        if not plan:
+            return None
+        logger.info(f"Reusing stored plan #{plan['id']} from {plan['created_at']}")
+        return ServiceResult.success(
+            message=plan["roadmap_md"],
+            data={
+                "md": plan["roadmap_md"],
+                "programs": plan["ui_programs"],
+                "analysis": "",
+                "timeline_events": plan["ui_timeline"],
+                "projects": plan["ui_projects"],
+                "timings": {},
+                "plan_id": plan["id"],
+                **key,
+            },
+        )
+
+    def inflight_stats(self) -> Dict[str, Any]:
+        """Generations started vs. joined onto an identical in-flight run"""
+        return self._inflight.stats()
+
+    def _finish(
+        self,
+        profile: StudentProfile,
+        ui_programs: List[Dict[str, Any]],
+        analysis: str,
+        timeline_events: List[Dict[str, Any]],
+        projects: List[Dict[str, Any]],
+        timings: Dict[str, float],
+        started: float,
+        deadline: Optional[Deadline] = None,
+    ) -> ServiceResult:
+        full_md = self._timed(
+            timings, "format",
+            self._format_full_plan_ai, profile, ui_programs, analysis, timeline_events, projects, deadline,
+        )
+        timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info("Roadmap stages (ms): " + ", ".join(f"{k}={v:.0f}" for k, v in timings.items()))
+        # A plan with the fallback analysis is stored without a key, so it is never reused
+        plan_key = {} if analysis.startswith(self.FALLBACK_NOTE) else self._plan_key(profile)
+
+        return ServiceResult.success(
+            message=full_md,
+            data={
+                "md": full_md,
+                "programs": ui_programs,
+                "analysis": analysis,
+                "timeline_events": timeline_events,
+                "projects": projects,
+                "timings": dict(timings),
+                **plan_key,
+            },
+        )
+
+    def _fallback_analysis(self, ui_programs: List[Dict[str, Any]]) -> str:
+        """Analysis built from match data alone, for when the LLM can't answer in time"""
+        lines = [self.FALLBACK_NOTE, ""]
+        if ui_programs:
+            top = ui_programs[0]
+            lines.append(
+                f"- **Best overall match:** {top['program_name']} at {top['university_name']} "
+                f"({top['match_percent']}%)."
+            )
+
+        by_fit: Dict[str, List[str]] = {}
+        for pr in ui_programs:
+            fit = pr.get("grade_assessment") or "Unknown"
+            by_fit.setdefault(fit, []).append(f"{pr['program_name']} ({pr['university_name']})")
+        for fit, label in (("Safe", "Comfortably within reach"), ("Good", "Good fit for your average"),
+                           ("Target", "Target programs"), ("Reach", "Reach programs"),
+                           ("Long Shot", "Long shots")):
+            if by_fit.get(fit):
+                lines.append(f"- **{label}:** {', '.join(by_fit[fit][:4])}.")
+
+        missing = sorted({code for pr in ui_programs for code in (pr.get("missing_prereqs") or [])})
+        if missing:
+            lines.append(f"- **Prerequisites to plan for:** {', '.join(missing[:8])}.")
+        return "\n".join(lines)
+
+    def _start_profile_stages(self, profile: StudentProfile, timings: Dict[str, float]) -> Tuple[Future, Future]:
+        """Timeline and projects depend only on the profile - run them alongside search"""
+        return (
+            self._pool.submit(self._timed, timings, "timeline", self._build_timeline, profile),
+            self._pool.submit(self._timed, timings, "projects", self._build_projects, profile),
+        )
+
+    @staticmethod
+    def _timed(timings: Dict[str, float], stage: str, fn: Callable[..., Any], *args: Any) -> Any:
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            timings[stage] = round((time.perf_counter() - t0) * 1000, 1)
+
     # =========================
     # PROGRAM PAYLOAD
     # =========================
@@ -309,6 +661,7 @@ class RoadmapService:
         missing = [str(x).strip() for x in (missing or []) if str(x).strip()]
 
         return {
+            "program_id": g(prog, "program_id", "") or "",
             "program_name": g(prog, "program_name", "") or "",
             "university_name": g(prog, "university_name", "") or g(prog, "university", "") or "",
             "program_url": g(prog, "program_url", "") or g(prog, "url", "") or "",
@@ -448,18 +801,15 @@ class RoadmapService:
     # =========================
     # FULL PLAN FORMATTING
     # =========================
-    def _format_full_plan_ai(
+    def _plan_payload(
         self,
         profile: StudentProfile,
         ui_programs: List[Dict[str, Any]],
         analysis: str,
         timeline_events: List[Dict[str, Any]],
         projects: List[Dict[str, Any]],
-    ) -> str:
-        """
-        LLM formats ONLY (no new facts). If no API, fallback deterministic markdown.
-        """
-        payload = {
+    ) -> Dict[str, Any]:
+        return {
             "profile": {
                 "interest": profile.interests,
                 "grade": profile.grade,
@@ -473,8 +823,24 @@ class RoadmapService:
             "analysis": analysis,
         }
 
-        if not getattr(self.llm, "has_api", False):
-            return self._format_full_plan_fallback(payload)
+    def _format_full_plan_ai(
+        self,
+        profile: StudentProfile,
+        ui_programs: List[Dict[str, Any]],
+        analysis: str,
+        timeline_events: List[Dict[str, Any]],
+        projects: List[Dict[str, Any]],
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """
+        LLM formats ONLY (no new facts) when ROADMAP_LLM_FORMATTING is on.
+        Otherwise (and with no API) the deterministic template is used.
+        """
+        payload = self._plan_payload(profile, ui_programs, analysis, timeline_events, projects)
+
+        # One LLM call per roadmap unless AI formatting is switched on
+        if not self.config.ROADMAP_LLM_FORMATTING or not getattr(self.llm, "has_api", False):
+            return self._format_full_plan_md(payload)
 
         system = (
             "You are polishing and lightly cleaning Markdown that already follows a fixed template.\n"
@@ -491,7 +857,9 @@ class RoadmapService:
             "- Output ONLY Markdown.\n"
         )
 
-        payload_json = json.dumps(payload, ensure_ascii=False, default=_json_default)
+        payload_json = json.dumps(
+            self._compact_format_payload(payload), ensure_ascii=False, separators=(",", ":"), default=_json_default
+        )
 
         prompt = (
             "Take the following DATA and fill it into the EXACT TEMPLATE below.\n"
@@ -525,13 +893,33 @@ class RoadmapService:
             "\n"
             "---\n"
             "**Tip:** Always verify prerequisites/admission details using the program link (requirements can change).\n\n"
-            f"DATA:\n{payload}"
+            f"DATA:\n{payload_json}"
         )
+        logger.debug(f"Formatting prompt ~{estimate_tokens(prompt)} tokens")
+
+        out = (self.llm.generate(prompt, system, deadline=deadline) or "").strip()
+        return out or self._format_full_plan_md(payload)
 
-        out = (self.llm.generate(prompt, system) or "").strip()
-        return out or self._format_full_plan_fallback(payload)
+    def _compact_format_payload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Only what the template shows: no ids or scoring internals, empty
+        fields dropped, analysis cut to PROMPT_ANALYSIS_TOKEN_BUDGET.
+        """
+        shown = ("program_name", "university_name", "program_url", "admission_average",
+                 "prerequisites", "co_op_available", "match_percent", "missing_prereqs")
+        programs = [{k: pr[k] for k in shown if pr.get(k)} for pr in payload["programs"]]
+        return {
+            **payload,
+            "programs": programs,
+            "analysis": truncate_to_tokens(payload.get("analysis") or "", self.config.PROMPT_ANALYSIS_TOKEN_BUDGET),
+        }
 
-    def _format_full_plan_fallback(self, payload: Dict[str, Any]) -> str:
+    def _format_full_plan_md(self, payload: Dict[str, Any]) -> str:
+        """
+        Deterministic Markdown in the same fixed template the AI formatter is
+        asked to fill (no LLM call). Default since the formatting call adds
+        latency and cost without adding facts.
+        """
         p = payload["profile"]
         lines: List[str] = []
 
@@ -543,14 +931,24 @@ class RoadmapService:
         lines.append("---\n")
 
         lines.append("## Top Matching Programs\n")
-        lines.append("| Program | University | Match | Co-op | Prereqs (db) |")
-        lines.append("|---|---|---:|:---:|---|")
-        for pr in payload["programs"]:
-            coop_mark = "✅" if pr.get("co_op_available") else "—"
-            lines.append(
-                f"| {pr.get('program_name','')} | {pr.get('university_name','')} | "
-                f"{pr.get('match_percent',0)}% | {coop_mark} | {pr.get('prerequisites','')} |"
-            )
+        for i, pr in enumerate(payload["programs"], 1):
+            lines.append(f"### {i}. {pr.get('program_name','')}")
+            coop = " | ✅ Co-op" if pr.get("co_op_available") else ""
+            lines.append(f"**{pr.get('university_name','')}** | **Match:** {pr.get('match_percent',0)}%{coop}  ")
+            lines.append(f"**📝 Admission:** {pr.get('admission_average') or 'Check website'}  ")
+            lines.append(f"**📚 Prerequisites:** {pr.get('prerequisites') or 'Check university website'}")
+            missing = pr.get("missing_prereqs") or []
+            if missing:
+                lines.append(f"> ⚠️ **Missing:** {', '.join(missing)}")
+            if pr.get("program_url"):
+                lines.append(f"\n🔗 [View Program Details]({pr['program_url']})")
+            lines.append("")
+        if not payload["programs"]:
+            lines.append("- No programs matched.\n")
+        lines.append("---\n")
+
+        lines.append("## Personalized Analysis\n")
+        lines.append((payload.get("analysis") or "").strip() or "- No analysis returned.")
         lines.append("\n---\n")
 
         lines.append("## Timeline\n")
@@ -567,10 +965,9 @@ class RoadmapService:
             for it in blk.get("items", [])[:12]:
                 lines.append(f"- [ ] {it}")
             lines.append("")
-        lines.append("---\n")
+        lines.append("---")
 
-        lines.append("## Personalized Analysis\n")
-        lines.append(payload.get("analysis") or "- No analysis returned.")
+        lines.append("**Tip:** Always verify prerequisites/admission details using the program link (requirements can change).")
         return "\n".join(lines).strip()
 
     # =========================
@@ -582,5 +979,15 @@ class RoadmapService:
             prompt = self.prompts.followup_prompt(question, context)
             response = self.llm.generate(prompt, self.prompts.followup_system_prompt())
             return ServiceResult.success(message=response) if response else ServiceResult.failure("No response")
+        except Exception as e:
+            return ServiceResult.failure(str(e))
+
+    async def followup_async(self, question: str, session: Session) -> ServiceResult:
+        try:
+            context = session.last_profile.to_context_string() if session.last_profile else ""
+            prompt = self.prompts.followup_prompt(question, context)
+            deadline = Deadline(self.config.REQUEST_DEADLINE_SECONDS)
+            response = await self.async_llm.generate(prompt, self.prompts.followup_system_prompt(), deadline=deadline)
+            return ServiceResult.success(message=response) if response else ServiceResult.failure("No response")
         except Exception as e:
             return ServiceResult.failure(str(e))
\ No newline at end of file
@@ -0,0 +1,280 @@
+# services/sharded_scoring.py
+"""
+Multi-process scoring backend for large program catalogs.
+
+The catalog is split into contiguous shards, one worker process per shard.
+Each worker holds its shard of programs for the lifetime of a catalog
+version and scores only its own rows; the parent merges the per-shard top-k.
+
+Workers are started with forkserver (spawn where unavailable) - forking the
+multithreaded app process could copy a lock held by another thread. The
+parent encodes the catalog once into a shared-memory block (int64 row
+offsets, then one JSON row per program); each worker attaches by name and
+decodes only its own rows, so nothing catalog-sized goes through a pipe.
+"""
+
+import heapq
+import json
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+from models import Program, StudentProfile
+
+logger = logging.getLogger("saarthi.sharded_scoring")
+
+ScoredRow = Tuple[int, float, Dict[str, Any]]
+Ranked = Tuple[List[ScoredRow], List[ScoredRow], int]
+
+
+# ==================== WORKER PROCESS ====================
+
+_shard_service = None
+_shard_version: str = ""
+
+
+def _encode_catalog(programs: List[Program]) -> shared_memory.SharedMemory:
+    """Catalog rows in a new shared-memory block: n+1 int64 offsets, then the JSON rows"""
+    rows = [json.dumps(p.to_dict(), ensure_ascii=False).encode("utf-8") for p in programs]
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in rows], out=offsets[1:])
+    header = offsets.tobytes()
+
+    block = shared_memory.SharedMemory(create=True, size=max(1, len(header) + int(offsets[-1])))
+    block.buf[:len(header)] = header
+    block.buf[len(header):len(header) + int(offsets[-1])] = b"".join(rows)
+    return block
+
+
+def _decode_rows(block_name: str, n: int, start: int, stop: int) -> List[Program]:
+    """Programs[start:stop] from a block written by _encode_catalog"""
+    block = shared_memory.SharedMemory(name=block_name)
+    try:
+        header = 8 * (n + 1)
+        offsets = np.frombuffer(bytes(block.buf[8 * start:8 * (stop + 1)]), dtype=np.int64)
+        data = bytes(block.buf[header + int(offsets[0]):header + int(offsets[-1])])
+    finally:
+        block.close()
+
+    base = int(offsets[0])
+    return [
+        Program(**json.loads(data[int(a) - base:int(b) - base]))
+        for a, b in zip(offsets[:-1], offsets[1:])
+    ]
+
+
+def _init_shard(config: Config, block_name: str, n: int, start: int, stop: int, version: str) -> None:
+    """Process initializer: build a scoring-only service over this shard"""
+    global _shard_service, _shard_version
+    from services.program_search import ProgramSearchService
+
+    try:
+        programs = _decode_rows(block_name, n, start, stop)
+    except FileNotFoundError:
+        return  # superseded by a newer catalog before this worker started
+
+    # Embeddings stay in the parent - workers receive per-query score slices
+    _shard_service = ProgramSearchService(config, programs=programs)
+    _shard_version = version
+
+
+def _ping() -> str:
+    return _shard_version
+
+
+def _score_shard(
+    version: str,
+    row_offset: int,
+    rows: Optional[np.ndarray],
+    profile: StudentProfile,
+    embedding_scores: np.ndarray,
+    user_fields: List[str],
+    is_stem: bool,
+    corrected_interests: str,
+    top_k: int
+) -> Optional[Ranked]:
+    """Score this shard and return its local ranking (rows in catalog positions)"""
+    if _shard_service is None or version != _shard_version:
+        return None
+
+    programs = _shard_service.programs
+    scored = _shard_service._score_rows(
+        programs,
+        rows if rows is not None else range(len(programs)),
+        profile, embedding_scores, user_fields, is_stem, corrected_interests,
+        row_offset=row_offset,
+    )
+    return _shard_service._rank_scored(scored, top_k)
+
+
+# ==================== PARENT SIDE ====================
+
+@dataclass
+class _Shard:
+    start: int
+    stop: int
+    executor: ProcessPoolExecutor
+
+
+class ShardedScorer:
+    """
+    Fans a search out over one single-process pool per catalog shard.
+
+    score() returns None whenever the shards can't serve the request
+    (catalog version mismatch, worker failure, small candidate set) and
+    the caller falls back to in-process scoring. A dead or hung worker
+    gets all shards rebuilt, so the next search can use them again.
+    """
+
+    # Below this many candidates, IPC costs more than it saves
+    MIN_CANDIDATES: int = 2000
+    # A shard slower than this is treated as hung
+    RESULT_TIMEOUT_SECONDS: float = 10.0
+
+    def __init__(self, config: Config, workers: int):
+        self.config = config
+        self.workers = max(1, int(workers))
+        self.min_candidates = self.MIN_CANDIDATES
+        self.result_timeout = self.RESULT_TIMEOUT_SECONDS
+        self._lock = threading.Lock()
+        self._restart_lock = threading.Lock()
+        self._shards: List[_Shard] = []
+        self._block: Optional[shared_memory.SharedMemory] = None
+        self._version: str = ""
+
+    @staticmethod
+    def _mp_context():
+        # Never fork: the parent runs server, reload and watcher threads
+        methods = multiprocessing.get_all_start_methods()
+        return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+    def start(self, catalog) -> None:
+        """(Re)build worker processes for a catalog snapshot"""
+        n = len(catalog.programs)
+        shards: List[_Shard] = []
+        block = None
+
+        if n:
+            block = _encode_catalog(catalog.programs)
+            context = self._mp_context()
+            bounds = np.linspace(0, n, min(self.workers, n) + 1, dtype=int)
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                executor = ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=context,
+                    initializer=_init_shard,
+                    initargs=(self.config, block.name, n, int(start), int(stop), catalog.version),
+                )
+                shards.append(_Shard(int(start), int(stop), executor))
+
+            # Spawn the processes now rather than on the first search
+            for shard in shards:
+                shard.executor.submit(_ping)
+
+        with self._lock:
+            old_shards, old_block = self._shards, self._block
+            self._shards, self._block = shards, block
+            self._version = catalog.version
+
+        self._release(old_shards, old_block)
+
+        logger.info(f"Sharded scoring: {len(shards)} workers over {n} programs "
+                   f"(version {catalog.version})")
+
+    def score(
+        self,
+        catalog,
+        candidates: Optional[np.ndarray],
+        profile: StudentProfile,
+        embedding_scores: np.ndarray,
+        user_fields: List[str],
+        is_stem: bool,
+        corrected_interests: str,
+        top_k: int
+    ) -> Optional[Ranked]:
+        """Score across shards and merge, or None to score in-process"""
+        with self._lock:
+            shards, version = self._shards, self._version
+
+        if not shards or version != catalog.version:
+            return None
+
+        n_candidates = len(candidates) if candidates is not None else len(catalog.programs)
+        if n_candidates < self.min_candidates:
+            return None
+
+        futures = []
+        try:
+            for shard in shards:
+                rows = None
+                if candidates is not None:
+                    in_shard = candidates[(candidates >= shard.start) & (candidates < shard.stop)]
+                    if len(in_shard) == 0:
+                        continue
+                    rows = in_shard - shard.start
+
+                futures.append(shard.executor.submit(
+                    _score_shard, version, shard.start, rows, profile,
+                    np.ascontiguousarray(embedding_scores[shard.start:shard.stop]),
+                    user_fields, is_stem, corrected_interests, top_k,
+                ))
+
+            _, not_done = wait(futures, timeout=self.result_timeout)
+            if not_done:
+                raise FutureTimeoutError(f"{len(not_done)} shard(s) gave no answer in {self.result_timeout:.1f}s")
+            parts = [future.result() for future in futures]
+        except (BrokenProcessPool, FutureTimeoutError) as e:
+            # A worker died (OOM, segfault) or hung - its pool is unusable from now on
+            logger.warning(f"Shard worker lost ({e!r}) - restarting shards, scoring in-process")
+            for future in futures:
+                future.cancel()
+            self._restart(catalog, shards)
+            return None
+        except Exception as e:
+            logger.warning(f"Sharded scoring failed, scoring in-process: {e}")
+            return None
+
+        if any(part is None for part in parts):
+            logger.info("Shard catalog version changed mid-search - scoring in-process")
+            return None
+
+        return self.merge(parts, top_k)
+
+    @staticmethod
+    def merge(parts: List[Ranked], top_k: int) -> Ranked:
+        """Merge per-shard rankings (each sorted by (-score, row))"""
+        key = lambda item: (-item[1], item[0])
+        relevant = list(heapq.merge(*(part[0] for part in parts), key=key))[:top_k]
+        overall = list(heapq.merge(*(part[1] for part in parts), key=key))[:top_k]
+        return relevant, overall, sum(part[2] for part in parts)
+
+    def _restart(self, catalog, broken: List[_Shard]) -> None:
+        """start() again, unless another search already replaced `broken`"""
+        with self._restart_lock:
+            with self._lock:
+                current = self._shards is broken
+            if current:
+                self.start(catalog)
+
+    def close(self) -> None:
+        with self._lock:
+            shards, self._shards = self._shards, []
+            block, self._block = self._block, None
+        self._release(shards, block)
+
+    @staticmethod
+    def _release(shards: List[_Shard], block: Optional[shared_memory.SharedMemory]) -> None:
+        for shard in shards:
+            shard.executor.shutdown(wait=False, cancel_futures=True)
+        if block is not None:
+            # Workers copy their rows out at startup; unlinking only drops the name
+            block.close()
+            block.unlink()
@@ -0,0 +1,102 @@
+# services/singleflight.py - Coalesce identical in-flight calls
+"""
+While a call for a key is running, later callers with the same key wait for
+its result instead of repeating the work (double-clicks, client retries).
+Nothing is cached: once the leader finishes the key is released and the next
+call runs fresh. Waiters get the leader's result object itself, or its
+exception.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from services.retry import Deadline, DeadlineExceeded
+
+logger = logging.getLogger("saarthi.singleflight")
+
+
+class SingleFlight:
+    """Per-key leader/follower registry usable from threads and event loops alike"""
+
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "coalesced": 0}
+
+    def claim(self, key: str) -> Tuple[Future, bool]:
+        """(future for key, True if the caller is the leader and must resolve it)"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                logger.info(f"Joining in-flight call {key[:12]}")
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self._stats["leaders"] += 1
+            return future, True
+
+    def resolve(self, key: str, future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """Leader only: release the key and hand the outcome to waiters"""
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    @staticmethod
+    def wait(future: Future, deadline: Optional[Deadline] = None) -> Any:
+        """Follower: block for the leader's outcome, no longer than the deadline"""
+        remaining = deadline.remaining() if deadline else None
+        try:
+            return future.result(timeout=remaining)
+        except FutureTimeoutError as e:
+            if future.done():
+                raise  # the leader itself failed with a timeout
+            raise DeadlineExceeded() from e
+
+    def do(self, key: str, fn: Callable[..., Any], *args: Any, deadline: Optional[Deadline] = None) -> Any:
+        future, leader = self.claim(key)
+        if not leader:
+            return self.wait(future, deadline)
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            self.resolve(key, future, error=e)
+            raise
+        self.resolve(key, future, result)
+        return result
+
+    async def do_async(
+        self,
+        key: str,
+        fn: Callable[..., Awaitable[Any]],
+        *args: Any,
+        deadline: Optional[Deadline] = None
+    ) -> Any:
+        future, leader = self.claim(key)
+        if not leader:
+            remaining = deadline.remaining() if deadline else None
+            try:
+                # shield: a cancelled waiter must not cancel the leader's future
+                return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=remaining)
+            except asyncio.TimeoutError as e:
+                if future.done():
+                    raise
+                raise DeadlineExceeded() from e
+        try:
+            result = await fn(*args)
+        except BaseException as e:
+            self.resolve(key, future, error=e)
+            raise
+        self.resolve(key, future, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls)}
@@ -0,0 +1,193 @@
+# services/submission_export.py - Streaming NDJSON / CSV export of submissions
+"""
+Usage:
+    python -m services.submission_export --format csv --status SENT -o sent.csv
+    python -m services.submission_export --columns id,created_at,interests --recommendations
+
+Rows are streamed from SubmissionStore.iter_submissions() and written in
+small chunks, so memory stays flat however large the database is. The same
+generators back GET /api/admin/export.
+
+With recommendations, each submission's recommended programs are included:
+NDJSON rows get a "recommendations" list; CSV gets one line per
+(submission, program) with rec_* columns (a submission with none keeps one
+line with them empty).
+
+CSV text cells that a spreadsheet would run as a formula (leading =, +, -,
+@, tab or CR - names and interests are student-typed) get a leading ' unless
+raw output is asked for (--raw).
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from services.submissions_store import DEFAULT_DB_PATH, EXPORT_COLUMNS, HEADER_COLUMNS, SubmissionStore
+
+FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+# Without --columns: the submission itself, not its stored plan or email
+DEFAULT_COLUMNS = tuple(c for c in HEADER_COLUMNS if c in EXPORT_COLUMNS)
+# Per-program fields written for each recommendation (CSV gets them as rec_*)
+RECOMMENDATION_FIELDS = (
+    "rank", "program_id", "program_name", "university_name",
+    "match_percent", "grade_assessment", "co_op_available",
+)
+
+# Rows per chunk handed to the writer / HTTP response
+CHUNK_ROWS = 200
+
+# First characters that make Excel / Sheets / LibreOffice treat a cell as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def resolve_columns(spec: Optional[str]) -> List[str]:
+    """Comma-separated column list (None/empty = DEFAULT_COLUMNS); ValueError for unknown names"""
+    columns = [c.strip() for c in (spec or "").split(",") if c.strip()] or list(DEFAULT_COLUMNS)
+    unknown = [c for c in columns if c not in EXPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}. Available: {', '.join(EXPORT_COLUMNS)}")
+    return list(dict.fromkeys(columns))
+
+
+def _recommendations(row: Dict[str, Any]) -> List[Dict[str, Any]]:
+    try:
+        programs = json.loads(row.get("ui_programs_json") or "[]")
+    except ValueError:
+        return []
+    return [
+        {"rank": rank, **{f: p.get(f) for f in RECOMMENDATION_FIELDS if f != "rank"}}
+        for rank, p in enumerate(programs if isinstance(programs, list) else [], start=1)
+        if isinstance(p, dict)
+    ]
+
+
+def csv_safe(value: Any) -> Any:
+    """Text that would open as a spreadsheet formula, prefixed with ' (other values unchanged)"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _rows(
+    store: SubmissionStore,
+    columns: Sequence[str],
+    recommendations: bool,
+    status_filter: str,
+    created_since: str,
+) -> Iterator[Dict[str, Any]]:
+    """Export rows; with recommendations each has a "recommendations" list"""
+    query_columns = list(columns)
+    if recommendations and "ui_programs_json" not in query_columns:
+        query_columns.append("ui_programs_json")
+    for row in store.iter_submissions(query_columns, status_filter, created_since):
+        out = {c: row[c] for c in columns}
+        if recommendations:
+            out["recommendations"] = _recommendations(row)
+        yield out
+
+
+def iter_ndjson(
+    store: SubmissionStore,
+    columns: Sequence[str] = DEFAULT_COLUMNS,
+    recommendations: bool = False,
+    status_filter: str = "ALL",
+    created_since: str = "",
+) -> Iterator[str]:
+    """NDJSON text in chunks of CHUNK_ROWS lines"""
+    lines: List[str] = []
+    for row in _rows(store, columns, recommendations, status_filter, created_since):
+        lines.append(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+        if len(lines) >= CHUNK_ROWS:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+def iter_csv(
+    store: SubmissionStore,
+    columns: Sequence[str] = DEFAULT_COLUMNS,
+    recommendations: bool = False,
+    status_filter: str = "ALL",
+    created_since: str = "",
+    raw: bool = False,
+) -> Iterator[str]:
+    """CSV text (header first) in chunks of about CHUNK_ROWS lines; formula-like text is escaped unless raw"""
+    cell = (lambda v: v) if raw else csv_safe
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    rec_columns = [f"rec_{f}" for f in RECOMMENDATION_FIELDS] if recommendations else []
+    writer.writerow([*columns, *rec_columns])
+
+    lines = 1
+    for row in _rows(store, columns, recommendations, status_filter, created_since):
+        values = [cell(row[c]) for c in columns]
+        if recommendations:
+            recs = row["recommendations"] or [{}]
+            for rec in recs:
+                writer.writerow(values + [cell(rec.get(f)) for f in RECOMMENDATION_FIELDS])
+            lines += len(recs)
+        else:
+            writer.writerow(values)
+            lines += 1
+        if lines >= CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            lines = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export(
+    store: SubmissionStore,
+    fmt: str = "ndjson",
+    columns: Sequence[str] = DEFAULT_COLUMNS,
+    recommendations: bool = False,
+    status_filter: str = "ALL",
+    created_since: str = "",
+    raw: bool = False,
+) -> Iterator[str]:
+    """Text chunks of the export in `fmt` ("ndjson" or "csv"); raw only affects CSV"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r} (use {' or '.join(FORMATS)})")
+    if fmt == "csv":
+        return iter_csv(store, columns, recommendations, status_filter, created_since, raw)
+    return iter_ndjson(store, columns, recommendations, status_filter, created_since)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export submissions as NDJSON or CSV")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Submissions database")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--columns", default="", help=f"Comma-separated (default: {','.join(DEFAULT_COLUMNS)})")
+    parser.add_argument("--recommendations", action="store_true", help="Include each submission's recommended programs")
+    parser.add_argument("--status", default="ALL", help="Only this status (NEW, GENERATED, IN_REVIEW, SENT, ERROR)")
+    parser.add_argument("--since", default="", help="Only submissions created at or after this ISO timestamp")
+    parser.add_argument("--raw", action="store_true", help="CSV: don't prefix formula-like cells (=, +, -, @) with '")
+    parser.add_argument("-o", "--output", default="-", help="Output file (default: stdout)")
+    args = parser.parse_args()
+
+    try:
+        columns = resolve_columns(args.columns)
+    except ValueError as e:
+        parser.error(str(e))
+
+    store = SubmissionStore(args.db)
+    chunks = export(store, args.format, columns, args.recommendations, args.status, args.since, args.raw)
+    if args.output == "-":
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            for chunk in chunks:
+                f.write(chunk)
+
+
+if __name__ == "__main__":
+    main()
@@ -321,29 +321,141 @@ class SubmissionStore:
 import os
 import sqlite3
 import json
+import atexit
+import hashlib
+import logging
+import re
 import secrets
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 
 DEFAULT_DB_PATH = "data/submissions.db"
 
+logger = logging.getLogger("saarthi.submissions")
+
+# Extra audit rows for a state change: (action, details)
+AuditRows = Sequence[Tuple[str, str]]
+
+# Columns in the full-text index, with their bm25 weights (name matches rank highest)
+FTS_COLUMNS = (("student_name", 10.0), ("student_email", 5.0), ("interests", 3.0), ("roadmap_md", 1.0))
+
+# Bulky per-submission payloads: stored zlib-compressed, read only by unpack()
+LARGE_COLUMNS = ("roadmap_md", "ui_programs_json", "ui_timeline_json", "ui_projects_json", "email_body_text")
+# Everything else - what admin_get / get_by_resume_code / get_next_pending select
+HEADER_COLUMNS = (
+    "id", "created_at", "updated_at",
+    "student_name", "student_email", "wants_email",
+    "grade", "average", "subjects_json",
+    "interests", "interest_details", "extracurriculars", "location", "preferences",
+    "status", "resume_token", "plan_id",
+    "email_subject", "sent_at",
+    "github_issue_number", "github_issue_url", "github_assignee", "github_status",
+)
+HEADER_SQL = ", ".join(HEADER_COLUMNS)
+# The generated plan - stored once per distinct content in `plans`, shared by
+# submissions through plan_id (older rows still carry their own copy inline)
+PLAN_COLUMNS = ("roadmap_md", "ui_programs_json", "ui_timeline_json", "ui_projects_json")
+LARGE_SQL = ", ".join(
+    f"COALESCE(p.{c}, s.{c}) AS {c}" if c in PLAN_COLUMNS else f"s.{c}" for c in LARGE_COLUMNS
+)
+# What iter_submissions() can return - everything but the resume token (a credential)
+EXPORT_COLUMNS = tuple(c for c in HEADER_COLUMNS if c != "resume_token") + LARGE_COLUMNS
+
+# Compressed values are BLOBs starting with this marker; TEXT values (older
+# rows, short values) are read as-is
+ZLIB_MARKER = b"z1:"
+
 
 class SubmissionStore:
+    # Connection tuning. WAL lets admin reads run alongside student writes;
+    # synchronous=NORMAL is crash-safe in WAL mode and skips an fsync per commit.
+    BUSY_TIMEOUT_SECONDS = 10.0
+    CACHE_SIZE_KIB = 16384
+    CACHED_STATEMENTS = 256
+    # Large-column values shorter than this stay plain text (not worth a zlib header)
+    COMPRESS_MIN_BYTES = 256
+    # Write-behind audit log: deferred rows are inserted in one transaction
+    # once this many are queued, or every AUDIT_FLUSH_SECONDS
+    AUDIT_BATCH_SIZE = 50
+    AUDIT_FLUSH_SECONDS = 2.0
+
     def __init__(self, db_path: str = DEFAULT_DB_PATH):
         self.db_path = db_path
+        # One connection per thread, opened on first use and reused after
+        self._local = threading.local()
+        self._audit_queue: List[Tuple[int, str, str, str, str]] = []
+        self._audit_lock = threading.Lock()
+        self._audit_wakeup = threading.Event()
+        self._audit_thread: Optional[threading.Thread] = None
+        self.fts_enabled = False  # set by _init_db (needs SQLite built with FTS5)
         self._init_db()
-        self._migrate_schema()
 
     def _conn(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        """
+        This thread's connection (opened on first use, never closed per call).
+        Transactions go through unit_of_work().
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.BUSY_TIMEOUT_SECONDS,  # busy timeout: wait for a writer instead of "database is locked"
+            check_same_thread=False,
+            cached_statements=self.CACHED_STATEMENTS,  # prepared statements reused across calls
+        )
         conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        conn.execute(f"PRAGMA cache_size=-{int(self.CACHE_SIZE_KIB)};")
+        conn.execute("PRAGMA temp_store=MEMORY;")
         return conn
 
+    @contextmanager
+    def unit_of_work(self) -> Iterator[sqlite3.Connection]:
+        """
+        One transaction for everything inside the block, including store
+        methods called from it on this thread: all of it commits together or
+        rolls back together. Nested blocks join the outer transaction.
+
+            with store.unit_of_work():
+                store.admin_mark_sent(sid, actor="ana")
+                store.log_action(sid, "ana", "NOTE", "Sent from Gmail")
+        """
+        conn = self._conn()
+        if getattr(self._local, "in_tx", False):
+            yield conn
+            return
+        self._local.in_tx = True
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._local.in_tx = False
+
+    def close(self) -> None:
+        """Close the calling thread's connection (others close when their threads exit)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            conn.close()
+
     @staticmethod
     def _now() -> str:
         return datetime.utcnow().isoformat(timespec="seconds") + "Z"
 
+    def clock(self) -> str:
+        """Current time in the store's timestamp format - the cursor to start list_queue_since() from"""
+        return self._now()
+
     # ---------- JSON helpers ----------
     @staticmethod
     def _json_default(o):
@@ -371,6 +483,28 @@ class SubmissionStore:
     def _dumps(self, obj: Any) -> str:
         return json.dumps(obj, ensure_ascii=False, default=self._json_default)
 
+    # ---------- compression helpers ----------
+    def _pack(self, text: Optional[str]) -> Any:
+        """Large-column value for storage: zlib BLOB with ZLIB_MARKER, or the text itself if short"""
+        text = text or ""
+        raw = text.encode("utf-8")
+        if len(raw) < self.COMPRESS_MIN_BYTES:
+            return text
+        return sqlite3.Binary(ZLIB_MARKER + zlib.compress(raw, 6))
+
+    def _repack(self, value: Any) -> Any:
+        return None if value is None else self._pack(self._unpack_text(value))
+
+    @staticmethod
+    def _unpack_text(value: Any) -> Optional[str]:
+        """Inverse of _pack (also reads plain TEXT from older rows)"""
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            raw = bytes(value)
+            if raw.startswith(ZLIB_MARKER):
+                raw = zlib.decompress(raw[len(ZLIB_MARKER):])
+            return raw.decode("utf-8")
+        return value
+
     @staticmethod
     def _loads(s: Optional[str], default):
         if not s:
@@ -381,110 +515,280 @@ class SubmissionStore:
             return default
 
     # ---------- schema ----------
+    # Ordered migrations; PRAGMA user_version counts how many have run. Append
+    # new steps - never reorder or change a released one. Every step must also
+    # be safe on databases created before versioning (user_version 0), which
+    # already have some or all of its changes.
+    MIGRATIONS = (
+        "_migration_1_base_tables",
+        "_migration_2_queue_indexes",
+        "_migration_3_fts",
+        "_migration_4_plans",
+        "_migration_5_recommendations",
+    )
+    SCHEMA_VERSION = len(MIGRATIONS)
+
     def _init_db(self) -> None:
+        """
+        Bring the database up to SCHEMA_VERSION. A current database costs one
+        PRAGMA read; pending steps each run in their own write transaction
+        together with the user_version bump.
+        """
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        with self._conn() as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS submissions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL,
-
-                    student_name TEXT NOT NULL,
-                    student_email TEXT,
-                    wants_email INTEGER NOT NULL DEFAULT 0,
-
-                    grade TEXT NOT NULL,
-                    average REAL NOT NULL,
-                    subjects_json TEXT NOT NULL,
-
-                    interests TEXT NOT NULL,
-                    interest_details TEXT,
-                    extracurriculars TEXT,
-                    location TEXT,
-                    preferences TEXT,
-
-                    status TEXT NOT NULL DEFAULT 'NEW',  -- NEW -> GENERATED -> IN_REVIEW -> SENT / ERROR
-                    resume_token TEXT NOT NULL,
-
-                    roadmap_md TEXT,
-
-                    ui_programs_json TEXT,
-                    ui_timeline_json TEXT,
-                    ui_projects_json TEXT,
-
-                    email_subject TEXT,
-                    email_body_text TEXT,
-                    sent_at TEXT,
-
-                    github_issue_number INTEGER,
-                    github_issue_url TEXT,
-                    github_assignee TEXT,
-                    github_status TEXT
-                );
-                """
-            )
-
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_status ON submissions(status);")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_token ON submissions(resume_token);")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_wants_email ON submissions(wants_email);")
+        conn = self._conn()
+        version = self._schema_version(conn)
+        for step in range(version, self.SCHEMA_VERSION):
+            with self.unit_of_work():
+                conn.execute("BEGIN IMMEDIATE;")
+                # Another process may have run this step while we waited for the lock
+                if self._schema_version(conn) > step:
+                    continue
+                getattr(self, self.MIGRATIONS[step])(conn)
+                conn.execute(f"PRAGMA user_version={step + 1};")
+            logger.info(f"Submissions DB migrated to schema version {step + 1} ({self.MIGRATIONS[step]})")
+
+        self.fts_enabled = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='submissions_fts'"
+        ).fetchone() is not None
 
-            # actions log
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS submission_actions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    submission_id INTEGER NOT NULL,
-                    created_at TEXT NOT NULL,
-                    actor TEXT NOT NULL,
-                    action TEXT NOT NULL,
-                    details TEXT,
-                    FOREIGN KEY(submission_id) REFERENCES submissions(id)
-                );
-                """
-            )
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_actions_sub ON submission_actions(submission_id);")
+    @staticmethod
+    def _schema_version(conn: sqlite3.Connection) -> int:
+        return int(conn.execute("PRAGMA user_version;").fetchone()[0])
 
     def _has_column(self, conn: sqlite3.Connection, table: str, col: str) -> bool:
         rows = conn.execute(f"PRAGMA table_info({table});").fetchall()
         cols = {r["name"] for r in rows}
         return col in cols
 
-    def _migrate_schema(self) -> None:
+    def _migration_1_base_tables(self, conn: sqlite3.Connection) -> None:
+        """Submissions + actions log; columns added over time are filled in on older DBs"""
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS submissions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+
+                student_name TEXT NOT NULL,
+                student_email TEXT,
+                wants_email INTEGER NOT NULL DEFAULT 0,
+
+                grade TEXT NOT NULL,
+                average REAL NOT NULL,
+                subjects_json TEXT NOT NULL,
+
+                interests TEXT NOT NULL,
+                interest_details TEXT,
+                extracurriculars TEXT,
+                location TEXT,
+                preferences TEXT,
+
+                status TEXT NOT NULL DEFAULT 'NEW',  -- NEW -> GENERATED -> IN_REVIEW -> SENT / ERROR
+                resume_token TEXT NOT NULL,
+
+                roadmap_md TEXT,
+
+                ui_programs_json TEXT,
+                ui_timeline_json TEXT,
+                ui_projects_json TEXT,
+
+                email_subject TEXT,
+                email_body_text TEXT,
+                sent_at TEXT,
+
+                github_issue_number INTEGER,
+                github_issue_url TEXT,
+                github_assignee TEXT,
+                github_status TEXT
+            );
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_status ON submissions(status);")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_token ON submissions(resume_token);")
+
+        # submissions additions (pre-versioning DBs)
+        needed_cols = [
+            ("interest_details", "TEXT"),
+            ("ui_timeline_json", "TEXT"),
+            ("ui_projects_json", "TEXT"),
+            ("github_issue_number", "INTEGER"),
+            ("github_issue_url", "TEXT"),
+            ("github_assignee", "TEXT"),
+            ("github_status", "TEXT"),
+        ]
+        for col, coltype in needed_cols:
+            if not self._has_column(conn, "submissions", col):
+                conn.execute(f"ALTER TABLE submissions ADD COLUMN {col} {coltype};")
+
+        # actions log
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS submission_actions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                submission_id INTEGER NOT NULL,
+                created_at TEXT NOT NULL,
+                actor TEXT NOT NULL,
+                action TEXT NOT NULL,
+                details TEXT,
+                FOREIGN KEY(submission_id) REFERENCES submissions(id)
+            );
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_actions_sub_id ON submission_actions(submission_id, id);")
+        # Leading column of idx_actions_sub_id - redundant
+        conn.execute("DROP INDEX IF EXISTS idx_actions_sub;")
+
+    def _migration_2_queue_indexes(self, conn: sqlite3.Connection) -> None:
+        # Admin queue: (wants_email[, status]) filter + newest-first keyset order,
+        # carrying the listed columns so queue pages are served from the index alone
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_queue ON submissions("
+            "wants_email, created_at, id, status, student_name, student_email);"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_queue_status ON submissions("
+            "wants_email, status, created_at, id, student_name, student_email);"
+        )
+        # Delta polling: rows changed since a cursor (list_queue_since)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_queue_updated ON submissions(wants_email, updated_at, id);")
+        # Leading columns of idx_queue - redundant now
+        conn.execute("DROP INDEX IF EXISTS idx_wants_email;")
+
+    def _migration_3_fts(self, conn: sqlite3.Connection) -> None:
+        self._init_fts(conn)
+
+    def _migration_4_plans(self, conn: sqlite3.Connection) -> None:
+        self._init_plans(conn)
+        if not self._has_column(conn, "submissions", "plan_id"):
+            conn.execute("ALTER TABLE submissions ADD COLUMN plan_id INTEGER REFERENCES plans(id);")
+
+    def _migration_5_recommendations(self, conn: sqlite3.Connection) -> None:
         """
-        Safe auto-migrations for older DBs.
+        One row per recommended program per submission, so analytics run in
+        SQL instead of parsing ui_programs_json. Existing plans are backfilled.
         """
-        with self._conn() as conn:
-            # submissions additions
-            needed_cols = [
-                ("interest_details", "TEXT"),
-                ("ui_timeline_json", "TEXT"),
-                ("ui_projects_json", "TEXT"),
-                ("github_issue_number", "INTEGER"),
-                ("github_issue_url", "TEXT"),
-                ("github_assignee", "TEXT"),
-                ("github_status", "TEXT"),
-            ]
-            for col, coltype in needed_cols:
-                if not self._has_column(conn, "submissions", col):
-                    conn.execute(f"ALTER TABLE submissions ADD COLUMN {col} {coltype};")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS recommendations (
+                submission_id INTEGER NOT NULL REFERENCES submissions(id),
+                rank INTEGER NOT NULL,          -- 1 = best match
+                created_at TEXT NOT NULL,       -- the submission's created_at
+                program_key TEXT NOT NULL,      -- program_id, else URL, else "name @ university"
+                program_id TEXT,
+                program_url TEXT,
+                program_name TEXT,
+                university_name TEXT,
+                match_percent INTEGER,
+                grade_assessment TEXT,
+                PRIMARY KEY (submission_id, rank)
+            ) WITHOUT ROWID;
+            """
+        )
+        # Period aggregates (top_recommended_programs) read only this index
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_recs_period ON recommendations("
+            "created_at, program_key, match_percent, rank);"
+        )
+        # One program over time (recommendation_trend); also covers whole-history
+        # aggregates, where walking it in program order saves the GROUP BY sort
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_recs_program ON recommendations("
+            "program_key, created_at, match_percent, rank);"
+        )
+        self._backfill_recommendations(conn)
+
+    def _init_plans(self, conn: sqlite3.Connection) -> None:
+        """
+        Generated plans, one row per distinct content (content_hash). Also
+        records the profile fingerprint and catalog version it was generated
+        for, so an identical profile can reuse it (find_fresh_plan).
+        """
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS plans (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content_hash TEXT NOT NULL UNIQUE,
+                created_at TEXT NOT NULL,
+                profile_fingerprint TEXT NOT NULL DEFAULT '',
+                catalog_version TEXT NOT NULL DEFAULT '',
 
-            # ensure actions table exists (older db may not have it)
+                roadmap_md TEXT,
+                ui_programs_json TEXT,
+                ui_timeline_json TEXT,
+                ui_projects_json TEXT
+            );
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_plans_profile ON plans(profile_fingerprint, catalog_version, created_at);"
+        )
+
+    def _init_fts(self, conn: sqlite3.Connection) -> None:
+        """
+        FTS5 index over name/email/interests/roadmap. It is a standalone table
+        written by the store (_fts_index), not triggers: roadmap_md is stored
+        compressed, so SQL alone can't read its text. Older trigger-based
+        (external-content) indexes are replaced, and the index is built from
+        existing rows whenever it is (re)created.
+        """
+        cols = ", ".join(c for c, _ in FTS_COLUMNS)
+        existing = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type='table' AND name='submissions_fts'"
+        ).fetchone()
+        if existing and "content=" in (existing["sql"] or ""):
+            for trigger in ("submissions_fts_ai", "submissions_fts_ad", "submissions_fts_au"):
+                conn.execute(f"DROP TRIGGER IF EXISTS {trigger};")
+            conn.execute("DROP TABLE submissions_fts;")
+            existing = None
+        try:
             conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS submission_actions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    submission_id INTEGER NOT NULL,
-                    created_at TEXT NOT NULL,
-                    actor TEXT NOT NULL,
-                    action TEXT NOT NULL,
-                    details TEXT,
-                    FOREIGN KEY(submission_id) REFERENCES submissions(id)
+                f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS submissions_fts USING fts5(
+                    {cols},
+                    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
                 );
                 """
             )
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_actions_sub ON submission_actions(submission_id);")
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 unavailable ({e}) - queue search falls back to LIKE")
+            return
+        self.fts_enabled = True
+
+        if not existing:
+            rows = conn.execute(
+                "SELECT id, student_name, student_email, interests, roadmap_md FROM submissions"
+            ).fetchall()
+            conn.executemany(
+                f"INSERT INTO submissions_fts(rowid, {cols}) VALUES (?, ?, ?, ?, ?)",
+                [(r[0], r[1], r[2], r[3], self._unpack_text(r[4]) or "") for r in rows],
+            )
+
+    def _fts_index(self, conn: sqlite3.Connection, submission_id: int, roadmap_md: str = "") -> None:
+        """(Re)index one submission from its current row plus the plain-text roadmap"""
+        if not self.fts_enabled:
+            return
+        cols = ", ".join(c for c, _ in FTS_COLUMNS)
+        conn.execute("DELETE FROM submissions_fts WHERE rowid=?", (int(submission_id),))
+        conn.execute(
+            f"""
+            INSERT INTO submissions_fts(rowid, {cols})
+            SELECT id, student_name, student_email, interests, ? FROM submissions WHERE id=?
+            """,
+            (roadmap_md or "", int(submission_id)),
+        )
+
+    @staticmethod
+    def _fts_query(query: str, columns: Sequence[str] = ()) -> str:
+        """
+        User text -> FTS5 MATCH expression: every word must match, each as a
+        prefix ("ana smi" finds "Ana Smith"). Words are quoted, so FTS
+        syntax characters in the input are treated as text.
+        """
+        words = [w.replace('"', '""') for w in re.findall(r"\S+", query or "")]
+        expr = " ".join(f'"{w}"*' for w in words)
+        if columns and expr:
+            expr = "{" + " ".join(columns) + "}: (" + expr + ")"
+        return expr
 
     # ----------------- Student flow -----------------
     def create_submission(self, payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -495,7 +799,7 @@ class SubmissionStore:
         if not isinstance(subjects, list):
             subjects = [str(subjects)]
 
-        with self._conn() as conn:
+        with self.unit_of_work() as conn:
             cur = conn.execute(
                 """
                 INSERT INTO submissions (
@@ -527,12 +831,8 @@ class SubmissionStore:
                 ),
             )
             new_id = cur.lastrowid
-
-        # log
-        try:
-            self.log_action(int(new_id), "student", "SUBMITTED", "Created submission")
-        except Exception:
-            pass
+            self._fts_index(conn, int(new_id))
+            self._insert_actions(conn, int(new_id), "student", [("SUBMITTED", "Created submission")])
 
         return {"id": int(new_id), "resume_token": resume_token}
 
@@ -544,68 +844,226 @@ class SubmissionStore:
         ui_timeline: List[Dict[str, Any]],
         ui_projects: List[Dict[str, Any]],
         actor: str = "system",
-    ) -> None:
+        audit: AuditRows = (),
+        profile_fingerprint: str = "",
+        catalog_version: str = "",
+    ) -> int:
+        """
+        Status -> GENERATED. The plan goes to `plans` (an identical plan
+        already stored is shared, not copied) and the submission points at it;
+        returns the plan id. Pass the profile fingerprint and catalog version
+        to make the plan reusable via find_fresh_plan().
+        """
         now = self._now()
-        with self._conn() as conn:
+        texts = (
+            roadmap_md or "",
+            self._dumps(ui_programs or []),
+            self._dumps(ui_timeline or []),
+            self._dumps(ui_projects or []),
+        )
+        with self.unit_of_work() as conn:
+            plan_id = self._store_plan(conn, texts, profile_fingerprint, catalog_version)
             conn.execute(
-                """
+                f"""
                 UPDATE submissions
                 SET updated_at=?,
                     status='GENERATED',
-                    roadmap_md=?,
-                    ui_programs_json=?,
-                    ui_timeline_json=?,
-                    ui_projects_json=?
+                    plan_id=?,
+                    {', '.join(f'{c}=NULL' for c in PLAN_COLUMNS)}
                 WHERE id=?
                 """,
-                (
-                    now,
-                    roadmap_md or "",
-                    self._dumps(ui_programs or []),
-                    self._dumps(ui_timeline or []),
-                    self._dumps(ui_projects or []),
-                    int(submission_id),
-                ),
+                (now, plan_id, int(submission_id)),
             )
+            self._write_recommendations(conn, int(submission_id), ui_programs)
+            self._fts_index(conn, int(submission_id), roadmap_md)
+            self._insert_actions(
+                conn, int(submission_id), actor or "system",
+                [("GENERATED_PLAN", f"Stored generated plan #{plan_id}"), *audit],
+            )
+        return plan_id
 
-        try:
-            self.log_action(int(submission_id), actor or "system", "GENERATED_PLAN", "Stored generated plan")
-        except Exception:
-            pass
+    def _store_plan(
+        self,
+        conn: sqlite3.Connection,
+        texts: Sequence[str],
+        profile_fingerprint: str = "",
+        catalog_version: str = "",
+    ) -> int:
+        """Id of the plan with this content (PLAN_COLUMNS order), inserting it if new"""
+        content_hash = hashlib.sha256("\x1f".join(texts).encode("utf-8")).hexdigest()
+        row = conn.execute("SELECT id FROM plans WHERE content_hash=?", (content_hash,)).fetchone()
+        if row:
+            return int(row["id"])
+        cur = conn.execute(
+            f"""
+            INSERT INTO plans (content_hash, created_at, profile_fingerprint, catalog_version, {', '.join(PLAN_COLUMNS)})
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (content_hash, self._now(), profile_fingerprint or "", catalog_version or "",
+             *[self._pack(t) for t in texts]),
+        )
+        return int(cur.lastrowid)
+
+    @staticmethod
+    def _recommendation_rows(submission_id: int, created_at: str, ui_programs: Any) -> List[Tuple[Any, ...]]:
+        rows = []
+        for rank, p in enumerate(ui_programs if isinstance(ui_programs, list) else [], start=1):
+            if not isinstance(p, dict):
+                continue
+            program_id = str(p.get("program_id") or "")
+            program_url = str(p.get("program_url") or "")
+            name, university = str(p.get("program_name") or ""), str(p.get("university_name") or "")
+            key = program_id or program_url or f"{name} @ {university}"
+            try:
+                match = int(p["match_percent"]) if p.get("match_percent") is not None else None
+            except (TypeError, ValueError):
+                match = None
+            rows.append((submission_id, rank, created_at, key, program_id, program_url, name, university,
+                         match, p.get("grade_assessment")))
+        return rows
+
+    def _write_recommendations(self, conn: sqlite3.Connection, submission_id: int, ui_programs: Any) -> None:
+        """Replace a submission's recommendation rows with `ui_programs` (best match first)"""
+        row = conn.execute("SELECT created_at FROM submissions WHERE id=?", (submission_id,)).fetchone()
+        conn.execute("DELETE FROM recommendations WHERE submission_id=?", (submission_id,))
+        if row:
+            conn.executemany(
+                """
+                INSERT INTO recommendations (
+                    submission_id, rank, created_at, program_key, program_id, program_url,
+                    program_name, university_name, match_percent, grade_assessment
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                self._recommendation_rows(submission_id, row["created_at"], ui_programs),
+            )
+
+    def find_fresh_plan(
+        self, profile_fingerprint: str, catalog_version: str, max_age_hours: float
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Newest plan generated for this profile fingerprint against this
+        catalog version within the last max_age_hours, decoded like unpack()
+        ({id, created_at, roadmap_md, ui_programs, ui_timeline, ui_projects}),
+        or None.
+        """
+        if not profile_fingerprint or max_age_hours <= 0:
+            return None
+        cutoff = (datetime.utcnow() - timedelta(hours=max_age_hours)).isoformat(timespec="seconds") + "Z"
+        with self.unit_of_work() as conn:
+            row = conn.execute(
+                f"""
+                SELECT id, created_at, {', '.join(PLAN_COLUMNS)}
+                FROM plans
+                WHERE profile_fingerprint=? AND catalog_version=? AND created_at >= ?
+                ORDER BY created_at DESC
+                LIMIT 1
+                """,
+                (profile_fingerprint, catalog_version or "", cutoff),
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "id": int(row["id"]),
+            "created_at": row["created_at"],
+            "roadmap_md": self._unpack_text(row["roadmap_md"]) or "",
+            "ui_programs": self._loads(self._unpack_text(row["ui_programs_json"]), []),
+            "ui_timeline": self._loads(self._unpack_text(row["ui_timeline_json"]), []),
+            "ui_projects": self._loads(self._unpack_text(row["ui_projects_json"]), []),
+        }
 
     def get_by_resume_code(self, submission_id: int, token: str) -> Optional[Dict[str, Any]]:
-        with self._conn() as conn:
+        with self.unit_of_work() as conn:
             row = conn.execute(
-                "SELECT * FROM submissions WHERE id=? AND resume_token=?",
+                f"SELECT {HEADER_SQL} FROM submissions WHERE id=? AND resume_token=?",
                 (int(submission_id), token),
             ).fetchone()
         return dict(row) if row else None
 
+    def _load_large(self, submission_id: int) -> Dict[str, Optional[str]]:
+        with self.unit_of_work() as conn:
+            row = conn.execute(
+                f"SELECT {LARGE_SQL} FROM submissions s LEFT JOIN plans p ON p.id = s.plan_id WHERE s.id=?",
+                (int(submission_id),),
+            ).fetchone()
+        return {c: self._unpack_text(row[c]) if row else None for c in LARGE_COLUMNS}
+
     def unpack(self, sub: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Header row -> full submission: loads and decompresses the large
+        columns (roadmap and UI JSON from the linked plan, email body) and
+        decodes the JSON fields.
+        """
         out = dict(sub)
-        out["subjects"] = self._loads(sub.get("subjects_json"), [])
-        out["ui_programs"] = self._loads(sub.get("ui_programs_json"), [])
-        out["ui_timeline"] = self._loads(sub.get("ui_timeline_json"), [])
-        out["ui_projects"] = self._loads(sub.get("ui_projects_json"), [])
+        missing = [c for c in LARGE_COLUMNS if c not in out]
+        if missing and out.get("id") is not None:
+            out.update({c: v for c, v in self._load_large(int(out["id"])).items() if c in missing})
+        for c in LARGE_COLUMNS:
+            out[c] = self._unpack_text(out.get(c))
+        out["subjects"] = self._loads(out.get("subjects_json"), [])
+        out["ui_programs"] = self._loads(out.get("ui_programs_json"), [])
+        out["ui_timeline"] = self._loads(out.get("ui_timeline_json"), [])
+        out["ui_projects"] = self._loads(out.get("ui_projects_json"), [])
         return out
 
     # ----------------- Admin flow -----------------
-    def list_queue(self, status_filter: str = "ALL", query: str = "", limit: int = 200) -> List[Dict[str, Any]]:
+    def list_queue(
+        self,
+        status_filter: str = "ALL",
+        query: str = "",
+        limit: int = 200,
+        after_id: Optional[int] = None,
+        before_created_at: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
         """
+        Newest first, ordered by (created_at, id).
         status_filter: "ALL" | "GENERATED" | "IN_REVIEW" | "SENT" | "NEW"
-        query: searches name/email
+        query: searches name/email (word-prefix match via the FTS index, substring LIKE without it)
+        Keyset pagination: pass the last row's id as after_id (optionally with
+        its created_at as before_created_at) to get the next page; each page
+        is an index seek, however deep. before_created_at alone returns rows
+        created strictly before that time.
         """
         status_filter = (status_filter or "ALL").strip().upper()
         query = (query or "").strip()
+        cursor = (after_id, before_created_at)
 
+        if query and self.fts_enabled:
+            try:
+                return self._list_queue(status_filter, query, limit, cursor, fts=True)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"FTS queue search failed ({e}) - using LIKE")
+        return self._list_queue(status_filter, query, limit, cursor, fts=False)
+
+    def _list_queue(
+        self,
+        status_filter: str,
+        query: str,
+        limit: int,
+        cursor: Tuple[Optional[int], Optional[str]],
+        fts: bool,
+    ) -> List[Dict[str, Any]]:
         where = ["wants_email=1"]
         params: List[Any] = []
 
+        after_id, before_created_at = cursor
+        if after_id is not None and before_created_at:
+            where.append("(created_at, id) < (?, ?)")
+            params.extend([before_created_at, int(after_id)])
+        elif after_id is not None:
+            where.append("(created_at, id) < ((SELECT created_at FROM submissions WHERE id=?), ?)")
+            params.extend([int(after_id), int(after_id)])
+        elif before_created_at:
+            where.append("created_at < ?")
+            params.append(before_created_at)
+
         if status_filter != "ALL":
             where.append("status=?")
             params.append(status_filter)
 
-        if query:
+        if query and fts:
+            where.append("id IN (SELECT rowid FROM submissions_fts WHERE submissions_fts MATCH ?)")
+            params.append(self._fts_query(query, ("student_name", "student_email")))
+        elif query:
             where.append("(student_name LIKE ? OR student_email LIKE ?)")
             params.extend([f"%{query}%", f"%{query}%"])
 
@@ -613,20 +1071,131 @@ class SubmissionStore:
             SELECT id, created_at, student_name, student_email, wants_email, status
             FROM submissions
             WHERE {' AND '.join(where)}
-            ORDER BY created_at DESC
+            ORDER BY created_at DESC, id DESC
             LIMIT ?
         """
         params.append(int(limit))
 
-        with self._conn() as conn:
+        with self.unit_of_work() as conn:
             rows = conn.execute(sql, params).fetchall()
         return [dict(r) for r in rows]
 
+    def list_queue_since(self, updated_since: str, limit: int = 500) -> List[Dict[str, Any]]:
+        """
+        Queue rows (any status) created or changed at or after `updated_since`,
+        oldest change first. updated_at has one-second resolution, so the
+        boundary second is included; callers merge by id. Pass the largest
+        updated_at seen as the next cursor.
+        """
+        with self.unit_of_work() as conn:
+            rows = conn.execute(
+                """
+                SELECT id, created_at, updated_at, student_name, student_email, wants_email, status
+                FROM submissions
+                WHERE wants_email=1 AND updated_at >= ?
+                ORDER BY updated_at ASC, id ASC
+                LIMIT ?
+                """,
+                (updated_since or "", int(limit)),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def iter_submissions(
+        self,
+        columns: Sequence[str] = EXPORT_COLUMNS,
+        status_filter: str = "ALL",
+        created_since: str = "",
+        batch_size: int = 500,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Every submission (oldest first) as a dict of `columns`, large ones
+        decompressed, read `batch_size` rows at a time - memory stays flat
+        however many rows there are. Uses its own connection, so the whole
+        export sees one snapshot without blocking writers (WAL). Unknown
+        columns raise ValueError before anything is read.
+        """
+        unknown = [c for c in columns if c not in EXPORT_COLUMNS]
+        if unknown or not columns:
+            raise ValueError(f"Unknown export columns: {', '.join(unknown) or '(none given)'}")
+        select = ", ".join(
+            f"COALESCE(p.{c}, s.{c}) AS {c}" if c in PLAN_COLUMNS else f"s.{c}" for c in columns
+        )
+        join = "LEFT JOIN plans p ON p.id = s.plan_id" if any(c in PLAN_COLUMNS for c in columns) else ""
+
+        where: List[str] = []
+        params: List[Any] = []
+        status_filter = (status_filter or "ALL").strip().upper()
+        if status_filter != "ALL":
+            where.append("s.status=?")
+            params.append(status_filter)
+        if created_since:
+            where.append("s.created_at >= ?")
+            params.append(created_since)
+
+        sql = f"""
+            SELECT {select}
+            FROM submissions s {join}
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+            ORDER BY s.id
+        """
+        large = [c for c in columns if c in LARGE_COLUMNS]
+        conn = self._connect()
+        try:
+            cur = conn.execute(sql, params)
+            while True:
+                rows = cur.fetchmany(int(batch_size))
+                if not rows:
+                    break
+                for r in rows:
+                    row = dict(r)
+                    for c in large:
+                        row[c] = self._unpack_text(row[c])
+                    yield row
+        finally:
+            conn.close()
+
+    def search_submissions(self, query: str, status_filter: str = "ALL", limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Full-text search over name, email, interests and roadmap content,
+        best matches first (bm25). Each hit has a `snippet` of the roadmap or
+        interests around the match. Empty list without FTS5 or query.
+        """
+        match = self._fts_query(query)
+        if not match or not self.fts_enabled:
+            return []
+        status_filter = (status_filter or "ALL").strip().upper()
+        weights = ", ".join(str(w) for _, w in FTS_COLUMNS)
+
+        where = ["submissions_fts MATCH ?"]
+        params: List[Any] = [match]
+        if status_filter != "ALL":
+            where.append("s.status=?")
+            params.append(status_filter)
+        params.append(int(limit))
+
+        sql = f"""
+            SELECT s.id, s.created_at, s.student_name, s.student_email, s.wants_email, s.status,
+                   bm25(submissions_fts, {weights}) AS rank,
+                   snippet(submissions_fts, -1, '[', ']', '…', 12) AS snippet
+            FROM submissions_fts
+            JOIN submissions s ON s.id = submissions_fts.rowid
+            WHERE {' AND '.join(where)}
+            ORDER BY rank
+            LIMIT ?
+        """
+        try:
+            with self.unit_of_work() as conn:
+                rows = conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Submission search failed for {query!r}: {e}")
+            return []
+        return [dict(r) for r in rows]
+
     def get_next_pending(self) -> Optional[Dict[str, Any]]:
-        with self._conn() as conn:
+        with self.unit_of_work() as conn:
             row = conn.execute(
-                """
-                SELECT * FROM submissions
+                f"""
+                SELECT {HEADER_SQL} FROM submissions
                 WHERE wants_email=1 AND status IN ('GENERATED','NEW','IN_REVIEW')
                 ORDER BY
                     CASE status
@@ -642,13 +1211,21 @@ class SubmissionStore:
         return dict(row) if row else None
 
     def admin_get(self, submission_id: int) -> Optional[Dict[str, Any]]:
-        with self._conn() as conn:
-            row = conn.execute("SELECT * FROM submissions WHERE id=?", (int(submission_id),)).fetchone()
+        with self.unit_of_work() as conn:
+            row = conn.execute(f"SELECT {HEADER_SQL} FROM submissions WHERE id=?", (int(submission_id),)).fetchone()
         return dict(row) if row else None
 
-    def admin_save_email(self, submission_id: int, subject: str, body_text: str, actor: str = "admin") -> None:
+    def admin_save_email(
+        self,
+        submission_id: int,
+        subject: str,
+        body_text: str,
+        actor: str = "admin",
+        audit: AuditRows = (),
+    ) -> None:
+        """Status -> IN_REVIEW; the update and its audit rows (SAVED_EMAIL + `audit`) commit together"""
         now = self._now()
-        with self._conn() as conn:
+        with self.unit_of_work() as conn:
             conn.execute(
                 """
                 UPDATE submissions
@@ -658,13 +1235,16 @@ class SubmissionStore:
                     email_body_text=?
                 WHERE id=?
                 """,
-                (now, subject or "", body_text or "", int(submission_id)),
+                (now, subject or "", self._pack(body_text), int(submission_id)),
+            )
+            self._insert_actions(
+                conn, int(submission_id), actor or "admin", [("SAVED_EMAIL", "Saved email draft"), *audit]
             )
-        self.log_action(int(submission_id), actor or "admin", "SAVED_EMAIL", "Saved email draft")
 
-    def admin_mark_sent(self, submission_id: int, actor: str = "admin") -> None:
+    def admin_mark_sent(self, submission_id: int, actor: str = "admin", audit: AuditRows = ()) -> None:
+        """Status -> SENT; the update and its audit rows (MARKED_SENT + `audit`) commit together"""
         now = self._now()
-        with self._conn() as conn:
+        with self.unit_of_work() as conn:
             conn.execute(
                 """
                 UPDATE submissions
@@ -675,7 +1255,7 @@ class SubmissionStore:
                 """,
                 (now, now, int(submission_id)),
             )
-        self.log_action(int(submission_id), actor or "admin", "MARKED_SENT", "Marked sent")
+            self._insert_actions(conn, int(submission_id), actor or "admin", [("MARKED_SENT", "Marked sent"), *audit])
 
     # ----------------- GitHub issue helpers -----------------
     def set_github_issue(
@@ -687,7 +1267,7 @@ class SubmissionStore:
         github_status: str,
     ) -> None:
         now = self._now()
-        with self._conn() as conn:
+        with self.unit_of_work() as conn:
             conn.execute(
                 """
                 UPDATE submissions
@@ -700,11 +1280,17 @@ class SubmissionStore:
                 """,
                 (now, int(issue_number), issue_url or "", assignee or "", github_status or "", int(submission_id)),
             )
-        self.log_action(int(submission_id), "system", "GITHUB_ISSUE_SET", f"Issue #{issue_number} {github_status}")
+            self._insert_actions(
+                conn, int(submission_id), "system", [("GITHUB_ISSUE_SET", f"Issue #{issue_number} {github_status}")]
+            )
 
-    def set_github_status(self, submission_id: int, github_status: str) -> None:
+    def set_github_status(self, submission_id: int, github_status: str, defer_audit: bool = True) -> None:
+        """
+        Mirror of the GitHub label - the audit row is non-critical, so by
+        default it goes through the write-behind queue.
+        """
         now = self._now()
-        with self._conn() as conn:
+        with self.unit_of_work() as conn:
             conn.execute(
                 """
                 UPDATE submissions
@@ -714,30 +1300,332 @@ class SubmissionStore:
                 """,
                 (now, github_status or "", int(submission_id)),
             )
-        self.log_action(int(submission_id), "system", "GITHUB_STATUS", github_status or "")
+        self.log_action(int(submission_id), "system", "GITHUB_STATUS", github_status or "", defer=defer_audit)
 
-    # ----------------- actions -----------------
-    def log_action(self, submission_id: int, actor: str, action: str, details: str = "") -> None:
-        now = self._now()
-        with self._conn() as conn:
-            conn.execute(
+    # ----------------- recommendation analytics -----------------
+    def top_recommended_programs(
+        self, since: str = "", until: str = "", limit: int = 20, max_rank: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Most often recommended programs for submissions created in
+        [since, until) (ISO timestamps or prefixes like "2025-09"; empty = open).
+        max_rank > 0 counts only that many top matches per submission.
+        Each item: program_key, program_id, program_name, university_name,
+        program_url, times, avg_match_percent, avg_rank, top3.
+        """
+        where = ["created_at >= ?"]
+        params: List[Any] = [since or ""]
+        if until:
+            where.append("created_at < ?")
+            params.append(until)
+        if max_rank > 0:
+            where.append("rank <= ?")
+            params.append(int(max_rank))
+        params.append(int(limit))
+        with self.unit_of_work() as conn:
+            # Counting reads one covering index; names are looked up for the winners alone
+            top = conn.execute(
+                f"""
+                SELECT program_key,
+                       COUNT(*) AS times,
+                       ROUND(AVG(match_percent), 1) AS avg_match_percent,
+                       ROUND(AVG(rank), 2) AS avg_rank,
+                       SUM(rank <= 3) AS top3
+                FROM recommendations
+                WHERE {' AND '.join(where)}
+                GROUP BY program_key
+                ORDER BY times DESC, avg_rank ASC
+                LIMIT ?
+                """,
+                params,
+            ).fetchall()
+            keys = [r["program_key"] for r in top]
+            # Bare columns next to MAX() come from the newest row of each program
+            names = {
+                r["program_key"]: r for r in conn.execute(
+                    f"""
+                    SELECT program_key, program_id, program_name, university_name, program_url, MAX(created_at)
+                    FROM recommendations
+                    WHERE program_key IN ({', '.join('?' * len(keys))})
+                    GROUP BY program_key
+                    """,
+                    keys,
+                ).fetchall()
+            } if keys else {}
+        out = []
+        for r in top:
+            info = names.get(r["program_key"])
+            out.append({
+                **dict(r),
+                **{c: info[c] if info else "" for c in ("program_id", "program_name", "university_name", "program_url")},
+            })
+        return out
+
+    def recommendation_trend(self, program_key: str, since: str = "") -> List[Dict[str, Any]]:
+        """Per month (YYYY-MM): how often a program was recommended and its average match"""
+        with self.unit_of_work() as conn:
+            rows = conn.execute(
                 """
-                INSERT INTO submission_actions (submission_id, created_at, actor, action, details)
-                VALUES (?, ?, ?, ?, ?)
+                SELECT substr(created_at, 1, 7) AS month,
+                       COUNT(*) AS times,
+                       ROUND(AVG(match_percent), 1) AS avg_match_percent,
+                       ROUND(AVG(rank), 2) AS avg_rank
+                FROM recommendations
+                WHERE program_key = ? AND created_at >= ?
+                GROUP BY month
+                ORDER BY month
                 """,
-                (int(submission_id), now, actor or "system", action or "ACTION", details or ""),
-            )
+                (program_key, since or ""),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    # ----------------- storage maintenance -----------------
+    def compress_existing(self, batch_size: int = 200, vacuum: bool = False) -> int:
+        """
+        Compress large columns still stored as plain text (rows written before
+        compression). Runs in batches of short transactions; returns rows
+        rewritten. vacuum=True then shrinks the file (slow; locks the DB).
+        """
+        text_check = " OR ".join(
+            f"(typeof({c})='text' AND length(CAST({c} AS BLOB)) >= ?)" for c in LARGE_COLUMNS
+        )
+        total = 0
+        last_id = 0
+        while True:
+            with self.unit_of_work() as conn:
+                rows = conn.execute(
+                    f"""
+                    SELECT id, {', '.join(LARGE_COLUMNS)} FROM submissions
+                    WHERE id > ? AND ({text_check})
+                    ORDER BY id LIMIT ?
+                    """,
+                    (last_id, *[self.COMPRESS_MIN_BYTES] * len(LARGE_COLUMNS), int(batch_size)),
+                ).fetchall()
+                if not rows:
+                    break
+                conn.executemany(
+                    f"UPDATE submissions SET {', '.join(f'{c}=?' for c in LARGE_COLUMNS)} WHERE id=?",
+                    [(*[self._repack(r[c]) for c in LARGE_COLUMNS], r["id"]) for r in rows],
+                )
+            total += len(rows)
+            last_id = rows[-1]["id"]
+        if vacuum:
+            self._conn().execute("VACUUM;")
+        return total
+
+    def backfill_recommendations(self, batch_size: int = 200) -> int:
+        """
+        Write recommendation rows for generated submissions that have none
+        (the schema migration does this once; rerun after importing old rows).
+        Batches of short transactions; returns submissions filled in.
+        """
+        total, last_id = 0, 0
+        while True:
+            with self.unit_of_work() as conn:
+                filled, last_id = self._backfill_recommendations(conn, last_id, batch_size)
+            if last_id is None:
+                return total
+            total += filled
+
+    def _backfill_recommendations(
+        self, conn: sqlite3.Connection, after_id: int = 0, batch_size: int = 0
+    ) -> Tuple[int, Optional[int]]:
+        """
+        Recommendation rows for submissions after `after_id` that lack them
+        (all such rows if batch_size is 0). Returns (submissions filled, last id
+        scanned), last id None once nothing is left.
+        """
+        rows = conn.execute(
+            f"""
+            SELECT s.id, s.created_at, COALESCE(p.ui_programs_json, s.ui_programs_json) AS ui_programs_json
+            FROM submissions s LEFT JOIN plans p ON p.id = s.plan_id
+            WHERE s.id > ?
+              AND COALESCE(p.ui_programs_json, s.ui_programs_json) IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM recommendations r WHERE r.submission_id = s.id)
+            ORDER BY s.id
+            {'LIMIT ?' if batch_size else ''}
+            """,
+            (int(after_id), int(batch_size)) if batch_size else (int(after_id),),
+        ).fetchall()
+        if not rows:
+            return 0, None
+        recs = []
+        for r in rows:
+            programs = self._loads(self._unpack_text(r["ui_programs_json"]), [])
+            recs.extend(self._recommendation_rows(int(r["id"]), r["created_at"], programs))
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO recommendations (
+                submission_id, rank, created_at, program_key, program_id, program_url,
+                program_name, university_name, match_percent, grade_assessment
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            recs,
+        )
+        return len({rec[0] for rec in recs}), int(rows[-1]["id"])
+
+    def dedupe_plans(self, batch_size: int = 200, vacuum: bool = False) -> int:
+        """
+        Move plans still stored inline on submissions (rows written before the
+        plans table) into `plans`, sharing identical ones. Such plans have no
+        fingerprint, so they are never reused for generation. Returns rows
+        moved; vacuum=True then shrinks the file.
+        """
+        total = 0
+        while True:
+            with self.unit_of_work() as conn:
+                rows = conn.execute(
+                    f"""
+                    SELECT id, {', '.join(PLAN_COLUMNS)} FROM submissions
+                    WHERE plan_id IS NULL AND roadmap_md IS NOT NULL
+                    ORDER BY id LIMIT ?
+                    """,
+                    (int(batch_size),),
+                ).fetchall()
+                if not rows:
+                    break
+                updates = []
+                for r in rows:
+                    texts = [self._unpack_text(r[c]) or "" for c in PLAN_COLUMNS]
+                    updates.append((self._store_plan(conn, texts), r["id"]))
+                conn.executemany(
+                    f"UPDATE submissions SET plan_id=?, {', '.join(f'{c}=NULL' for c in PLAN_COLUMNS)} WHERE id=?",
+                    updates,
+                )
+            total += len(rows)
+        if vacuum:
+            self._conn().execute("VACUUM;")
+        return total
+
+    # ----------------- actions -----------------
+    def log_action(
+        self,
+        submission_id: int,
+        actor: str,
+        action: str,
+        details: str = "",
+        defer: bool = False,
+    ) -> None:
+        """
+        Append one audit row. Inside unit_of_work() it joins that transaction.
+        defer=True queues it for the write-behind flusher instead (no commit on
+        the caller's path; the row may be lost if the process dies first).
+        """
+        if defer:
+            self._enqueue_action(int(submission_id), actor, action, details)
+            return
+        with self.unit_of_work() as conn:
+            self._insert_actions(conn, int(submission_id), actor or "system", [(action, details)])
+
+    def _insert_actions(
+        self, conn: sqlite3.Connection, submission_id: int, actor: str, rows: AuditRows
+    ) -> None:
+        now = self._now()
+        conn.executemany(
+            """
+            INSERT INTO submission_actions (submission_id, created_at, actor, action, details)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [(int(submission_id), now, actor or "system", action or "ACTION", details or "") for action, details in rows],
+        )
+
+    # ----------------- write-behind audit queue -----------------
+    def _enqueue_action(self, submission_id: int, actor: str, action: str, details: str) -> None:
+        row = (submission_id, self._now(), actor or "system", action or "ACTION", details or "")
+        with self._audit_lock:
+            self._audit_queue.append(row)
+            full = len(self._audit_queue) >= self.AUDIT_BATCH_SIZE
+            if self._audit_thread is None:
+                self._audit_thread = threading.Thread(
+                    target=self._audit_flusher, name="audit-flush", daemon=True
+                )
+                self._audit_thread.start()
+                atexit.register(self.flush_actions)
+        if full:
+            self._audit_wakeup.set()
+
+    def _audit_flusher(self) -> None:
+        while True:
+            self._audit_wakeup.wait(self.AUDIT_FLUSH_SECONDS)
+            self._audit_wakeup.clear()
+            try:
+                self.flush_actions()
+            except Exception as e:
+                logger.warning(f"Audit flush failed (will retry): {e}")
+
+    def flush_actions(self) -> int:
+        """Write queued (deferred) audit rows in one transaction; returns how many"""
+        with self._audit_lock:
+            rows, self._audit_queue = self._audit_queue, []
+        if not rows:
+            return 0
+        try:
+            with self.unit_of_work() as conn:
+                conn.executemany(
+                    """
+                    INSERT INTO submission_actions (submission_id, created_at, actor, action, details)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    rows,
+                )
+        except Exception:
+            with self._audit_lock:
+                self._audit_queue[:0] = rows  # put back, oldest first
+            raise
+        return len(rows)
+
+    def _flush_before_read(self) -> None:
+        # Deferred rows first, so the admin sees their own actions
+        try:
+            self.flush_actions()
+        except sqlite3.Error as e:
+            logger.warning(f"Audit flush before read failed: {e}")
 
     def get_actions(self, submission_id: int, limit: int = 200) -> List[Dict[str, Any]]:
-        with self._conn() as conn:
+        """Newest first (by action id, i.e. insertion order)"""
+        self._flush_before_read()
+        with self.unit_of_work() as conn:
             rows = conn.execute(
                 """
-                SELECT created_at, actor, action, details
+                SELECT id, created_at, actor, action, details
                 FROM submission_actions
                 WHERE submission_id=?
-                ORDER BY created_at DESC
+                ORDER BY id DESC
                 LIMIT ?
                 """,
                 (int(submission_id), int(limit)),
             ).fetchall()
         return [dict(r) for r in rows]
+
+    def get_actions_since(self, submission_id: int, after_id: int = 0, limit: int = 200) -> List[Dict[str, Any]]:
+        """Actions with id > after_id, oldest first; the last row's id is the next cursor"""
+        self._flush_before_read()
+        with self.unit_of_work() as conn:
+            rows = conn.execute(
+                """
+                SELECT id, created_at, actor, action, details
+                FROM submission_actions
+                WHERE submission_id=? AND id > ?
+                ORDER BY id ASC
+                LIMIT ?
+                """,
+                (int(submission_id), int(after_id or 0), int(limit)),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+
+_stores: Dict[str, SubmissionStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(db_path: str = DEFAULT_DB_PATH) -> SubmissionStore:
+    """
+    The process-wide SubmissionStore for db_path, created (and migrated) on
+    first use. app.py and api_server.py share it when loaded in one process.
+    """
+    key = os.path.abspath(db_path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = SubmissionStore(db_path)
+        return store
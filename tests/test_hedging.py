@@ -0,0 +1,97 @@
+# tests/test_hedging.py - Hedged LLM calls: primary win, hedge win, hard timeout
+import threading
+import time
+
+import pytest
+
+from services.hedging import Hedger, HedgeTimeout
+
+
+@pytest.fixture
+def release():
+    """Set at teardown so calls left hanging by a test finish"""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def test_primary_wins_without_hedging():
+    hedger = Hedger(default_delay=1.0)
+    assert hedger.run(lambda: "fast", timeout=2) == "fast"
+    stats = hedger.stats()
+    assert (stats["calls"], stats["hedged"], stats["primary_wins"]) == (1, 0, 1)
+
+
+def test_hedge_wins_when_primary_is_slow(release):
+    hedger = Hedger(default_delay=0.05)
+    calls = []
+
+    def call():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)  # the primary hangs
+            return "primary"
+        return "hedge"
+
+    started = time.monotonic()
+    assert hedger.run(call, timeout=2) == "hedge"
+    assert time.monotonic() - started < 1
+    stats = hedger.stats()
+    assert (stats["hedged"], stats["hedge_wins"], stats["timeouts"]) == (1, 1, 0)
+
+
+def test_slow_primary_still_wins_over_slower_hedge():
+    hedger = Hedger(default_delay=0.05)
+    calls = []
+
+    def call():
+        calls.append(1)
+        time.sleep(0.15 if len(calls) == 1 else 1.0)
+        return len(calls)
+
+    hedger.run(call, timeout=2)
+    stats = hedger.stats()
+    assert (stats["hedged"], stats["primary_wins"], stats["hedge_wins"]) == (1, 1, 0)
+
+
+def test_timeout_before_hedge_delay(release):
+    hedger = Hedger(default_delay=1.0)
+    started = time.monotonic()
+    with pytest.raises(HedgeTimeout):
+        hedger.run(lambda: release.wait(5), timeout=0.1)
+    assert time.monotonic() - started < 0.5
+    stats = hedger.stats()
+    assert (stats["hedged"], stats["timeouts"]) == (0, 1)
+
+
+def test_timeout_after_hedging(release):
+    hedger = Hedger(default_delay=0.05)
+    with pytest.raises(HedgeTimeout):
+        hedger.run(lambda: release.wait(5), timeout=0.2)
+    stats = hedger.stats()
+    assert (stats["hedged"], stats["timeouts"]) == (1, 1)
+
+
+def test_unhedged_run_only_applies_the_timeout(release):
+    hedger = Hedger(default_delay=0.01)
+    with pytest.raises(HedgeTimeout):
+        hedger.run(lambda: release.wait(5), timeout=0.1, hedge=False)
+    assert hedger.stats()["hedged"] == 0
+
+
+def test_fast_failure_is_raised_for_the_retry_policy():
+    hedger = Hedger(default_delay=1.0)
+
+    def fail():
+        raise ConnectionError("reset")
+
+    with pytest.raises(ConnectionError):
+        hedger.run(fail, timeout=1)
+
+
+def test_hedge_delay_follows_recent_latency():
+    hedger = Hedger(percentile=95, default_delay=8.0, min_samples=5)
+    assert hedger.hedge_delay() == 8.0
+    for seconds in (0.1, 0.2, 0.3, 0.4, 2.0):
+        hedger.latency.record(seconds)
+    assert hedger.hedge_delay() == 2.0
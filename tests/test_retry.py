@@ -0,0 +1,127 @@
+# tests/test_retry.py - Error classification, backoff and deadlines
+import asyncio
+import time
+
+import pytest
+
+from services.hedging import HedgeTimeout
+from services.retry import Deadline, DeadlineExceeded, RetryPolicy, is_retryable
+
+
+class StatusError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class GrpcCode:
+    def __init__(self, number):
+        self.value = (number, "name")
+
+
+class GrpcError(Exception):
+    def __init__(self, number):
+        super().__init__("rpc error")
+        self.code = GrpcCode(number)
+
+
+@pytest.mark.parametrize("exc, retryable", [
+    (ConnectionError("reset"), True),
+    (TimeoutError("read timed out"), True),
+    (DeadlineExceeded(), False),
+    (HedgeTimeout("no answer"), False),
+    (StatusError(429), True),
+    (StatusError(503), True),
+    (StatusError(400), False),
+    (StatusError(403), False),
+    (GrpcError(14), True),  # UNAVAILABLE -> 503
+    (GrpcError(3), False),  # INVALID_ARGUMENT -> 400
+    (Exception("429 RESOURCE_EXHAUSTED: quota"), True),
+    (Exception("400 API_KEY_INVALID"), False),
+    (ValueError("bad value"), False),
+    (KeyError("text"), False),
+    (RuntimeError("socket closed unexpectedly"), True),
+])
+def test_is_retryable(exc, retryable):
+    assert is_retryable(exc) is retryable
+
+
+def _flaky(errors, result="ok"):
+    """fn failing with each of `errors` in turn, then returning result"""
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return fn, calls
+
+
+def test_transient_errors_are_retried():
+    fn, calls = _flaky([ConnectionError(), StatusError(503)])
+    assert RetryPolicy(max_attempts=3, base_delay=0.001).run(fn) == "ok"
+    assert len(calls) == 3
+
+
+def test_fatal_error_is_raised_at_once():
+    fn, calls = _flaky([StatusError(400)])
+    with pytest.raises(StatusError):
+        RetryPolicy(max_attempts=3, base_delay=0.001).run(fn)
+    assert len(calls) == 1
+
+
+def test_gives_up_after_max_attempts():
+    fn, calls = _flaky([ConnectionError()] * 5)
+    with pytest.raises(ConnectionError):
+        RetryPolicy(max_attempts=2, base_delay=0.001).run(fn)
+    assert len(calls) == 2
+
+
+def test_no_retry_when_backoff_would_pass_the_deadline():
+    fn, calls = _flaky([ConnectionError()])
+    started = time.monotonic()
+    with pytest.raises(ConnectionError):
+        RetryPolicy(max_attempts=3, base_delay=5.0, jitter=0).run(fn, deadline=Deadline(0.5))
+    assert len(calls) == 1
+    assert time.monotonic() - started < 0.5
+
+
+def test_expired_deadline_stops_before_calling():
+    deadline = Deadline(0.01)
+    time.sleep(0.02)
+    fn, calls = _flaky([])
+    with pytest.raises(DeadlineExceeded):
+        RetryPolicy().run(fn, deadline=deadline)
+    assert not calls
+
+
+def test_backoff_is_capped_and_jittered():
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0, jitter=0.5)
+    for attempt in range(6):
+        delay = policy.backoff(attempt)
+        cap = min(4.0, 2 ** attempt)
+        assert cap * 0.5 <= delay <= cap
+
+
+def test_deadline():
+    assert Deadline().remaining() is None and not Deadline().expired()
+    assert Deadline(0).remaining() is None  # 0 = no budget limit
+    deadline = Deadline(0.05)
+    assert 0 < deadline.remaining() <= 0.05
+    deadline.check()
+    time.sleep(0.06)
+    assert deadline.expired() and deadline.remaining() == 0.0
+    with pytest.raises(DeadlineExceeded):
+        deadline.check()
+
+
+def test_async_attempt_is_cut_off_at_the_deadline():
+    async def hang():
+        await asyncio.sleep(5)
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(RetryPolicy(base_delay=0.001).run_async(hang, deadline=Deadline(0.1)))
+    assert time.monotonic() - started < 1
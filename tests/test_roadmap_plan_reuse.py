@@ -0,0 +1,105 @@
+# tests/test_roadmap_plan_reuse.py - RoadmapService.generate with a plan store
+import asyncio
+
+import pytest
+
+from config import Config
+from models import Program, Session, StudentProfile
+from services.roadmap import RoadmapService
+from services.submissions_store import SubmissionStore
+
+
+class FakeLLM:
+    """Stands in for LLMClient: counts calls, answers with fixed Markdown"""
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.calls = 0
+
+    def generate(self, prompt, system_prompt="", deadline=None):
+        self.calls += 1
+        return "### Best-fit themes\n- Strong match for robotics."
+
+
+class FakeSearch:
+    """Stands in for ProgramSearchService (catalog_version is a property there too)"""
+
+    def __init__(self):
+        self.calls = 0
+        self.catalog_version = "v1"
+
+    def search_with_profile(self, profile, top_k):
+        self.calls += 1
+        program = Program(
+            program_name="Mechatronics Engineering",
+            program_url="https://uni.example/mechatronics",
+            university_name="Example University",
+            admission_average="85-90%",
+            program_id="mech-1",
+        )
+        return [(program, 0.9, {"final": 0.9, "grade_assessment": "Good", "missing_prereqs": []})]
+
+
+@pytest.fixture
+def service(tmp_path):
+    config = Config()
+    config.ROADMAP_LLM_FORMATTING = False
+    config.PLAN_REUSE_HOURS = 12
+    store = SubmissionStore(str(tmp_path / "submissions.db"))
+    return RoadmapService(config, FakeLLM(config), FakeSearch(), plan_store=store), store
+
+
+def _profile() -> StudentProfile:
+    return StudentProfile(
+        name="Ana", grade="Grade 12", average=90.0, interests="robotics",
+        subjects=["MHF4U"], extracurriculars="robotics club", location="Toronto", preferences="co-op",
+    )
+
+
+def _save(store: SubmissionStore, data: dict) -> int:
+    sid = store.create_submission({"student_name": "Ana", "grade": "Grade 12", "average": 90, "interests": "robotics"})["id"]
+    return store.save_generated_plan(
+        sid, data["md"], data["programs"], data["timeline_events"], data["projects"],
+        profile_fingerprint=data.get("fingerprint", ""), catalog_version=data.get("catalog_version", ""),
+    )
+
+
+def test_first_generation_then_reuse(service):
+    roadmap, store = service
+
+    first = roadmap.generate(_profile(), Session())
+    assert first.ok, first.message
+    assert first.data["catalog_version"] == "v1"
+    assert first.data["fingerprint"] == _profile().fingerprint()
+    assert "plan_id" not in first.data
+    assert (roadmap.search.calls, roadmap.llm.calls) == (1, 1)
+    plan_id = _save(store, first.data)
+
+    second = roadmap.generate(_profile(), Session())
+    assert second.ok, second.message
+    assert second.data["plan_id"] == plan_id
+    assert second.message == first.message
+    assert second.data["programs"] == first.data["programs"]
+    # Served from the store: no search, no LLM
+    assert (roadmap.search.calls, roadmap.llm.calls) == (1, 1)
+
+
+def test_async_reuse(service):
+    roadmap, store = service
+    _save(store, roadmap.generate(_profile(), Session()).data)
+
+    result = asyncio.run(roadmap.generate_async(_profile(), Session()))
+    assert result.ok and result.data.get("plan_id")
+    assert roadmap.llm.calls == 1
+
+
+def test_new_catalog_version_regenerates(service):
+    roadmap, store = service
+    _save(store, roadmap.generate(_profile(), Session()).data)
+
+    roadmap.search.catalog_version = "v2"
+    result = roadmap.generate(_profile(), Session())
+    assert result.ok
+    assert "plan_id" not in result.data
+    assert result.data["catalog_version"] == "v2"
+    assert roadmap.llm.calls == 2
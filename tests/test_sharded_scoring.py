@@ -0,0 +1,82 @@
+# tests/test_sharded_scoring.py - Sharded scoring ranks exactly like in-process scoring
+import numpy as np
+import pytest
+
+from config import Config
+from models import Program, StudentProfile
+from services.program_search import ProgramSearchService
+from services.sharded_scoring import ShardedScorer
+
+NAMES = ["Computer Science Co-op", "Nursing", "Mechanical Engineering", "Business Administration",
+         "Software Engineering", "Biology"]
+
+
+def _programs(n: int = 120):
+    return [
+        Program(
+            program_name=f"{NAMES[i % len(NAMES)]} {i}",
+            program_url=f"https://uni{i % 5}.example/p{i}",
+            university_name=f"University {i % 5}",
+            admission_average=["85-90%", "", "Below 75%", "Mid 80s"][i % 4],
+            prerequisites="ENG4U, MHF4U",
+            location="Toronto",
+            program_id=f"p{i}",
+        )
+        for i in range(n)
+    ]
+
+
+PROFILE = StudentProfile(
+    name="Ana", grade="Grade 12", average=86.0, interests="computer science",
+    subjects=["MHF4U"], extracurriculars="robotics", location="Toronto", preferences="",
+)
+
+
+@pytest.fixture(scope="module")
+def service():
+    return ProgramSearchService(Config(), programs=_programs())
+
+
+def _scoring_args(service):
+    user_fields, is_stem, corrected = service._detect_user_fields(PROFILE.interests)
+    # Spread-out embedding scores so ties don't hide ordering bugs
+    scores = np.linspace(1.0, 0.0, len(service.programs), dtype=np.float32)
+    return scores, user_fields, is_stem, corrected
+
+
+@pytest.mark.parametrize("bounds", [(0, 120), (0, 40, 80, 120), (0, 7, 50, 51, 120)])
+def test_merge_matches_in_process_ranking(service, bounds):
+    scores, user_fields, is_stem, corrected = _scoring_args(service)
+    programs = service.programs
+    expected = service._rank_scored(
+        service._score_rows(programs, range(len(programs)), PROFILE, scores, user_fields, is_stem, corrected), 10
+    )
+
+    parts = []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        shard = programs[start:stop]
+        scored = service._score_rows(
+            shard, range(len(shard)), PROFILE, scores[start:stop], user_fields, is_stem, corrected, row_offset=start
+        )
+        parts.append(service._rank_scored(scored, 10))
+
+    assert ShardedScorer.merge(parts, 10) == expected
+
+
+def test_worker_processes_match_in_process_search(service):
+    expected = service.search_with_profile(PROFILE, top_k=10)
+
+    scorer = ShardedScorer(service.config, workers=2)
+    scorer.min_candidates = 1
+    scorer.start(service.catalog)
+    try:
+        scores, user_fields, is_stem, corrected = _scoring_args(service)
+        assert scorer.score(service.catalog, None, PROFILE, scores, user_fields, is_stem, corrected, 10) is not None
+
+        service._sharded_scorer = scorer
+        sharded = service.search_with_profile(PROFILE, top_k=10)
+    finally:
+        service._sharded_scorer = None
+        scorer.close()
+
+    assert [(p.program_id, round(s, 6)) for p, s, _ in sharded] == [(p.program_id, round(s, 6)) for p, s, _ in expected]
@@ -0,0 +1,114 @@
+# tests/test_singleflight.py - Coalescing identical in-flight calls
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.retry import Deadline, DeadlineExceeded
+from services.singleflight import SingleFlight
+
+
+class Interrupted(BaseException):
+    """Stands in for KeyboardInterrupt / generator close in the leader"""
+
+
+def _wait_for(predicate, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < end, "timed out waiting"
+        time.sleep(0.005)
+
+
+def _run_with_followers(flight, fn, followers=3):
+    """Leader runs fn (which blocks on the returned event); followers join it. Returns (results, errors, release)"""
+    results, errors = [], []
+    release = threading.Event()
+
+    def call():
+        try:
+            results.append(flight.do("k", fn, release))
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call)]
+    threads[0].start()
+    _wait_for(lambda: flight.stats()["in_flight"] == 1)
+    for _ in range(followers):
+        threads.append(threading.Thread(target=call))
+        threads[-1].start()
+    _wait_for(lambda: flight.stats()["coalesced"] == followers)
+    release.set()
+    for t in threads:
+        t.join(2)
+    return results, errors
+
+
+def test_followers_share_the_leaders_result():
+    flight = SingleFlight()
+    calls = []
+
+    def work(release):
+        calls.append(1)
+        release.wait(2)
+        return {"plan": 1}
+
+    results, errors = _run_with_followers(flight, work)
+    assert not errors
+    assert len(calls) == 1
+    assert len(results) == 4 and all(r is results[0] for r in results)
+    assert flight.stats() == {"leaders": 1, "coalesced": 3, "in_flight": 0}
+
+
+def test_leader_failure_reaches_followers():
+    flight = SingleFlight()
+    boom = ValueError("boom")
+
+    def work(release):
+        release.wait(2)
+        raise boom
+
+    results, errors = _run_with_followers(flight, work)
+    assert not results
+    assert len(errors) == 4 and all(e is boom for e in errors)
+
+
+def test_leader_interruption_reaches_followers_and_frees_key():
+    flight = SingleFlight()
+
+    def work(release):
+        release.wait(2)
+        raise Interrupted()
+
+    _, errors = _run_with_followers(flight, work, followers=2)
+    assert len(errors) == 3 and all(isinstance(e, Interrupted) for e in errors)
+    # The key is released, so the next call runs fresh
+    assert flight.do("k", lambda: "again") == "again"
+
+
+def test_follower_gives_up_at_its_deadline():
+    flight = SingleFlight()
+    future, leader = flight.claim("k")
+    assert leader
+    with pytest.raises(DeadlineExceeded):
+        SingleFlight.wait(flight.claim("k")[0], Deadline(0.05))
+    flight.resolve("k", future, "late")
+    assert future.result() == "late"
+
+
+def test_async_follower_joins_a_sync_leader():
+    flight = SingleFlight()
+    future, _ = flight.claim("k")
+
+    async def follower():
+        async def never():
+            raise AssertionError("follower must not run the work")
+        return await flight.do_async("k", never)
+
+    async def main():
+        task = asyncio.ensure_future(follower())
+        await asyncio.sleep(0.01)
+        flight.resolve("k", future, "shared")
+        return await task
+
+    assert asyncio.run(main()) == "shared"
@@ -0,0 +1,48 @@
+# tests/test_submission_export.py - CSV export escapes spreadsheet formulas
+import csv
+import io
+import json
+
+import pytest
+
+from services import submission_export
+from services.submissions_store import SubmissionStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SubmissionStore(str(tmp_path / "submissions.db"))
+    store.create_submission({
+        "student_name": '=HYPERLINK("http://evil.example","Ana")',
+        "grade": "Grade 12", "average": 90, "interests": "@SUM(A1:A9)",
+        "location": "-2+3", "preferences": "co-op, near home",
+    })
+    return store
+
+
+def _csv(store, raw=False):
+    columns = ["student_name", "interests", "location", "preferences", "average"]
+    text = "".join(submission_export.export(store, "csv", columns, raw=raw))
+    return list(csv.DictReader(io.StringIO(text)))[0]
+
+
+def test_formula_cells_are_escaped(store):
+    row = _csv(store)
+    assert row["student_name"] == '\'=HYPERLINK("http://evil.example","Ana")'
+    assert row["interests"] == "'@SUM(A1:A9)"
+    assert row["location"] == "'-2+3"
+    assert row["preferences"] == "co-op, near home"
+    assert row["average"] == "90.0"
+
+
+def test_raw_csv_and_ndjson_are_unchanged(store):
+    assert _csv(store, raw=True)["student_name"].startswith("=HYPERLINK")
+    line = next(submission_export.export(store, "ndjson", ["student_name"]))
+    assert json.loads(line)["student_name"].startswith("=HYPERLINK")
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("=1+1", "'=1+1"), ("+1", "'+1"), ("\tx", "'\tx"), ("Ana", "Ana"), (-5, -5), (None, None),
+])
+def test_csv_safe(value, expected):
+    assert submission_export.csv_safe(value) == expected
@@ -0,0 +1,124 @@
+# tests/test_submissions_migrations.py - Upgrading a pre-versioning submissions DB
+import json
+import sqlite3
+
+from services.submissions_store import SubmissionStore
+
+# submissions / submission_actions as the first release created them (user_version 0)
+BASELINE_SCHEMA = """
+CREATE TABLE submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    student_name TEXT NOT NULL,
+    student_email TEXT,
+    wants_email INTEGER NOT NULL DEFAULT 0,
+    grade TEXT NOT NULL,
+    average REAL NOT NULL,
+    subjects_json TEXT NOT NULL,
+    interests TEXT NOT NULL,
+    interest_details TEXT,
+    extracurriculars TEXT,
+    location TEXT,
+    preferences TEXT,
+    status TEXT NOT NULL DEFAULT 'NEW',
+    resume_token TEXT NOT NULL,
+    roadmap_md TEXT,
+    ui_programs_json TEXT,
+    ui_timeline_json TEXT,
+    ui_projects_json TEXT,
+    email_subject TEXT,
+    email_body_text TEXT,
+    updated_by TEXT,
+    sent_at TEXT
+);
+CREATE INDEX idx_status ON submissions(status);
+CREATE INDEX idx_token ON submissions(resume_token);
+CREATE TABLE submission_actions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    submission_id INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    actor TEXT NOT NULL,
+    action TEXT NOT NULL,
+    details TEXT,
+    FOREIGN KEY(submission_id) REFERENCES submissions(id)
+);
+CREATE INDEX idx_actions_sub ON submission_actions(submission_id);
+"""
+
+PROGRAMS = [
+    {"program_id": "cs-1", "program_name": "Computer Science", "university_name": "Waterloo",
+     "program_url": "https://uwaterloo.ca/cs", "match_percent": 91, "grade_assessment": "Good"},
+    {"program_id": "se-2", "program_name": "Software Engineering", "university_name": "McMaster",
+     "program_url": "https://mcmaster.ca/se", "match_percent": 84, "grade_assessment": "Reach"},
+]
+
+
+def _baseline_db(path) -> None:
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.execute(
+        """
+        INSERT INTO submissions (
+            created_at, updated_at, student_name, student_email, wants_email, grade, average,
+            subjects_json, interests, status, resume_token, roadmap_md, ui_programs_json
+        ) VALUES ('2025-09-03T10:00:00', '2025-09-03T10:05:00', 'Priya Sharma', 'priya@example.com', 1,
+                  'Grade 12', 91.5, '["MHF4U"]', 'robotics and AI', 'GENERATED', 'tok',
+                  '## Roadmap\nFocus on mechatronics co-op.', ?)
+        """,
+        (json.dumps(PROGRAMS),),
+    )
+    conn.execute(
+        "INSERT INTO submission_actions (submission_id, created_at, actor, action, details) "
+        "VALUES (1, '2025-09-03T10:00:00', 'student', 'SUBMITTED', '')"
+    )
+    conn.commit()
+    conn.close()
+
+
+def _columns(conn, table):
+    return {r[1] for r in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def test_baseline_db_is_migrated_to_current_schema(tmp_path):
+    path = str(tmp_path / "submissions.db")
+    _baseline_db(path)
+
+    store = SubmissionStore(path)
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SubmissionStore.SCHEMA_VERSION
+    assert {"github_issue_number", "github_status", "plan_id"} <= _columns(conn, "submissions")
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert {"plans", "recommendations"} <= tables
+    indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    assert {"idx_queue", "idx_queue_status", "idx_actions_sub_id"} <= indexes
+    assert "idx_actions_sub" not in indexes
+    conn.close()
+
+    # Existing rows survive and are backfilled into the new structures
+    sub = store.unpack(store.admin_get(1))
+    assert sub["student_name"] == "Priya Sharma"
+    assert "mechatronics" in sub["roadmap_md"]
+    assert [p["program_id"] for p in sub["ui_programs"]] == ["cs-1", "se-2"]
+
+    top = store.top_recommended_programs(since="2025-09")
+    assert [(t["program_id"], t["times"]) for t in top] == [("cs-1", 1), ("se-2", 1)]
+    if store.fts_enabled:
+        assert [hit["id"] for hit in store.search_submissions("mechatron")] == [1]
+
+
+def test_current_db_is_left_alone(tmp_path):
+    path = str(tmp_path / "submissions.db")
+    _baseline_db(path)
+    SubmissionStore(path).close()
+
+    conn = sqlite3.connect(path)
+    before = conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall()
+    conn.close()
+
+    store = SubmissionStore(path)
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall() == before
+    assert conn.execute("SELECT COUNT(*) FROM recommendations").fetchone()[0] == len(PROGRAMS)
+    conn.close()
+    assert store.admin_get(1)["student_name"] == "Priya Sharma"
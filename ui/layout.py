@@ -228,6 +228,7 @@ def create_ui_layout(config: Config) -> dict:
                     interactive=False,
                     wrap=True,
                 )
+                queue_state = gr.State({})  # rows + change cursor, so Refresh only fetches deltas
 
                 gr.Markdown("### Review + Edit Email")
                 with gr.Row():
@@ -252,11 +253,18 @@ def create_ui_layout(config: Config) -> dict:
                     interactive=False,
                     wrap=True,
                 )
+                actions_state = gr.State({})  # loaded submission's rows + last action id
 
                 gr.Markdown("### GitHub Diagnostics")
                 github_diag_btn = gr.Button("Run GitHub Diagnostics", elem_classes="secondary-btn")
                 github_diag_output = gr.Markdown("", elem_classes="output-box")
 
+                gr.Markdown("### Program Catalog")
+                with gr.Row():
+                    catalog_status_btn = gr.Button("Catalog Status", elem_classes="secondary-btn")
+                    reload_catalog_btn = gr.Button("Reload Program Catalog", elem_classes="secondary-btn")
+                catalog_status = gr.Markdown("", elem_classes="hint-text")
+
     return {
         "session_state": session_state,
         "name_state": name_state,
@@ -337,6 +345,7 @@ def create_ui_layout(config: Config) -> dict:
             "refresh_queue_btn": refresh_queue_btn,
             "open_next_btn": open_next_btn,
             "queue_table": queue_table,
+            "queue_state": queue_state,
 
             "review_id": review_id,
             "load_btn": load_btn,
@@ -348,7 +357,11 @@ def create_ui_layout(config: Config) -> dict:
             "mark_sent_btn": mark_sent_btn,
             "gmail_helper": gmail_helper,
             "actions_table": actions_table,
+            "actions_state": actions_state,
             "github_diag_btn": github_diag_btn,
             "github_diag_output": github_diag_output,
+            "catalog_status_btn": catalog_status_btn,
+            "reload_catalog_btn": reload_catalog_btn,
+            "catalog_status": catalog_status,
         }
     }
\ No newline at end of file
@@ -6,9 +6,14 @@ import json
 import os
 import time
 import concurrent.futures
+from pathlib import Path
 from dotenv import load_dotenv
 from huggingface_hub import HfApi
 
+from config import Config
+from services.program_search import ProgramSearchService, knn_graph_path
+from services.llm_client import legacy_sdk_options
+
 # --- SETUP ---
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -17,7 +22,8 @@ if not GOOGLE_API_KEY:
     print("⚠️ Error: GOOGLE_API_KEY not found in .env file.")
     exit()
 
-genai.configure(api_key=GOOGLE_API_KEY)
+# GEMINI_BASE_URL points the embedding calls at mock_gemini_server.py for dry runs
+genai.configure(api_key=GOOGLE_API_KEY, **legacy_sdk_options(Config()))
 HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
 
 # --- SCRAPING FUNCTIONS ---
@@ -119,15 +125,41 @@ def main():
     print(f"\n✅ SUCCESS! New database saved with {len(final_database)} programs.")
     print("👉 Now upload 'university_data_cached.json' to Hugging Face.")
 
+def build_similarity_graph():
+    """Precompute the program-to-program kNN graph next to the JSON file"""
+    print("🔗 Building similar-programs graph...")
+    config = Config()
+    config.PROGRAMS_FILE = Path("university_data_cached.json").resolve()
+    config.CATALOG_RELOAD_INTERVAL_SECONDS = 0
+    # Loading the catalog builds (and saves) the graph when it is missing/stale
+    search = ProgramSearchService(config)
+    path = knn_graph_path(config.PROGRAMS_FILE)
+    if path.exists() or search.save_knn_graph():
+        print(f"✅ Saved {path.name}")
+    else:
+        print("⚠️ No embeddings - similarity graph skipped")
+
 if __name__ == "__main__":
     # 1. Run the Scraper
     main()
     
-    # 2. Upload ONLY the data file to Hugging Face
+    # 2. Precompute "more like this" neighbours offline
+    build_similarity_graph()
+    
+    # 3. Upload ONLY the data files to Hugging Face
     print("🚀 Uploading database to Hugging Face...")
     
     try:
         api = HfApi()
+        # Graph first, so a hot reload of the JSON finds a matching graph
+        if os.path.exists("university_data_cached.knn.npz"):
+            api.upload_file(
+                path_or_fileobj="university_data_cached.knn.npz",
+                path_in_repo="university_data_cached.knn.npz",
+                repo_id="rajshah13/saarthi",
+                repo_type="space",
+                token=os.getenv("HF_TOKEN")
+            )
         api.upload_file(
             path_or_fileobj="university_data_cached.json", # The local file
             path_in_repo="university_data_cached.json",    # Where it goes in the Space
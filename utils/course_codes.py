@@ -0,0 +1,19 @@
+# utils/course_codes.py - Ontario course code extraction
+import re
+from typing import List
+
+COURSE_CODE_RE = re.compile(r"\b([A-Za-z]{3}\d[A-Za-z])\b")  # e.g., MHF4U, SCH4U, SPH4U
+
+
+def clean_course_codes(text: str) -> List[str]:
+    """Unique course codes in order of appearance (max 12)"""
+    if not text:
+        return []
+    hits = [m.group(1).upper() for m in COURSE_CODE_RE.finditer(text)]
+    out, seen = [], set()
+    for h in hits:
+        h = h.replace("O", "0")  # just in case
+        if h not in seen:
+            seen.add(h)
+            out.append(h)
+    return out[:12]